@@ -0,0 +1,270 @@
+"""
+Admission control for the FastAPI tier.
+
+``RateLimiter`` gives each client, identified by ``ClientKeys`` from its IP
+address or a configured API key, a token bucket so one noisy integration
+cannot crowd out the rest.
+``ConcurrencyLimiter`` caps the calls in flight to the MCP server and queues
+a bounded number more in arrival order; past that, callers are turned away
+at once with a ``Retry-After`` hint rather than waiting behind a backlog
+that would only make everyone's latency worse.
+"""
+
+import asyncio
+import contextlib
+import ipaddress
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, Optional, Sequence
+
+from responses import dumps
+
+
+class OverloadedError(Exception):
+    """A request was not admitted; ``retry_after`` is a hint in seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """Token bucket per client: ``rate`` requests per second, bursts up to ``burst``"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, 2 * rate)
+        self.max_clients = max_clients
+        # client -> [tokens, last refill], least recently seen first
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self.stats = {"admitted": 0, "limited": 0}
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        burst = os.getenv("RATE_LIMIT_BURST")
+        return cls(
+            rate=float(os.getenv("RATE_LIMIT_RPS", "50")),
+            burst=float(burst) if burst else None,
+            max_clients=int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def check(self, client: str) -> float:
+        """Take a token for ``client``; 0 if admitted, else seconds until one is available"""
+        now = time.monotonic()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = [self.burst, now]
+            # A forgotten client just starts again with a full bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            self.stats["admitted"] += 1
+            return 0.0
+        self.stats["limited"] += 1
+        return (1 - bucket[0]) / self.rate
+
+    def describe(self) -> Dict[str, Any]:
+        return {"rate": self.rate, "burst": self.burst, "clients": len(self._buckets), **self.stats}
+
+
+class ConcurrencyLimiter:
+    """At most ``limit`` holders at a time, with a FIFO queue of at most ``max_queue`` waiters"""
+
+    def __init__(self, limit: int = 100, max_queue: int = 200, queue_timeout: float = 10.0):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Smoothed time a slot is held, for Retry-After estimates
+        self._hold = 0.1
+        self.stats = {"admitted": 0, "waited": 0, "rejected": 0, "timed_out": 0}
+
+    @classmethod
+    def from_env(cls) -> "ConcurrencyLimiter":
+        return cls(
+            limit=int(os.getenv("MCP_MAX_IN_FLIGHT", "100")),
+            max_queue=int(os.getenv("MCP_QUEUE_MAX", "200")),
+            queue_timeout=float(os.getenv("MCP_QUEUE_TIMEOUT", "10")),
+        )
+
+    def full(self) -> bool:
+        """Whether a new caller would be turned away right now"""
+        return self.in_flight >= self.limit and len(self._waiters) >= self.max_queue
+
+    def retry_after(self) -> float:
+        """Rough time for the current backlog to drain"""
+        return self._hold * (len(self._waiters) / max(1, self.limit) + 1)
+
+    async def acquire(self) -> None:
+        """Take a slot, waiting in line if needed; raises ``OverloadedError`` when the line is full"""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self.stats["admitted"] += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise OverloadedError("Too many upstream requests queued", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.stats["waited"] += 1
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                self.release()
+            else:
+                with contextlib.suppress(ValueError):
+                    self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self.stats["timed_out"] += 1
+                raise OverloadedError(
+                    f"No upstream capacity within {self.queue_timeout:.1f}s", self.retry_after()
+                ) from None
+            raise
+        self.stats["admitted"] += 1
+
+    def release(self) -> None:
+        """Free a slot, handing it straight to the longest waiter if there is one"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._hold += 0.1 * (time.monotonic() - start - self._hold)
+            self.release()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "max_queue": self.max_queue,
+            **self.stats,
+        }
+
+
+class ClientKeys:
+    """The key a request is rate limited under
+
+    Headers are set by the caller, so they only count when they can be
+    checked: an API key when it is one of ``api_keys``, and ``X-Forwarded-For``
+    entries only as far as they were added by one of ``trusted_proxies``.
+    Anything else is keyed on the peer address, so a client cannot get a
+    fresh bucket by varying its headers.
+    """
+
+    def __init__(self, api_keys: Iterable[str] = (), trusted_proxies: Iterable[str] = ()):
+        self.api_keys = frozenset(api_keys)
+        self.trusted_proxies = [ipaddress.ip_network(proxy, strict=False) for proxy in trusted_proxies]
+
+    @classmethod
+    def from_env(cls) -> "ClientKeys":
+        api_keys = os.getenv("RATE_LIMIT_API_KEYS", "")
+        proxies = os.getenv("TRUSTED_PROXIES", "")
+        return cls(
+            api_keys=[key.strip() for key in api_keys.split(",") if key.strip()],
+            trusted_proxies=[proxy.strip() for proxy in proxies.split(",") if proxy.strip()],
+        )
+
+    def _trusted(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in proxy for proxy in self.trusted_proxies)
+
+    def api_key(self, headers: Dict[bytes, bytes]) -> Optional[str]:
+        """The request's API key, if it is a configured one"""
+        key = headers.get(b"x-api-key")
+        if key is None:
+            key = headers.get(b"authorization", b"")
+            scheme, _, token = key.partition(b" ")
+            if token and scheme.lower() == b"bearer":
+                key = token
+        key = key.decode("latin-1").strip()
+        return key if key in self.api_keys else None
+
+    def address(self, scope, headers: Dict[bytes, bytes]) -> str:
+        """The client's IP: the peer, or the last hop a trusted proxy forwarded for"""
+        client = scope.get("client")
+        address = client[0] if client else "unknown"
+        forwarded = headers.get(b"x-forwarded-for")
+        if not forwarded or not self.trusted_proxies:
+            return address
+        # Walk back from the peer while each hop is a proxy we trust
+        for hop in reversed(forwarded.decode("latin-1").split(",")):
+            if not self._trusted(address):
+                break
+            hop = hop.strip()
+            try:
+                ipaddress.ip_address(hop)
+            except ValueError:
+                break
+            address = hop
+        return address
+
+    def __call__(self, scope) -> str:
+        headers = dict(scope.get("headers") or ())
+        key = self.api_key(headers) if self.api_keys else None
+        if key is not None:
+            return "key:" + key
+        return "ip:" + self.address(scope, headers)
+
+
+class AdmissionMiddleware:
+    """ASGI middleware answering 429 with ``Retry-After`` to clients over their rate"""
+
+    def __init__(self, app, limiter: RateLimiter, exempt: Sequence[str] = (), keys: Optional[ClientKeys] = None):
+        self.app = app
+        self.limiter = limiter
+        self.exempt = tuple(exempt)
+        self.keys = keys or ClientKeys()
+
+    def _exempt(self, path: str) -> bool:
+        return any(path == prefix or path.startswith(prefix + "/") for prefix in self.exempt)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.limiter.enabled or self._exempt(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        wait = self.limiter.check(self.keys(scope))
+        if not wait:
+            await self.app(scope, receive, send)
+            return
+
+        body = dumps({"detail": "Rate limit exceeded"})
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(wait))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,249 @@
+"""
+Serving files that agents write to their workspaces.
+
+Each agent keeps its files in its own directory under the artifacts root: an
+agent whose workspace is the root itself is given ``<root>/<agent name>``
+instead (``ArtifactStore.workspace_for``), whether its calls come straight
+from a route or from a queued job.
+Files are streamed straight from disk, never read whole into memory or
+embedded in JSON. When the ASGI server offers the zero-copy extension, the
+file descriptor goes to ``sendfile``; otherwise the file is read in bounded
+chunks off the event loop. Responses carry ``ETag`` and ``Last-Modified``,
+honour conditional requests, and serve single byte ranges so large reports
+and datasets can be fetched piecewise or resumed.
+"""
+
+import mimetypes
+import os
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import quote
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+
+from resource_store import etag_for, etag_matches
+
+CHUNK_SIZE = 256 * 1024
+
+# Tools that write files, with the argument naming their agent and its default,
+# and the workspace the MCP server gives them by default
+WORKSPACE_TOOLS = {"create-agent": ("name", None), "run-agent-task": ("agent_name", "default")}
+DEFAULT_WORKSPACE = "./agent_workspace"
+
+
+def valid_scope(scope: str) -> bool:
+    """Whether ``scope`` can name a directory right under the artifacts root"""
+    return bool(scope) and scope not in (".", "..") and not any(c in scope for c in "/\\\0")
+
+
+class ArtifactStore:
+    """Resolves ``(scope, path)`` to files under ``root/scope`` without escaping it"""
+
+    def __init__(self, root: str):
+        self.root = os.path.realpath(root)
+        # The root as configured, to recognise workspaces without touching the disk
+        self._roots = {self.root, os.path.abspath(root)}
+
+    @classmethod
+    def from_env(cls) -> "ArtifactStore":
+        return cls(os.getenv("ARTIFACTS_DIR", "./agent_workspace"))
+
+    def workspace_for(self, workspace_path: Optional[str], scope: str) -> Optional[str]:
+        """Workspace for one agent, so ``/artifacts/<scope>`` reaches its files
+
+        A workspace at the artifacts root becomes ``<workspace>/<scope>``;
+        any other workspace is left as given.
+        """
+        if not workspace_path or not valid_scope(scope) or os.path.abspath(workspace_path) not in self._roots:
+            return workspace_path
+        return workspace_path.rstrip("/") + "/" + scope
+
+    def scoped_args(self, name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        """``args`` of a tool call with its workspace moved to its agent's own directory
+
+        Matches what ``/agent/create`` and ``/agent/task`` send, so an agent's
+        files land in the same place whether or not its task was queued.
+        """
+        if name not in WORKSPACE_TOOLS:
+            return args
+        arg, default = WORKSPACE_TOOLS[name]
+        scope = args.get(arg) or default
+        if not isinstance(scope, str):
+            return args
+        workspace = self.workspace_for(args.get("workspace_path") or DEFAULT_WORKSPACE, scope)
+        return {**args, "workspace_path": workspace}
+
+    def resolve(self, scope: str, path: str = "") -> str:
+        """Absolute path of an artifact; ``FileNotFoundError`` if missing or outside the scope"""
+        if not valid_scope(scope) or "\0" in path:
+            raise FileNotFoundError(scope)
+        base = os.path.realpath(os.path.join(self.root, scope))
+        full = os.path.realpath(os.path.join(base, path.lstrip("/")))
+        # Symlinks are followed, but only to targets inside the scope
+        if os.path.dirname(base) != self.root or os.path.commonpath([base, full]) != base:
+            raise FileNotFoundError(path)
+        if not os.path.exists(full):
+            raise FileNotFoundError(path)
+        return full
+
+    def listing(self, scope: str, path: str, directory: str) -> Dict[str, Any]:
+        """Entries of a directory, with links to fetch each one"""
+        prefix = path.strip("/")
+        base = self.resolve(scope)
+        entries: List[Dict[str, Any]] = []
+        with os.scandir(directory) as it:
+            for entry in sorted(it, key=lambda e: e.name):
+                if entry.is_symlink() and os.path.commonpath([base, os.path.realpath(entry.path)]) != base:
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                is_dir = stat.S_ISDIR(st.st_mode)
+                rel = f"{prefix}/{entry.name}" if prefix else entry.name
+                entries.append({
+                    "name": entry.name,
+                    "type": "directory" if is_dir else "file",
+                    "size": None if is_dir else st.st_size,
+                    "modified": st.st_mtime,
+                    "url": f"/artifacts/{quote(scope)}/{quote(rel)}" + ("/" if is_dir else ""),
+                })
+        return {"scope": scope, "path": prefix, "entries": entries}
+
+
+def file_version(st: os.stat_result) -> str:
+    """Validator from size and modification time, as static file servers use"""
+    return f"{st.st_size:x}-{st.st_mtime_ns:x}"
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive ``(start, end)`` of a single byte range, or ``None`` to send the whole file
+
+    Malformed and multi-range headers are ignored, as RFC 9110 allows.
+    Raises ``ValueError`` when the range is well-formed but unsatisfiable.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, sep, last = (part.strip() for part in header[6:].partition("-"))
+    if not sep or not (first or last) or not (first or "0").isdigit() or not (last or "0").isdigit():
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0 or size == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size:
+        raise ValueError("range starts past the end of the file")
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def _not_modified(headers: Mapping[str, str], version: str, mtime: float) -> bool:
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, version)
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _range_applies(headers: Mapping[str, str], etag: str, last_modified: str) -> bool:
+    # If-Range: only send a part if the client's copy is still current
+    if_range = headers.get("if-range")
+    return if_range is None or if_range.strip() in (etag, last_modified)
+
+
+async def file_response(path: str, headers: Mapping[str, str], method: str = "GET") -> Response:
+    """Full, partial, 304 or 416 response for a regular file"""
+    st = await run_in_threadpool(os.stat, path)
+    version = file_version(st)
+    etag = etag_for(version)
+    last_modified = formatdate(st.st_mtime, usegmt=True)
+    base = {"etag": etag, "last-modified": last_modified, "accept-ranges": "bytes"}
+    if _not_modified(headers, version, st.st_mtime):
+        return Response(status_code=304, headers=base)
+
+    size = st.st_size
+    start, end, status = 0, size - 1, 200
+    if _range_applies(headers, etag, last_modified):
+        try:
+            requested = parse_range(headers.get("range"), size)
+        except ValueError:
+            return Response(status_code=416, headers={**base, "content-range": f"bytes */{size}"})
+        if requested is not None:
+            (start, end), status = requested, 206
+            base["content-range"] = f"bytes {start}-{end}/{size}"
+
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return FileRangeResponse(
+        path, start, end - start + 1, status, base, media_type, send_body=method != "HEAD", whole=status == 200
+    )
+
+
+class FileRangeResponse(Response):
+    """Streams ``count`` bytes of a file from ``offset`` without buffering it"""
+
+    def __init__(
+        self,
+        path: str,
+        offset: int,
+        count: int,
+        status_code: int,
+        headers: Dict[str, str],
+        media_type: str,
+        send_body: bool = True,
+        whole: bool = False,
+    ):
+        super().__init__(
+            status_code=status_code,
+            headers={**headers, "content-length": str(count)},
+            media_type=media_type,
+        )
+        self.path = path
+        self.offset = offset
+        self.count = count
+        self.send_body = send_body
+        self.whole = whole
+
+    async def __call__(self, scope, receive, send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.count <= 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        extensions = scope.get("extensions") or {}
+        if "http.response.zerocopy" in extensions:
+            file = await run_in_threadpool(open, self.path, "rb")
+            try:
+                await send({"type": "http.response.zerocopy", "file": file, "offset": self.offset, "count": self.count})
+            finally:
+                file.close()
+            return
+        if "http.response.pathsend" in extensions and self.whole:
+            await send({"type": "http.response.pathsend", "path": self.path})
+            return
+
+        fd = await run_in_threadpool(os.open, self.path, os.O_RDONLY)
+        try:
+            offset, remaining = self.offset, self.count
+            while remaining:
+                chunk = await run_in_threadpool(os.pread, fd, min(CHUNK_SIZE, remaining), offset)
+                if not chunk:
+                    # Truncated while we were sending; nothing more to give
+                    break
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": bool(remaining)})
+            if remaining:
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            os.close(fd)
@@ -0,0 +1,7 @@
+"""
+Benchmarks for the PandaAGI MCP client.
+
+Run ``python -m benchmarks`` from the ``mcp-client`` directory to drive every
+FastAPI route against an in-process stand-in MCP server and print throughput
+and latency percentiles as JSON.
+"""
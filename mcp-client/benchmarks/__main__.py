@@ -0,0 +1,103 @@
+"""
+Command-line entry point: ``python -m benchmarks [options]``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+
+import httpx
+
+from benchmarks.loadgen import ROUTES, lifespan, run
+from benchmarks.standin import StandInServer
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the PandaAGI MCP client routes")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="requests per route and concurrency level")
+    parser.add_argument("--routes", default="", help="comma-separated routes to run (default: all)")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="stand-in upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="random extra stand-in latency")
+    parser.add_argument("--tool-output-bytes", type=int, default=2048, help="size of stand-in tool output")
+    parser.add_argument("--resource-bytes", type=int, default=4096, help="size of stand-in resources")
+    parser.add_argument(
+        "--upstream",
+        choices=("standin", "python", "inprocess"),
+        default="standin",
+        help="synthetic stand-in, the Python MCP server over ASGI, or the Python server called in-process",
+    )
+    parser.add_argument("--base-url", help="benchmark a running client instead of an in-process one")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    parser.add_argument("--list", action="store_true", help="list the benchmarked routes and exit")
+    return parser.parse_args(argv)
+
+
+async def main(args: argparse.Namespace) -> dict:
+    """Run the benchmark described by ``args`` and return the report"""
+    levels = [int(level) for level in args.concurrency.split(",") if level]
+    routes = [route.strip() for route in args.routes.split(",") if route.strip()]
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "list")}
+
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=300) as client:
+            results = await run(client, levels, args.requests, routes)
+    else:
+        # Every request comes from one in-process client; measure the routes,
+        # not the per-client rate limit
+        os.environ.setdefault("RATE_LIMIT_RPS", "0")
+        import pandaagi_main
+        from mcp_server import MCPServer
+        from mcp_transport import InProcessTransport, MCPTransport
+
+        observer = pandaagi_main.metrics.observe_upstream
+        if args.upstream == "standin":
+            upstream = StandInServer(
+                latency_ms=args.latency_ms,
+                jitter_ms=args.jitter_ms,
+                tool_output_bytes=args.tool_output_bytes,
+                resource_bytes=args.resource_bytes,
+            )
+        else:
+            # The real tools and documents; latency and size options don't apply
+            upstream = MCPServer()
+        if args.upstream == "inprocess":
+            pandaagi_main.mcp = InProcessTransport(upstream, observer=observer)
+        else:
+            pandaagi_main.mcp = MCPTransport(
+                pandaagi_main.MCP_SERVER_URL,
+                transport=httpx.ASGITransport(app=upstream),
+                observer=observer,
+            )
+        app = pandaagi_main.app
+        async with lifespan(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+                results = await run(client, levels, args.requests, routes, upstream_calls=lambda: upstream.calls)
+
+    return {
+        "config": config,
+        "python": platform.python_version(),
+        "results": results,
+    }
+
+
+def cli(argv=None) -> None:
+    args = parse_args(argv)
+    if args.list:
+        for label, _, _, _ in ROUTES:
+            print(label)
+        return
+
+    output = json.dumps(asyncio.run(main(args)), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    cli()
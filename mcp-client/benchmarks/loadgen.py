@@ -0,0 +1,144 @@
+"""
+Load generator for the PandaAGI FastAPI client.
+
+Drives each route at fixed concurrency levels through an in-process ASGI
+client (or a live base URL) and reports throughput and latency percentiles.
+"""
+
+import asyncio
+import contextlib
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+# (label, method, path, json body) for every API route worth measuring
+ROUTES: List[Tuple[str, str, str, Optional[Dict[str, Any]]]] = [
+    ("GET /server", "GET", "/server", None),
+    ("GET /tools", "GET", "/tools", None),
+    ("GET /resources", "GET", "/resources", None),
+    ("POST /resources/read", "POST", "/resources/read", {"uri": "docs://pandaagi-docs"}),
+    ("POST /tools/call", "POST", "/tools/call", {"name": "create-dashboard", "args": {"data_description": "Sales"}}),
+    ("POST /tools/batch", "POST", "/tools/batch", {"calls": [
+        {"name": "create-dashboard", "args": {"data_description": f"Sales {i}"}} for i in range(10)
+    ]}),
+    ("POST /agent/create", "POST", "/agent/create", {"name": "bench-agent"}),
+    ("POST /agent/task", "POST", "/agent/task", {"task": "Tell me a joke about pandas"}),
+    ("POST /agent/task/stream", "POST", "/agent/task/stream", {"task": "Tell me a joke about pandas"}),
+    ("POST /analysis/report", "POST", "/analysis/report", {"topic": "EV market"}),
+    ("POST /dashboard/create", "POST", "/dashboard/create", {"data_description": "Sales"}),
+    ("POST /webapp/deploy", "POST", "/webapp/deploy", {"app_description": "Portfolio"}),
+    ("GET /health", "GET", "/health", None),
+    # Last, so the queued jobs don't skew upstream counts of other routes
+    ("POST /jobs", "POST", "/jobs", {"name": "create-dashboard", "args": {"data_description": "Sales"}}),
+]
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    """Run an ASGI app's startup and shutdown handlers around a block"""
+    queue: asyncio.Queue = asyncio.Queue()
+    started = asyncio.get_running_loop().create_future()
+    stopped = asyncio.get_running_loop().create_future()
+
+    async def receive():
+        return await queue.get()
+
+    async def send(message):
+        if message["type"].startswith("lifespan.startup") and not started.done():
+            started.set_result(message)
+        elif message["type"].startswith("lifespan.shutdown") and not stopped.done():
+            stopped.set_result(message)
+
+    task = asyncio.ensure_future(app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, receive, send))
+    await queue.put({"type": "lifespan.startup"})
+    await started
+    try:
+        yield
+    finally:
+        await queue.put({"type": "lifespan.shutdown"})
+        await stopped
+        await task
+
+
+async def measure(
+    client: httpx.AsyncClient,
+    method: str,
+    path: str,
+    body: Optional[Dict[str, Any]],
+    concurrency: int,
+    requests: int,
+) -> Dict[str, Any]:
+    """Send ``requests`` calls with ``concurrency`` in flight and summarize latency"""
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                await response.aread()
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+    }
+
+
+async def run(
+    client: httpx.AsyncClient,
+    concurrency_levels: Sequence[int],
+    requests: int,
+    routes: Optional[Sequence[str]] = None,
+    warmup: int = 5,
+    upstream_calls: Optional[Callable[[], int]] = None,
+) -> List[Dict[str, Any]]:
+    """Measure every selected route at every concurrency level
+
+    ``upstream_calls`` returns the stand-in's call counter, so each result can
+    report how many requests actually reached the MCP server.
+    """
+    results = []
+    for label, method, path, body in ROUTES:
+        if routes and label not in routes and path not in routes:
+            continue
+        for _ in range(warmup):
+            await client.request(method, path, json=body)
+        for concurrency in concurrency_levels:
+            before = upstream_calls() if upstream_calls else 0
+            result = await measure(client, method, path, body, concurrency, requests)
+            if upstream_calls:
+                result["upstream_calls"] = upstream_calls() - before
+            results.append({"route": label, **result})
+    return results
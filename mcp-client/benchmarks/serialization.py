@@ -0,0 +1,126 @@
+"""
+Microbenchmark of the response path: ``python -m benchmarks.serialization``.
+
+For each route's payload shape, compares returning a model instance under
+``response_model`` (validated again and encoded by FastAPI) with the fast
+path in ``responses.py``. Each variant is mounted on a bare FastAPI app and
+called directly over ASGI, so the numbers cover routing, validation and
+serialization but no upstream I/O.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import fastapi
+import pydantic
+from fastapi import FastAPI
+
+import pandaagi_main as client
+from benchmarks.standin import RESOURCE_URIS, StandInServer
+from responses import model_response, raw_response
+
+
+def payloads(standin: StandInServer) -> List[Tuple[str, Any, Dict[str, Any]]]:
+    """(route, response model or None for pass-through, upstream result) per route"""
+
+    def result(method: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        return standin.dispatch(method, params or {}, 1)[0]["result"]
+
+    tool = result("mcp/callTool", {"name": "create-dashboard", "args": {"data_description": "Sales"}})
+    resource = result("mcp/readResource", {"uri": RESOURCE_URIS[0]})
+    return [
+        ("GET /server", client.MCPInitResponse, result("mcp/init")),
+        ("GET /tools", client.ToolsListResponse, result("mcp/listTools")),
+        ("GET /resources", client.ResourcesListResponse, result("mcp/listResources")),
+        ("POST /resources/read", client.ResourceResponse, resource),
+        ("POST /tools/call", client.ToolResponse, tool),
+        ("POST /tools/batch", client.BatchToolResponse, {
+            "results": [{"name": "create-dashboard", "content": tool["content"]} for _ in range(10)]
+        }),
+        ("POST /agent/task", None, {"status": "success", "result": tool}),
+    ]
+
+
+def build_app(model: Any, data: Dict[str, Any], fast: bool) -> FastAPI:
+    app = FastAPI()
+    if model is None:
+        # Pass-through routes used to return the raw dict
+        endpoint: Callable = (lambda: raw_response(data)) if fast else (lambda: data)
+        app.add_api_route("/", _async(endpoint))
+    elif fast:
+        app.add_api_route("/", _async(lambda: model_response(model, data)), response_model=model)
+    else:
+        app.add_api_route("/", _async(lambda: model(**data)), response_model=model)
+    return app
+
+
+def _async(fn: Callable) -> Callable:
+    async def endpoint():
+        return fn()
+    return endpoint
+
+
+async def call(app: FastAPI) -> int:
+    """Send one GET / to ``app`` over ASGI and return the body size"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/", "raw_path": b"/", "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    size = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return size
+
+
+async def time_app(app: FastAPI, iterations: int) -> Tuple[float, int]:
+    """Mean microseconds per request, and the response size"""
+    size = await call(app)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await call(app)
+    return (time.perf_counter() - start) / iterations * 1e6, size
+
+
+async def run(iterations: int, tool_output_bytes: int, resource_bytes: int) -> List[Dict[str, Any]]:
+    standin = StandInServer(tool_output_bytes=tool_output_bytes, resource_bytes=resource_bytes)
+    results = []
+    for route, model, data in payloads(standin):
+        before, size = await time_app(build_app(model, data, fast=False), iterations)
+        after, _ = await time_app(build_app(model, data, fast=True), iterations)
+        results.append({
+            "route": route,
+            "bytes": size,
+            "response_model_us": round(before, 2),
+            "fast_path_us": round(after, 2),
+            "speedup": round(before / after, 2) if after else None,
+        })
+    return results
+
+
+def cli(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compare the FastAPI response_model path with the fast path")
+    parser.add_argument("--iterations", type=int, default=2000, help="requests per route and variant")
+    parser.add_argument("--tool-output-bytes", type=int, default=65536, help="size of tool output payloads")
+    parser.add_argument("--resource-bytes", type=int, default=16384, help="size of resource payloads")
+    args = parser.parse_args(argv)
+    results = asyncio.run(run(args.iterations, args.tool_output_bytes, args.resource_bytes))
+    # FastAPI's own response_model path got much faster in later releases
+    versions = {"python": platform.python_version(), "fastapi": fastapi.__version__, "pydantic": pydantic.VERSION}
+    print(json.dumps({"config": vars(args), "versions": versions, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,167 @@
+"""
+In-process stand-in for the PandaAGI MCP server.
+
+Mimics the response shapes of ``netlify/functions/pandaagi-mcp.js`` as a
+plain ASGI app, with configurable upstream latency and payload sizes, so the
+client can be benchmarked without network access or a Netlify dev server.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+from typing import Any, Dict, List, Optional
+
+TOOL_NAMES = [
+    "create-agent",
+    "run-agent-task",
+    "generate-analysis-report",
+    "create-dashboard",
+    "deploy-web-app",
+]
+
+RESOURCE_URIS = [
+    "docs://pandaagi-docs",
+    "docs://pandaagi-quickstart",
+    "docs://agent-best-practices",
+    "docs://pandaagi-examples",
+]
+
+
+def filler(size: int, seed: str) -> str:
+    """Deterministic markdown-ish text of roughly ``size`` bytes"""
+    line = f"- {seed}: PandaAGI agents plan, browse, write files and run code.\n"
+    return (line * (size // len(line) + 1))[:size]
+
+
+class StandInServer:
+    """ASGI app answering MCP JSON-RPC calls like the Netlify function"""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        tool_output_bytes: int = 2048,
+        resource_bytes: int = 4096,
+        stream_chunk_bytes: int = 512,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tool_output_bytes = tool_output_bytes
+        self.resource_bytes = resource_bytes
+        self.stream_chunk_bytes = stream_chunk_bytes
+        self.calls = 0
+        self.resources = {uri: filler(resource_bytes, uri) for uri in RESOURCE_URIS}
+        self.hashes = {
+            uri: hashlib.sha256(text.encode("utf-8")).hexdigest() for uri, text in self.resources.items()
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        await self._delay()
+        request = json.loads(body or b"{}")
+        if isinstance(request, list):
+            self.calls += len(request)
+            responses = [self.dispatch(item.get("method"), item.get("params") or {}, item.get("id")) for item in request]
+            await self._reply(send, 200, [r for r, _ in responses])
+            return
+
+        self.calls += 1
+        params = request.get("params") or {}
+        response, status = self.dispatch(request.get("method"), params, request.get("id"))
+        if params.get("stream") and "result" in response:
+            await self._stream(send, response, request.get("id"))
+        else:
+            await self._reply(send, status, response)
+
+    def dispatch(self, method: Optional[str], params: Dict[str, Any], id: Any):
+        """Return ``(response, status)`` for one JSON-RPC call"""
+        if method == "mcp/init":
+            result = {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {"tools": {}, "resources": {}},
+                "serverInfo": {"name": "pandaagi-mcp-server", "version": "1.0.0", "description": "Stand-in"},
+            }
+        elif method == "mcp/listTools":
+            result = {"tools": [self._tool(name) for name in TOOL_NAMES]}
+        elif method == "mcp/listResources":
+            result = {"resources": [
+                {"name": uri, "uri": uri, "metadata": {"mimeType": "text/markdown", "hash": self.hashes[uri]}}
+                for uri in RESOURCE_URIS
+            ]}
+        elif method == "mcp/readResource":
+            uri = params.get("uri")
+            if uri not in self.resources:
+                return self._error(-32602, "Resource not found", id), 404
+            if params.get("ifNoneMatch") == self.hashes[uri]:
+                result = {"contents": [], "notModified": True, "hash": self.hashes[uri]}
+            else:
+                result = {"contents": [{"uri": uri, "text": self.resources[uri], "hash": self.hashes[uri]}]}
+        elif method == "mcp/callTool":
+            name = params.get("name")
+            if name not in TOOL_NAMES:
+                return self._error(-32602, "Unknown tool", id), 400
+            seed = f"{name} {json.dumps(params.get('args') or {}, sort_keys=True)}"
+            result = {"content": [{"type": "text", "text": filler(self.tool_output_bytes, seed)}]}
+        else:
+            return self._error(-32601, "Method not found", id), 400
+        return {"jsonrpc": "2.0", "result": result, "id": id}, 200
+
+    @staticmethod
+    def _tool(name: str) -> Dict[str, Any]:
+        return {
+            "name": name,
+            "description": f"Stand-in for {name}",
+            "schema": {"type": "object", "properties": {}, "additionalProperties": True},
+        }
+
+    @staticmethod
+    def _error(code: int, message: str, id: Any) -> Dict[str, Any]:
+        return {"jsonrpc": "2.0", "error": {"code": code, "message": message}, "id": id}
+
+    async def _delay(self) -> None:
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+    async def _reply(self, send, status: int, payload: Any) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def _stream(self, send, response: Dict[str, Any], id: Any) -> None:
+        text = response["result"]["content"][0]["text"]
+        chunks: List[str] = [
+            text[i:i + self.stream_chunk_bytes] for i in range(0, len(text), self.stream_chunk_bytes)
+        ]
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/x-ndjson")],
+        })
+        for index, chunk in enumerate(chunks):
+            line = {
+                "jsonrpc": "2.0",
+                "method": "notifications/progress",
+                "params": {
+                    "requestId": id,
+                    "progress": index + 1,
+                    "total": len(chunks),
+                    "content": [{"type": "text", "text": chunk}],
+                },
+            }
+            await send({"type": "http.response.body", "body": (json.dumps(line) + "\n").encode(), "more_body": True})
+        final = {"jsonrpc": "2.0", "result": {"content": [], "streamed": True, "chunks": len(chunks)}, "id": id}
+        await send({"type": "http.response.body", "body": (json.dumps(final) + "\n").encode()})
@@ -0,0 +1,98 @@
+"""
+Microbenchmark of tool-argument validation: ``python -m benchmarks.validation``.
+
+For each tool in the Python MCP server's catalog, times compiling its schema
+and checking a valid and an invalid set of arguments with the compiled
+validator. Those arguments are built from the schema itself. When the
+``jsonschema`` package is installed, the same checks are timed with it for
+comparison. The result is the cost per call that local validation adds to
+``/tools/call``, against the upstream round trip it saves on a bad call.
+"""
+
+import argparse
+import json
+import platform
+import time
+from typing import Any, Callable, Dict, List
+
+from mcp_server import TOOLS
+from tool_schemas import compile_schema
+
+try:
+    import jsonschema
+except ImportError:  # pragma: no cover - optional, for comparison only
+    jsonschema = None
+
+SAMPLES = {"string": "sample", "integer": 1, "number": 1.5, "boolean": True, "null": None}
+
+
+def sample(schema: Dict[str, Any]) -> Any:
+    """A value that satisfies ``schema``: every property set, enums at their first option"""
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: sample(sub) for name, sub in (schema.get("properties") or {}).items()}
+    if kind == "array":
+        return [sample(schema.get("items") or {})] * 3
+    return SAMPLES.get(kind, "sample")
+
+
+def invalid(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Arguments the server would reject: a required field missing, a wrong type and an unknown field"""
+    args = sample(schema)
+    required = schema.get("required") or []
+    if required:
+        del args[required[0]]
+    for name, sub in (schema.get("properties") or {}).items():
+        if name not in required[:1]:
+            args[name] = 42 if sub.get("type") != "integer" else "42"
+            break
+    args["unexpected"] = True
+    return args
+
+
+def per_call_us(fn: Callable[[], Any], iterations: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return round((time.perf_counter() - start) / iterations * 1e6, 3)
+
+
+def run(iterations: int) -> List[Dict[str, Any]]:
+    results = []
+    for tool in TOOLS:
+        schema = tool["schema"]
+        check = compile_schema(schema)
+        good, bad = sample(schema), invalid(schema)
+        errors: List[Dict[str, Any]] = []
+        check(bad, ("args",), errors)
+        result = {
+            "tool": tool["name"],
+            "violations": len(errors),
+            "compile_us": per_call_us(lambda: compile_schema(schema), max(1, iterations // 10)),
+            "valid_us": per_call_us(lambda: check(good, ("args",), []), iterations),
+            "invalid_us": per_call_us(lambda: check(bad, ("args",), []), iterations),
+        }
+        if jsonschema is not None:
+            validator = jsonschema.Draft7Validator(schema)
+            result["jsonschema_valid_us"] = per_call_us(lambda: list(validator.iter_errors(good)), iterations)
+            result["jsonschema_invalid_us"] = per_call_us(lambda: list(validator.iter_errors(bad)), iterations)
+        results.append(result)
+    return results
+
+
+def cli(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Time compiled tool-argument validation per call")
+    parser.add_argument("--iterations", type=int, default=100000, help="checks per tool and variant")
+    args = parser.parse_args(argv)
+    versions = {
+        "python": platform.python_version(),
+        "jsonschema": jsonschema.__version__ if jsonschema is not None else None,
+    }
+    print(json.dumps({"config": vars(args), "versions": versions, "results": run(args.iterations)}, indent=2))
+
+
+if __name__ == "__main__":
+    cli()
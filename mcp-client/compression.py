@@ -0,0 +1,222 @@
+"""
+Negotiated gzip/brotli compression for the FastAPI responses.
+
+The encoding is picked from the client's ``Accept-Encoding``: brotli when the
+``brotli`` package is installed and accepted, else gzip. Bodies below a size
+threshold go out as they are, since compressing them saves less than it
+costs. Responses that carry a version validator, such as the ``ETag`` of a
+resource or the catalog version, are compressed once per request and
+version and served from a bounded cache afterwards. The request part covers
+the query string and body, since two requests to one route can get
+different bodies with the same validator: ``POST /resources/read`` for two
+documents with identical text, for instance.
+
+Streamed bodies (SSE and NDJSON relays, file downloads) and range-capable
+responses are passed through untouched: they must not be buffered, and byte
+ranges refer to the uncompressed file.
+"""
+
+import gzip
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional, gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "text/html",
+    "text/plain",
+    "text/markdown",
+    "text/css",
+    "text/csv",
+)
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Map each listed coding to its quality, e.g. ``{"br": 1.0, "gzip": 0.5}``"""
+    codings: Dict[str, float] = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        codings[coding.strip().lower()] = quality
+    return codings
+
+
+def choose_encoding(header: Optional[str], available: Sequence[str]) -> Optional[str]:
+    """Best coding from ``available`` (in server preference order) the client accepts"""
+    if not header:
+        return None
+    codings = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for coding in available:
+        quality = codings.get(coding, codings.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class ResponseCompressor:
+    """Compression settings, the cache of compressed bodies, and their statistics"""
+
+    def __init__(
+        self,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        cache_bytes: int = 16 * 1024 * 1024,
+        cache_headers: Sequence[str] = ("etag", "x-catalog-version"),
+    ):
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_bytes = cache_bytes
+        self.cache_headers = tuple(name.encode("latin-1") for name in cache_headers)
+        self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+        # (method, path, validator, coding) -> compressed body, least recent first
+        self._cache: "OrderedDict[Tuple[str, str, bytes, str], bytes]" = OrderedDict()
+        self._cached_bytes = 0
+        self.stats = {"compressed": 0, "cache_hits": 0, "too_small": 0, "bytes_in": 0, "bytes_out": 0}
+
+    @classmethod
+    def from_env(cls) -> "ResponseCompressor":
+        return cls(
+            minimum_size=int(os.getenv("COMPRESSION_MIN_BYTES", "1024")),
+            gzip_level=int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),
+            brotli_quality=int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5")),
+            cache_bytes=int(os.getenv("COMPRESSION_CACHE_BYTES", str(16 * 1024 * 1024))),
+        )
+
+    def compress(self, body: bytes, coding: str) -> bytes:
+        if coding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def cached(self, key: Tuple[str, str, bytes, bytes, str], body: bytes) -> bytes:
+        """Compressed ``body`` for ``(method, path, request digest, validator, coding)``, compressing on first use"""
+        compressed = self._cache.get(key)
+        if compressed is not None:
+            self._cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return compressed
+        compressed = self.compress(body, key[-1])
+        if len(compressed) <= self.cache_bytes:
+            self._cache[key] = compressed
+            self._cached_bytes += len(compressed)
+            while self._cached_bytes > self.cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted)
+        return compressed
+
+    def describe(self) -> Dict[str, int]:
+        return {**self.stats, "cache_entries": len(self._cache), "cache_bytes": self._cached_bytes}
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing whole JSON and text bodies the client can decode"""
+
+    def __init__(self, app, compressor: ResponseCompressor):
+        self.app = app
+        self.compressor = compressor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = dict(scope.get("headers") or ())
+        accept = request_headers.get(b"accept-encoding", b"").decode("latin-1")
+        compressor = self.compressor
+        coding = choose_encoding(accept, compressor.encodings)
+        start: Optional[dict] = None
+        passthrough = False
+        # What was asked for, beyond the path: part of the cache key
+        request_digest = hashlib.blake2b(scope.get("query_string", b""), digest_size=16)
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                request_digest.update(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                return
+
+            headers: List[Tuple[bytes, bytes]] = list(start.get("headers", []))
+            names = {name.lower(): value for name, value in headers}
+            content_type = names.get(b"content-type", b"").decode("latin-1").split(";")[0].strip()
+            eligible = (
+                start["status"] == 200
+                and content_type in COMPRESSIBLE_TYPES
+                and b"content-encoding" not in names
+                and b"accept-ranges" not in names
+            )
+            if eligible:
+                headers = [(n, v) for n, v in headers if n.lower() != b"vary"] + [(b"vary", _vary(names))]
+            body = message.get("body", b"") if message["type"] == "http.response.body" else b""
+            if not eligible or coding is None or message["type"] != "http.response.body" or message.get("more_body"):
+                # Not ours to compress, or streamed: send everything as it comes
+                passthrough = True
+                await send({**start, "headers": headers})
+                await send(message)
+                return
+            if len(body) < compressor.minimum_size:
+                compressor.stats["too_small"] += 1
+                await send({**start, "headers": headers})
+                await send(message)
+                return
+
+            validator = next((names[name] for name in compressor.cache_headers if name in names), None)
+            if validator is not None:
+                key = (scope["method"], scope["path"], request_digest.digest(), validator, coding)
+                compressed = compressor.cached(key, body)
+            else:
+                compressed = compressor.compress(body, coding)
+            compressor.stats["compressed"] += 1
+            compressor.stats["bytes_in"] += len(body)
+            compressor.stats["bytes_out"] += len(compressed)
+
+            headers = [
+                (name, _weak(value) if name.lower() == b"etag" else value)
+                for name, value in headers
+                if name.lower() != b"content-length"
+            ]
+            headers += [(b"content-encoding", coding.encode()), (b"content-length", str(len(compressed)).encode())]
+            await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive_wrapper, send_wrapper)
+
+
+def _vary(names: Dict[bytes, bytes]) -> bytes:
+    vary = names.get(b"vary")
+    if not vary:
+        return b"Accept-Encoding"
+    if b"accept-encoding" in vary.lower():
+        return vary
+    return vary + b", Accept-Encoding"
+
+
+def _weak(etag: bytes) -> bytes:
+    # The compressed bytes differ from the identity body, so a strong
+    # validator no longer holds; If-None-Match still matches a weak one
+    return etag if etag.startswith(b"W/") else b"W/" + etag
@@ -0,0 +1,48 @@
+"""
+A dedicated thread for a SQLite connection.
+
+SQLite calls block, on disk I/O and on other processes' write locks, so the
+stores never make them on the event loop. Each store owns one thread and
+sends every call on its connection there. Calls run one at a time in the
+order they were made, so a write handed off without waiting is visible to
+any read made after it.
+"""
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseThread:
+    """Runs the calls on one connection in order, off the event loop"""
+
+    def __init__(self, name: str):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run ``fn(*args)`` on the thread and wait for its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
+
+    def defer(self, fn: Callable[..., Any], *args: Any) -> None:
+        """Queue ``fn(*args)`` on the thread without waiting for it
+
+        For writes whose outcome the caller doesn't need. Later calls still
+        see them, since the thread runs calls in order.
+        """
+        self._executor.submit(fn, *args).add_done_callback(self._check)
+
+    def close(self) -> None:
+        """Finish queued calls and stop the thread"""
+        self._executor.shutdown(wait=True)
+
+    @staticmethod
+    def _check(future: Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning("Deferred database call failed: %s", future.exception())
@@ -0,0 +1,114 @@
+"""
+Background health prober for the upstream MCP server.
+
+Probes run on their own interval in a background task, and health endpoints
+answer from the last recorded result, so load balancer and orchestrator
+probes never wait on, or add traffic to, the MCP server.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class HealthProber:
+    """Periodically runs ``probe`` and remembers its outcome and latency"""
+
+    def __init__(
+        self,
+        probe: Callable[[], Awaitable[Any]],
+        interval: float = 10.0,
+        timeout: float = 5.0,
+        stale_after: Optional[float] = None,
+    ):
+        self.probe = probe
+        self.interval = interval
+        self.timeout = timeout
+        # A result older than this no longer counts, e.g. if the prober stalled
+        self.stale_after = stale_after if stale_after is not None else 3 * interval
+        self.ok = False
+        self.latency: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.last_success: Optional[float] = None
+        self.error: Optional[str] = None
+        self.consecutive_failures = 0
+        self.probes = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, probe: Callable[[], Awaitable[Any]]) -> "HealthProber":
+        interval = float(os.getenv("HEALTH_PROBE_INTERVAL", "10"))
+        stale_after = os.getenv("HEALTH_STALE_AFTER")
+        return cls(
+            probe,
+            interval=interval,
+            timeout=float(os.getenv("HEALTH_PROBE_TIMEOUT", "5")),
+            stale_after=float(stale_after) if stale_after else None,
+        )
+
+    async def start(self) -> None:
+        """Probe in the background; the first probe runs immediately"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def check(self) -> bool:
+        """Run one probe now and record the outcome"""
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.probe(), self.timeout)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self._record(False, start, f"Probe timed out after {self.timeout:.1f}s")
+        except Exception as e:
+            self._record(False, start, str(getattr(e, "detail", e)) or e.__class__.__name__)
+        else:
+            self._record(True, start)
+        return self.ok
+
+    def _record(self, ok: bool, start: float, error: Optional[str] = None) -> None:
+        self.ok = ok
+        self.latency = time.perf_counter() - start
+        self.checked_at = time.time()
+        self.error = error
+        self.probes += 1
+        if ok:
+            self.last_success = self.checked_at
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+    def age(self) -> Optional[float]:
+        """Seconds since the last probe finished"""
+        return time.time() - self.checked_at if self.checked_at is not None else None
+
+    def ready(self) -> bool:
+        """Last probe succeeded and is recent enough to trust"""
+        age = self.age()
+        return self.ok and age is not None and age <= self.stale_after
+
+    def describe(self) -> Dict[str, Any]:
+        age = self.age()
+        return {
+            "ready": self.ready(),
+            "last_probe_ok": self.ok,
+            "latency_ms": round(self.latency * 1000, 3) if self.latency is not None else None,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "last_success": self.last_success,
+            "consecutive_failures": self.consecutive_failures,
+            "error": self.error,
+            "interval": self.interval,
+            "probes": self.probes,
+        }
@@ -0,0 +1,413 @@
+"""
+Asynchronous job queue for long-running tool calls.
+
+Jobs are submitted with a priority, executed by a bounded pool of worker
+tasks and polled or cancelled by id. Job state lives in memory by default or
+in SQLite when a database path is configured, so queued work survives a
+restart. SQLite calls run on the store's own thread, never on the event
+loop.
+
+The store is the queue: workers claim the highest-priority queued job from
+it, and the queue limit counts the jobs waiting in it. With a SQLite store
+shared by several processes, priorities and the limit therefore hold across
+all of them, and a job runs in whichever process has a worker free first.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from db_thread import DatabaseThread
+
+T = TypeVar("T")
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class QueueFullError(Exception):
+    """The job queue has no room for another job"""
+
+
+class Job:
+    """A tool call scheduled on the queue"""
+
+    def __init__(
+        self,
+        name: str,
+        args: Dict[str, Any],
+        priority: int = 0,
+        id: Optional[str] = None,
+        status: str = QUEUED,
+        created_at: Optional[float] = None,
+        started_at: Optional[float] = None,
+        finished_at: Optional[float] = None,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ):
+        self.id = id or uuid.uuid4().hex
+        self.name = name
+        self.args = args
+        self.priority = priority
+        self.status = status
+        self.created_at = created_at or time.time()
+        self.started_at = started_at
+        self.finished_at = finished_at
+        self.result = result
+        self.error = error
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {
+            "id": self.id,
+            "name": self.name,
+            "args": self.args,
+            "priority": self.priority,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+class MemoryJobStore:
+    """Keeps jobs in memory, dropping the oldest finished jobs past ``retention``"""
+
+    # Only this process adds jobs
+    shared = False
+
+    def __init__(self, retention: int = 1000):
+        self.retention = retention
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        # (-priority, seq, id) of queued jobs; cancelled ones are skipped when popped
+        self._heap: List[Tuple[int, int, str]] = []
+        self._seq = itertools.count()
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Call one of the store's methods; memory operations don't block, so inline"""
+        return fn(*args)
+
+    def close(self) -> None:
+        pass
+
+    def add(self, job: Job, max_queued: int) -> bool:
+        """Save a new queued job unless ``max_queued`` jobs are already waiting"""
+        if self.count(QUEUED) >= max_queued:
+            return False
+        self.save(job)
+        heapq.heappush(self._heap, (-job.priority, next(self._seq), job.id))
+        return True
+
+    def save(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        finished = [j.id for j in self._jobs.values() if j.status in FINISHED_STATES]
+        for job_id in finished[: max(0, len(finished) - self.retention)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def claim_next(self) -> Optional[Job]:
+        """Mark the highest-priority queued job as running and return it"""
+        while self._heap:
+            _, _, job_id = heapq.heappop(self._heap)
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == QUEUED:
+                job.status = RUNNING
+                job.started_at = time.time()
+                self.save(job)
+                return job
+        return None
+
+    def count(self, status: str) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == status)
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> List[Job]:
+        jobs = [job for job in reversed(self._jobs.values()) if status is None or job.status == status]
+        return jobs[:limit]
+
+
+class SQLiteJobStore:
+    """Persists jobs to a SQLite database, which several processes may share"""
+
+    # Other processes may add jobs, so idle workers look for them now and then
+    shared = True
+
+    def __init__(self, path: str, retention: int = 1000):
+        self.retention = retention
+        self._thread = DatabaseThread("job-store")
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        # Readers in other worker processes don't block on a writer
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                args TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                result TEXT,
+                error TEXT
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, created_at)")
+        self._db.commit()
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Call one of the store's methods on its database thread and wait for it"""
+        return await self._thread.run(fn, *args)
+
+    def close(self) -> None:
+        self._thread.close()
+        self._db.close()
+
+    def add(self, job: Job, max_queued: int) -> bool:
+        """Save a new queued job unless ``max_queued`` jobs are already waiting"""
+        # One statement, so processes sharing the file can't overfill the queue together
+        cursor = self._db.execute(
+            "INSERT INTO jobs SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ? "
+            "WHERE (SELECT COUNT(*) FROM jobs WHERE status = ?) < ?",
+            (*self._to_row(job), QUEUED, max_queued),
+        )
+        self._db.commit()
+        return cursor.rowcount == 1
+
+    def save(self, job: Job) -> None:
+        self._db.execute("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", self._to_row(job))
+        if job.status in FINISHED_STATES:
+            self._db.execute(
+                """
+                DELETE FROM jobs WHERE id IN (
+                    SELECT id FROM jobs WHERE status IN (?, ?, ?)
+                    ORDER BY finished_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (*FINISHED_STATES, self.retention),
+            )
+        self._db.commit()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._from_row(row) if row else None
+
+    def claim_next(self) -> Optional[Job]:
+        """Mark the highest-priority queued job as running and return it"""
+        # The claim is one write, so two processes never get the same job
+        row = self._db.execute(
+            """
+            UPDATE jobs SET status = ?, started_at = ? WHERE id = (
+                SELECT id FROM jobs WHERE status = ? ORDER BY priority DESC, created_at LIMIT 1
+            ) AND status = ?
+            RETURNING *
+            """,
+            (RUNNING, time.time(), QUEUED, QUEUED),
+        ).fetchone()
+        self._db.commit()
+        return self._from_row(row) if row else None
+
+    def count(self, status: str) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> List[Job]:
+        if status is None:
+            rows = self._db.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,))
+        else:
+            rows = self._db.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+            )
+        return [self._from_row(row) for row in rows.fetchall()]
+
+    @staticmethod
+    def _to_row(job: Job) -> tuple:
+        return (
+            job.id, job.name, json.dumps(job.args), job.priority, job.status,
+            job.created_at, job.started_at, job.finished_at,
+            json.dumps(job.result) if job.result is not None else None, job.error,
+        )
+
+    @staticmethod
+    def _from_row(row: tuple) -> Job:
+        id, name, args, priority, status, created_at, started_at, finished_at, result, error = row
+        return Job(
+            name, json.loads(args), priority, id=id, status=status, created_at=created_at,
+            started_at=started_at, finished_at=finished_at,
+            result=json.loads(result) if result else None, error=error,
+        )
+
+
+class JobQueue:
+    """Priority queue of jobs drained by a fixed number of workers"""
+
+    def __init__(
+        self,
+        runner: Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        store=None,
+        workers: int = 4,
+        max_queued: int = 1000,
+        on_finish: Optional[Callable[[Job], None]] = None,
+        poll_interval: float = 1.0,
+    ):
+        self.runner = runner
+        self.store = store or MemoryJobStore()
+        self.workers = workers
+        self.max_queued = max_queued
+        # Called with every job that reaches a final state
+        self.on_finish = on_finish
+        # How often idle workers look for jobs added by other processes
+        self.poll_interval = poll_interval
+        # Jobs waiting in the store, as of the last submit or claim
+        self.queued = 0
+        # One permit per job submitted here, so an idle worker wakes for it
+        self._ready: Optional[asyncio.Semaphore] = None
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+
+    async def start(self, recover: bool = True) -> None:
+        """Start the workers, failing jobs a previous process left running
+
+        Queued jobs in the store are picked up whatever ``recover`` says;
+        each one runs in whichever process claims it first. Pass
+        ``recover=False`` when other processes share the store and
+        ``recover()`` was already called once for all of them. Recovery
+        happens before the server takes requests, so it uses the store
+        directly.
+        """
+        self._ready = asyncio.Semaphore(0)
+        if recover:
+            self.recover()
+        self._workers = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+    def recover(self) -> int:
+        """Fail jobs left running by a process that is gone; returns how many"""
+        interrupted = self.store.list(status=RUNNING, limit=self.max_queued)
+        for job in interrupted:
+            self.store.save(self._settle(job, FAILED, error="Interrupted by restart"))
+            if self.on_finish is not None:
+                self.on_finish(job)
+        return len(interrupted)
+
+    async def stop(self) -> None:
+        for task in self._workers + list(self._running.values()):
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self.store.close()
+
+    async def submit(self, name: str, args: Dict[str, Any], priority: int = 0, id: Optional[str] = None) -> Job:
+        """Queue a tool call; higher priorities run first"""
+        if self._ready is None:
+            raise RuntimeError("Job queue is not started")
+        job = Job(name, args, priority, id=id)
+        if not await self.store.run(self.store.add, job, self.max_queued):
+            raise QueueFullError(f"Job queue is full ({self.max_queued} jobs waiting)")
+        self.queued += 1
+        self._ready.release()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await self.store.run(self.store.get, job_id)
+
+    async def list(self, status: Optional[str] = None, limit: int = 100) -> List[Job]:
+        return await self.store.run(self.store.list, status, limit)
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job; finished jobs are returned unchanged"""
+        job = await self.store.run(self.store.get, job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return job
+        if job.status == QUEUED:
+            self.queued = max(0, self.queued - 1)
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        await self._finish(job, CANCELLED)
+        return job
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": len(self._running),
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+        }
+
+    @staticmethod
+    def _settle(job: Job, status: str, result: Any = None, error: Optional[str] = None) -> Job:
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        return job
+
+    async def _finish(self, job: Job, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        await self.store.run(self.store.save, self._settle(job, status, result, error))
+        if self.on_finish is not None:
+            self.on_finish(job)
+
+    def _claim_next(self) -> Optional[Job]:
+        job = self.store.claim_next()
+        self.queued = self.store.count(QUEUED)
+        return job
+
+    async def _next_job(self) -> Job:
+        """Claim the next job, waiting until there is one"""
+        while True:
+            job = await self.store.run(self._claim_next)
+            if job is not None:
+                return job
+            # A shared store may get jobs from other processes without a
+            # wakeup here, so idle workers also look on a timer
+            timeout = self.poll_interval if self.store.shared else None
+            try:
+                await asyncio.wait_for(self._ready.acquire(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._next_job()
+
+            task = asyncio.ensure_future(self.runner(job.name, job.args))
+            self._running[job.id] = task
+            try:
+                # wait() rather than await, so cancelling the job doesn't
+                # look like the worker itself being cancelled
+                await asyncio.wait({task})
+            except asyncio.CancelledError:
+                task.cancel()
+                raise
+            finally:
+                self._running.pop(job.id, None)
+
+            if task.cancelled():
+                # cancel() already recorded the job as cancelled
+                continue
+            current = await self.store.run(self.store.get, job.id)
+            if current is not None and current.status == CANCELLED:
+                # Cancelled through another process sharing the store
+                continue
+            error = task.exception()
+            if error is not None:
+                await self._finish(job, FAILED, error=str(getattr(error, "detail", error)))
+            else:
+                await self._finish(job, SUCCEEDED, result=task.result())
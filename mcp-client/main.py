@@ -1,17 +1,37 @@
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
-import requests
+import math
 import os
 from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 
+from mcp_transport import CircuitOpenError, MCPConnectionError, MCPError, MCPTimeoutError, MCPTransport, method_key
+from metrics import ClientMetrics, MetricsMiddleware
+from shared_state import SharedMetrics, SharedState
+
 # Load environment variables
 load_dotenv()
 
 # Get MCP server URL from environment variables
 MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://localhost:8888/mcp")
 
+# Route and upstream latency metrics, served on /metrics
+metrics = ClientMetrics()
+
+# Under serve.py with several workers, /metrics answers for all of them
+shared_state = SharedState.from_env()
+shared_metrics = SharedMetrics.from_env(shared_state, metrics.registry) if shared_state else None
+
+# Shared transport used by every route: pooled HTTP, or MCP_TRANSPORT=websocket
+# to multiplex every call over one persistent connection
+if os.getenv("MCP_TRANSPORT", "http") == "websocket":
+    from mcp_multiplex import MultiplexedTransport
+    mcp = MultiplexedTransport.websocket(os.getenv("MCP_WS_URL", MCP_SERVER_URL), observer=metrics.observe_upstream)
+else:
+    mcp = MCPTransport.from_env(MCP_SERVER_URL, observer=metrics.observe_upstream)
+
 app = FastAPI(
     title="MCP Client API",
     description="A FastAPI client for interacting with Model Context Protocol (MCP) servers",
@@ -27,6 +47,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
 # Define models for request and response
 class MCPServerInfo(BaseModel):
     name: str
@@ -77,29 +99,42 @@ class ResourceInfo(BaseModel):
 class ResourcesResponse(BaseModel):
     resources: List[ResourceInfo]
 
+def upstream_error(e: Exception) -> HTTPException:
+    """Map an MCP failure to the HTTP error returned to the caller"""
+    if isinstance(e, MCPError):
+        return HTTPException(status_code=400, detail=e.message)
+    if isinstance(e, CircuitOpenError):
+        return HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+        )
+    if isinstance(e, MCPTimeoutError):
+        return HTTPException(status_code=504, detail=str(e))
+    return HTTPException(status_code=502, detail=f"Failed to communicate with MCP server: {str(e)}")
+
 # Helper function to make MCP requests
 async def call_mcp_server(method: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
-    if params is None:
-        params = {}
-    
-    payload = {
-        "jsonrpc": "2.0",
-        "method": method,
-        "params": params,
-        "id": "1"
-    }
-    
     try:
-        response = requests.post(MCP_SERVER_URL, json=payload)
-        response.raise_for_status()
-        result = response.json()
-        
-        if "error" in result:
-            raise HTTPException(status_code=400, detail=result["error"]["message"])
-        
-        return result.get("result", {})
-    except requests.RequestException as e:
-        raise HTTPException(status_code=500, detail=f"Failed to communicate with MCP server: {str(e)}")
+        with metrics.observe_call(method_key(method, params)):
+            result = await mcp.request(method, params)
+    except (MCPError, MCPConnectionError) as e:
+        raise upstream_error(e)
+    if method == "mcp/listTools":
+        metrics.load_tools(result)
+    return result
+
+@app.on_event("startup")
+async def start_metrics_publishing():
+    if shared_metrics is not None:
+        await shared_metrics.start()
+
+@app.on_event("shutdown")
+async def close_mcp_transport():
+    await mcp.aclose()
+    if shared_metrics is not None:
+        await shared_metrics.stop()
+        shared_state.close()
 
 # Define routes
 @app.get("/", tags=["Info"])
@@ -110,6 +145,14 @@ async def root():
         "mcp_server": MCP_SERVER_URL,
     }
 
+@app.get("/metrics", tags=["Info"], response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Prometheus metrics for routes and upstream MCP calls
+    """
+    text = shared_metrics.render() if shared_metrics is not None else metrics.registry.render()
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
 @app.get("/server", tags=["Info"], response_model=MCPInitResponse)
 async def get_server_info():
     """
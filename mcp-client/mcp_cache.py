@@ -0,0 +1,120 @@
+"""
+In-process cache for the static MCP catalogs (init, tools and resources).
+
+Entries are versioned by a fingerprint of their payload, expire after a TTL
+and are served stale for a grace period while a background refresh runs.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Methods whose results only change on deploy
+CATALOG_METHODS = ("mcp/init", "mcp/listTools", "mcp/listResources")
+
+
+def canonical_json(payload: Any) -> str:
+    """Key-sorted, whitespace-free JSON so equal payloads serialize identically"""
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def fingerprint(payload: Any) -> str:
+    """Stable short hash of a JSON-serializable payload"""
+    return hashlib.sha256(canonical_json(payload).encode("utf-8")).hexdigest()[:16]
+
+
+class CatalogEntry:
+    """A cached catalog payload and its version"""
+
+    __slots__ = ("value", "version", "fetched_at")
+
+    def __init__(self, value: Dict[str, Any]):
+        self.value = value
+        self.version = fingerprint(value)
+        self.fetched_at = time.monotonic()
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class CatalogCache:
+    """TTL cache with stale-while-revalidate for catalog methods"""
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Awaitable[Dict[str, Any]]],
+        ttl: float = 60.0,
+        stale_ttl: float = 300.0,
+    ):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+
+    async def get(self, method: str) -> Tuple[Dict[str, Any], str]:
+        """Return ``(result, version)`` for a catalog method"""
+        entry = self._entries.get(method)
+        if entry is not None:
+            age = entry.age
+            if age < self.ttl:
+                self.stats["hits"] += 1
+                return entry.value, entry.version
+            if age < self.ttl + self.stale_ttl:
+                self.stats["stale_hits"] += 1
+                self._schedule_refresh(method)
+                return entry.value, entry.version
+
+        self.stats["misses"] += 1
+        entry = await self._load(method)
+        return entry.value, entry.version
+
+    def version(self, method: str) -> Optional[str]:
+        """Version of the cached entry, if any"""
+        entry = self._entries.get(method)
+        return entry.version if entry else None
+
+    def invalidate(self, method: Optional[str] = None) -> None:
+        """Drop one cached method, or all of them"""
+        if method is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(method, None)
+
+    def describe(self) -> Dict[str, Any]:
+        """Stats plus the version and age of each cached method"""
+        return {
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "stats": dict(self.stats),
+            "entries": {
+                method: {"version": entry.version, "age": round(entry.age, 3)}
+                for method, entry in self._entries.items()
+            },
+        }
+
+    async def _load(self, method: str) -> CatalogEntry:
+        entry = CatalogEntry(await self.fetch(method))
+        self._entries[method] = entry
+        return entry
+
+    def _schedule_refresh(self, method: str) -> None:
+        task = self._refreshing.get(method)
+        if task is None or task.done():
+            self._refreshing[method] = asyncio.ensure_future(self._refresh(method))
+
+    async def _refresh(self, method: str) -> None:
+        try:
+            await self._load(method)
+            self.stats["refreshes"] += 1
+        except Exception as e:
+            # Keep serving the stale entry until the next attempt
+            self.stats["refresh_errors"] += 1
+            logger.warning("Catalog refresh for %s failed: %s", method, e)
@@ -0,0 +1,442 @@
+"""
+JSON-RPC to an MCP server over one long-lived connection.
+
+``MCPTransport`` sends every call as its own HTTP request. Here a single
+WebSocket, or the stdin/stdout of an MCP server subprocess, carries every
+call instead. Each call gets a unique id and many are in flight at once; a
+reader task routes each response, in whatever order it arrives, back to the
+coroutine waiting on that id. When the connection drops, its pending calls
+fail with ``MCPConnectionError`` (idempotent ones are retried as usual) and
+a background task reconnects with exponential backoff.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import shlex
+import sys
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Callable, ContextManager, Dict, Optional, Sequence, Union
+
+from mcp_transport import (
+    BaseTransport, MCPConnectionError, MCPTimeoutError, _error_from, method_key, parse_timeouts,
+)
+from resilience import CircuitBreaker, RetryPolicy
+
+try:
+    import websockets
+except ImportError:  # pragma: no cover - only needed for MCP_TRANSPORT=websocket
+    websockets = None
+
+logger = logging.getLogger(__name__)
+
+# Largest single message either side accepts; resource documents travel whole
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+class ConnectionLostError(MCPConnectionError):
+    """The connection dropped while the call was waiting for its answer"""
+
+
+class Connection(ABC):
+    """One open connection and the calls waiting for an answer on it"""
+
+    def __init__(self):
+        # id -> Future for a call, or Queue for a streamed call
+        self.pending: Dict[Any, Union[asyncio.Future, asyncio.Queue]] = {}
+
+    @abstractmethod
+    async def send(self, text: str) -> None:
+        """Send one message"""
+
+    @abstractmethod
+    async def recv(self) -> str:
+        """Next message; raises ``MCPConnectionError`` once the connection is gone"""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Close the connection"""
+
+
+class WebSocketConnection(Connection):
+    def __init__(self, socket):
+        super().__init__()
+        self.socket = socket
+
+    async def send(self, text: str) -> None:
+        try:
+            await self.socket.send(text)
+        except websockets.exceptions.WebSocketException as e:
+            raise MCPConnectionError(f"WebSocket send failed: {e}") from e
+
+    async def recv(self) -> str:
+        try:
+            message = await self.socket.recv()
+        except websockets.exceptions.WebSocketException as e:
+            raise MCPConnectionError(f"WebSocket closed: {e}") from e
+        return message if isinstance(message, str) else message.decode("utf-8")
+
+    async def close(self) -> None:
+        await self.socket.close()
+
+
+class WebSocketConnector:
+    """Opens WebSocket connections to ``url`` (``ws://`` or ``wss://``)"""
+
+    name = "websocket"
+
+    def __init__(self, url: str, ping_interval: Optional[float] = 20.0):
+        if websockets is None:
+            raise RuntimeError("MCP over WebSocket needs the 'websockets' package")
+        self.url = url
+        self.ping_interval = ping_interval
+
+    async def __call__(self) -> Connection:
+        try:
+            socket = await websockets.connect(self.url, max_size=MAX_MESSAGE_BYTES, ping_interval=self.ping_interval)
+        except (OSError, websockets.exceptions.WebSocketException) as e:
+            raise MCPConnectionError(f"Could not connect to {self.url}: {e}") from e
+        return WebSocketConnection(socket)
+
+    def __str__(self) -> str:
+        return self.url
+
+
+class StdioConnection(Connection):
+    def __init__(self, process: asyncio.subprocess.Process):
+        super().__init__()
+        self.process = process
+
+    async def send(self, text: str) -> None:
+        try:
+            self.process.stdin.write(text.encode("utf-8") + b"\n")
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            raise MCPConnectionError("MCP server process is not accepting input") from e
+
+    async def recv(self) -> str:
+        while True:
+            try:
+                line = await self.process.stdout.readline()
+            except ValueError as e:
+                raise MCPConnectionError(f"Oversized message from MCP server process: {e}") from e
+            if not line:
+                raise MCPConnectionError(f"MCP server process exited with {await self.process.wait()}")
+            if line.strip():
+                return line.decode("utf-8")
+
+    async def close(self) -> None:
+        if self.process.returncode is None:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), 5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+
+
+class StdioConnector:
+    """Starts ``command`` and speaks newline-delimited JSON-RPC on its stdin and stdout"""
+
+    name = "stdio"
+
+    def __init__(self, command: Sequence[str], cwd: Optional[str] = None):
+        self.command = list(command)
+        self.cwd = cwd
+
+    async def __call__(self) -> Connection:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                cwd=self.cwd,
+                limit=MAX_MESSAGE_BYTES,
+            )
+        except OSError as e:
+            raise MCPConnectionError(f"Could not start {self.command[0]}: {e}") from e
+        return StdioConnection(process)
+
+    def __str__(self) -> str:
+        return shlex.join(self.command)
+
+
+def websocket_url(url: str) -> str:
+    """``ws://`` form of an ``http://`` MCP server URL"""
+    if url.startswith("http://") or url.startswith("https://"):
+        return "ws" + url[4:]
+    return url
+
+
+class MultiplexedTransport(BaseTransport):
+    """Drop-in ``MCPTransport`` that pipelines every call over one persistent connection
+
+    Ids, timeouts, retries of idempotent calls and the circuit breaker work
+    as in ``MCPTransport``; only the wire differs. There is one connection,
+    so there is no upstream pool and no hedging.
+    """
+
+    def __init__(
+        self,
+        connector: Callable[[], Any],
+        connect_timeout: float = 5.0,
+        timeouts: Optional[Dict[str, float]] = None,
+        observer: Optional[Callable[[str], ContextManager]] = None,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        reconnect_delay: float = 0.1,
+        max_reconnect_delay: float = 5.0,
+    ):
+        super().__init__(str(connector), connect_timeout, timeouts, observer, retry, breaker)
+        self.connector = connector
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._conn: Optional[Connection] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._reconnecting: Optional[asyncio.Task] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._send_lock: Optional[asyncio.Lock] = None
+        self._closed = False
+        self.stats.update(connects=0, disconnects=0, orphaned=0)
+
+    @classmethod
+    def from_env(cls, connector: Callable[[], Any], **kwargs) -> "MultiplexedTransport":
+        breaker_enabled = os.getenv("MCP_BREAKER_ENABLED", "true").lower() in ("1", "true", "yes")
+        return cls(
+            connector,
+            connect_timeout=float(os.getenv("MCP_CONNECT_TIMEOUT", "5")),
+            timeouts=parse_timeouts(os.getenv("MCP_TIMEOUTS")),
+            retry=RetryPolicy.from_env(),
+            breaker=CircuitBreaker.from_env() if breaker_enabled else None,
+            reconnect_delay=float(os.getenv("MCP_RECONNECT_DELAY", "0.1")),
+            max_reconnect_delay=float(os.getenv("MCP_RECONNECT_MAX_DELAY", "5")),
+            **kwargs,
+        )
+
+    @classmethod
+    def websocket(cls, url: str, **kwargs) -> "MultiplexedTransport":
+        return cls.from_env(WebSocketConnector(websocket_url(url)), **kwargs)
+
+    @classmethod
+    def stdio(cls, command: Optional[str] = None, **kwargs) -> "MultiplexedTransport":
+        """Run ``command`` (default: this directory's ``mcp_server.py --stdio``) as the server"""
+        if command is None:
+            here = os.path.dirname(os.path.abspath(__file__))
+            args = [sys.executable, os.path.join(here, "mcp_server.py"), "--stdio"]
+        else:
+            args = shlex.split(command)
+        return cls.from_env(StdioConnector(args), **kwargs)
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None
+
+    async def _connect(self) -> Connection:
+        """The open connection, opening one if there is none"""
+        if self._conn is not None:
+            return self._conn
+        # Like MCPTransport's client, a closed transport reopens on next use
+        self._closed = False
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+            self._send_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._conn is None:
+                try:
+                    conn = await asyncio.wait_for(self.connector(), self.connect_timeout)
+                except asyncio.TimeoutError as e:
+                    raise MCPTimeoutError(f"No connection to {self.url} within {self.connect_timeout:.1f}s") from e
+                self._conn = conn
+                self._reader = asyncio.ensure_future(self._read(conn))
+                self.stats["connects"] += 1
+            return self._conn
+
+    async def _read(self, conn: Connection) -> None:
+        """Route every incoming message to the call waiting on its id"""
+        try:
+            while True:
+                text = await conn.recv()
+                try:
+                    message = json.loads(text)
+                except ValueError:
+                    logger.warning("Discarding malformed message from %s", self.url)
+                    continue
+                self._dispatch(conn, message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._lost(conn, e)
+
+    def _dispatch(self, conn: Connection, message: Any) -> None:
+        if isinstance(message, list):
+            for item in message:
+                self._dispatch(conn, item)
+            return
+        if not isinstance(message, dict):
+            return
+        id = message.get("id")
+        if id is None and message.get("method") == "notifications/progress":
+            id = (message.get("params") or {}).get("requestId")
+        waiter = conn.pending.get(id)
+        if waiter is None:
+            # The call already timed out or was cancelled
+            self.stats["orphaned"] += 1
+        elif isinstance(waiter, asyncio.Queue):
+            waiter.put_nowait(message)
+        elif not waiter.done():
+            waiter.set_result(message)
+
+    def _lost(self, conn: Connection, error: BaseException) -> None:
+        """Fail the calls pending on a dead connection and start reconnecting"""
+        if self._conn is conn:
+            self._conn = None
+            self.stats["disconnects"] += 1
+            logger.warning("Lost connection to %s: %s", self.url, error)
+            # Counted once here rather than once per call it takes down
+            if self.breaker is not None:
+                self.breaker.record_failure()
+        failure = ConnectionLostError(f"Connection to MCP server lost: {error}")
+        for waiter in conn.pending.values():
+            if isinstance(waiter, asyncio.Queue):
+                waiter.put_nowait(failure)
+            elif not waiter.done():
+                waiter.set_exception(failure)
+        conn.pending.clear()
+        asyncio.ensure_future(conn.close())
+        if not self._closed and (self._reconnecting is None or self._reconnecting.done()):
+            self._reconnecting = asyncio.ensure_future(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        delay = self.reconnect_delay
+        while not self._closed and self._conn is None:
+            await asyncio.sleep(delay)
+            try:
+                await self._connect()
+            except MCPConnectionError as e:
+                logger.info("Reconnecting to %s failed: %s", self.url, e)
+                delay = min(self.max_reconnect_delay, delay * 2)
+
+    async def _send(self, conn: Connection, payload: Any) -> None:
+        try:
+            async with self._send_lock:
+                await conn.send(json.dumps(payload, ensure_ascii=False))
+        except MCPConnectionError as e:
+            self._lost(conn, e)
+            raise ConnectionLostError(str(e)) from e
+
+    def _record(self, error: Optional[BaseException]) -> None:
+        if not isinstance(error, ConnectionLostError):
+            super()._record(error)
+
+    async def _post(self, payload: Any, timeout: float, key: str, hedge: bool = False) -> Any:
+        """Send a call or batch and wait for its answers on the shared connection"""
+        self._check_breaker()
+        try:
+            with self._observe(key):
+                body = await self._roundtrip(payload, timeout)
+        except Exception as e:
+            self._record(e)
+            raise
+        self._record(None)
+        return body
+
+    async def _roundtrip(self, payload: Any, timeout: float) -> Any:
+        deadline = time.monotonic() + timeout
+        calls = payload if isinstance(payload, list) else [payload]
+        try:
+            conn = await asyncio.wait_for(self._connect(), timeout)
+        except asyncio.TimeoutError as e:
+            raise MCPTimeoutError(f"No connection to {self.url} within {timeout:.1f}s") from e
+        loop = asyncio.get_running_loop()
+        waiters = {call["id"]: loop.create_future() for call in calls}
+        conn.pending.update(waiters)
+        try:
+            await self._send(conn, payload)
+            answers = await asyncio.wait_for(asyncio.gather(*waiters.values()), deadline - time.monotonic())
+        except asyncio.TimeoutError as e:
+            raise MCPTimeoutError(f"MCP server did not respond within {timeout:.1f}s") from e
+        finally:
+            for id, waiter in waiters.items():
+                conn.pending.pop(id, None)
+                # Failed together with the connection, but nobody is left to
+                # look at it
+                if waiter.done() and not waiter.cancelled():
+                    waiter.exception()
+                else:
+                    waiter.cancel()
+
+        if isinstance(payload, list):
+            return answers
+        if "error" in answers[0]:
+            raise _error_from(answers[0]["error"])
+        return answers[0]
+
+    async def stream(self, method: str, params: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Send a call and yield its progress notifications, then the final response
+
+        Each message must arrive within the call's timeout of the previous
+        one, as with an HTTP read timeout.
+        """
+        payload = self._payload(method, params)
+        timeout = self.timeout_for(method, params)
+        self._check_breaker()
+        queue: asyncio.Queue = asyncio.Queue()
+        conn: Optional[Connection] = None
+        try:
+            with self._observe(method_key(method, params)):
+                conn = await asyncio.wait_for(self._connect(), timeout)
+                conn.pending[payload["id"]] = queue
+                await self._send(conn, payload)
+                while True:
+                    message = await asyncio.wait_for(queue.get(), timeout)
+                    if isinstance(message, Exception):
+                        raise message
+                    if "error" in message:
+                        raise _error_from(message["error"])
+                    yield message
+                    if "result" in message:
+                        break
+        except asyncio.TimeoutError as e:
+            error = MCPTimeoutError("MCP server stopped responding mid-stream")
+            self._record(error)
+            raise error from e
+        except Exception as e:
+            self._record(e)
+            raise
+        finally:
+            if conn is not None:
+                conn.pending.pop(payload["id"], None)
+        self._record(None)
+
+    def describe(self) -> Dict[str, Any]:
+        conn = self._conn
+        return {
+            "transport": getattr(self.connector, "name", "multiplexed"),
+            "endpoint": self.url,
+            "connected": conn is not None,
+            "in_flight": len(conn.pending) if conn is not None else 0,
+            "connection": dict(self.stats),
+            "retry": {"attempts": self.retry.attempts, "retries": self.stats["retries"]},
+            "breaker": self.breaker.describe() if self.breaker else None,
+            "upstreams": None,
+        }
+
+    async def aclose(self) -> None:
+        """Close the connection and stop reconnecting"""
+        self._closed = True
+        for task in (self._reconnecting, self._reader):
+            if task is not None:
+                task.cancel()
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            closed = MCPConnectionError("Transport closed")
+            for waiter in conn.pending.values():
+                if isinstance(waiter, asyncio.Queue):
+                    waiter.put_nowait(closed)
+                elif not waiter.done():
+                    waiter.set_exception(closed)
+            with contextlib.suppress(Exception):
+                await conn.close()
@@ -0,0 +1,833 @@
+"""
+Python implementation of the PandaAGI MCP server.
+
+Answers the same ``mcp/*`` methods and tools as
+``netlify/functions/pandaagi-mcp.js`` and serves the same markdown documents
+from ``netlify/resources``. ``MCPServer`` is a plain ASGI app speaking
+JSON-RPC over HTTP, including batches and NDJSON streaming, and can also be
+called directly through ``InProcessTransport`` in ``mcp_transport.py`` when
+the client and server share a process. Long-lived connections, a WebSocket
+on the same port or stdin/stdout with ``--stdio``, carry many calls at once
+for ``mcp_multiplex.MultiplexedTransport``.
+"""
+
+import asyncio
+import datetime
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from mcp_transport import MCPError
+
+MAX_BATCH_SIZE = 100
+
+# Maximum characters of tool output per streamed progress message
+STREAM_CHUNK_SIZE = 512
+
+SERVER_INFO = {
+    "protocolVersion": "2024-11-05",
+    "capabilities": {
+        "tools": {},
+        "resources": {},
+    },
+    "serverInfo": {
+        "name": "pandaagi-mcp-server",
+        "version": "1.0.0",
+        "description": "MCP server for PandaAGI - Agentic General Intelligence",
+    },
+}
+
+TOOLS = [
+    {
+        "name": "create-agent",
+        "description": "Create a new PandaAGI agent with specified configuration",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string", "description": "Name for the agent"},
+                "environment": {
+                    "type": "string",
+                    "enum": ["local", "docker"],
+                    "description": "Execution environment for the agent",
+                    "default": "local",
+                },
+                "workspace_path": {
+                    "type": "string",
+                    "description": "Path to the agent's workspace directory",
+                    "default": "./agent_workspace",
+                },
+            },
+            "required": ["name"],
+            "additionalProperties": False,
+        },
+    },
+    {
+        "name": "run-agent-task",
+        "description": "Execute a task using a PandaAGI agent",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "task": {"type": "string", "description": "The task or instruction for the agent to execute"},
+                "agent_name": {
+                    "type": "string",
+                    "description": "Name of the agent to use (optional, will create default if not specified)",
+                },
+                "environment": {
+                    "type": "string",
+                    "enum": ["local", "docker"],
+                    "description": "Execution environment",
+                    "default": "local",
+                },
+                "workspace_path": {
+                    "type": "string",
+                    "description": "Workspace directory path",
+                    "default": "./agent_workspace",
+                },
+            },
+            "required": ["task"],
+            "additionalProperties": False,
+        },
+    },
+    {
+        "name": "generate-analysis-report",
+        "description": "Generate an analysis report using PandaAGI's data analysis capabilities",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "topic": {"type": "string", "description": "Topic or subject for the analysis report"},
+                "data_sources": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "List of data sources or keywords for research",
+                },
+                "report_type": {
+                    "type": "string",
+                    "enum": ["market_analysis", "competitive_analysis", "trend_analysis", "general"],
+                    "description": "Type of analysis report to generate",
+                    "default": "general",
+                },
+            },
+            "required": ["topic"],
+            "additionalProperties": False,
+        },
+    },
+    {
+        "name": "create-dashboard",
+        "description": "Create a data visualization dashboard using PandaAGI",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "data_description": {"type": "string", "description": "Description of the data to visualize"},
+                "dashboard_type": {
+                    "type": "string",
+                    "enum": ["sales", "analytics", "performance", "custom"],
+                    "description": "Type of dashboard to create",
+                    "default": "custom",
+                },
+                "chart_types": {
+                    "type": "array",
+                    "items": {"type": "string", "enum": ["line", "bar", "pie", "scatter", "heatmap", "table"]},
+                    "description": "Preferred chart types for the dashboard",
+                },
+            },
+            "required": ["data_description"],
+            "additionalProperties": False,
+        },
+    },
+    {
+        "name": "deploy-web-app",
+        "description": "Deploy a web application using PandaAGI's deployment capabilities",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "app_description": {
+                    "type": "string",
+                    "description": "Description of the web application to create and deploy",
+                },
+                "app_type": {
+                    "type": "string",
+                    "enum": ["streamlit", "flask", "fastapi", "static"],
+                    "description": "Type of web application framework",
+                    "default": "streamlit",
+                },
+                "features": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "List of features to include in the application",
+                },
+            },
+            "required": ["app_description"],
+            "additionalProperties": False,
+        },
+    },
+]
+
+# (name, uri, file) of the documents served as resources
+RESOURCES = [
+    ("PandaAGI Documentation", "docs://pandaagi-docs", "pandaagi-docs.md"),
+    ("PandaAGI Quick Start Guide", "docs://pandaagi-quickstart", "pandaagi-quickstart.md"),
+    ("Agent Best Practices", "docs://agent-best-practices", "agent-best-practices.md"),
+    ("PandaAGI Examples", "docs://pandaagi-examples", "pandaagi-examples.md"),
+]
+
+DEFAULT_RESOURCES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "netlify", "resources")
+
+MOCK_TASK_RESPONSES = {
+    "joke": "🐼 Why don't pandas ever get tired? Because they always have their bear-y own energy! Plus, they're always bamboo-zled by how much they can accomplish!",
+    "analysis": "I'll create a comprehensive analysis with data visualizations, charts, and actionable insights saved to your workspace.",
+    "dashboard": "Interactive dashboard created with real-time data updates and responsive design for all devices.",
+    "website": "Professional website deployed with modern design, SEO optimization, and mobile responsiveness.",
+    "report": "Detailed report generated with executive summary, key findings, and recommendations in PDF format.",
+}
+
+
+def pad_blank_lines(code: str) -> str:
+    """Indent blank lines inside indented blocks the way the Node templates do"""
+    lines = code.split("\n")
+    for i in range(1, len(lines) - 1):
+        if not lines[i] and lines[i - 1].startswith(" ") and lines[i + 1].startswith(" "):
+            lines[i] = "    "
+    return "\n".join(lines)
+
+
+# Python snippets returned by the tools, formatted with the tool arguments
+CREATE_AGENT_CODE = pad_blank_lines("""
+# PandaAGI Agent Creation
+import asyncio
+from panda_agi import Agent
+from panda_agi.envs import LocalEnv
+
+async def create_agent():
+    # Create environment
+    agent_env = LocalEnv("{workspace_path}")
+
+    # Create the agent
+    agent = Agent(environment=agent_env)
+
+    print(f"Agent '{name}' created successfully!")
+    print(f"Environment: {environment}")
+    print(f"Workspace: {workspace_path}")
+
+    return agent
+
+# To use this agent, run:
+# agent = asyncio.run(create_agent())
+""")
+
+RUN_AGENT_TASK_CODE = pad_blank_lines("""
+# Execute PandaAGI Task
+import asyncio
+from panda_agi import Agent
+from panda_agi.envs import LocalEnv
+
+async def run_task():
+    # Create environment
+    agent_env = LocalEnv("{workspace_path}")
+
+    # Create the agent
+    agent = Agent(environment=agent_env)
+
+    try:
+        # Execute the task
+        print(f"Executing task: {task}")
+        response = agent.run("{task}")
+
+        print("Task completed!")
+        print("Response:", response.output)
+
+        return response
+    finally:
+        # Cleanup, also when the task fails
+        await agent.disconnect()
+
+# Run the task
+if __name__ == "__main__":
+    result = asyncio.run(run_task())
+""")
+
+ANALYSIS_REPORT_CODE = pad_blank_lines('''
+# Generate Analysis Report with PandaAGI
+import asyncio
+from panda_agi import Agent
+from panda_agi.envs import LocalEnv
+
+async def generate_report():
+    # Create environment
+    agent_env = LocalEnv("./reports_workspace")
+
+    # Create the agent
+    agent = Agent(environment=agent_env)
+
+    # Generate comprehensive analysis report
+    task = """
+    Create a comprehensive {report_type} analysis report on: {topic}
+
+    {sources}
+
+    The report should include:
+    1. Executive Summary
+    2. Market Overview
+    3. Key Findings
+    4. Data Analysis with Charts
+    5. Recommendations
+    6. Conclusion
+
+    Save the report as both PDF and HTML formats.
+    """
+
+    response = agent.run(task)
+
+    print("Analysis report generated successfully!")
+    await agent.disconnect()
+
+    return response
+
+# Generate the report
+if __name__ == "__main__":
+    result = asyncio.run(generate_report())
+''')
+
+CREATE_DASHBOARD_CODE = pad_blank_lines('''
+# Create Dashboard with PandaAGI
+import asyncio
+from panda_agi import Agent
+from panda_agi.envs import LocalEnv
+
+async def create_dashboard():
+    # Create environment
+    agent_env = LocalEnv("./dashboard_workspace")
+
+    # Create the agent
+    agent = Agent(environment=agent_env)
+
+    # Create interactive dashboard
+    task = """
+    Create an interactive {dashboard_type} dashboard for: {data_description}
+
+    Include these chart types: {chart_types}
+
+    The dashboard should:
+    1. Load and analyze the data
+    2. Create interactive visualizations
+    3. Add filters and controls
+    4. Include key metrics and KPIs
+    5. Export as a web application
+    6. Make it responsive for mobile devices
+
+    Use Streamlit or Plotly Dash for the web interface.
+    """
+
+    response = agent.run(task)
+
+    print("Dashboard created successfully!")
+    await agent.disconnect()
+
+    return response
+
+# Create the dashboard
+if __name__ == "__main__":
+    result = asyncio.run(create_dashboard())
+''')
+
+DEPLOY_WEB_APP_CODE = pad_blank_lines('''
+# Deploy Web App with PandaAGI
+import asyncio
+from panda_agi import Agent
+from panda_agi.envs import LocalEnv
+
+async def deploy_web_app():
+    # Create environment
+    agent_env = LocalEnv("./webapp_workspace")
+
+    # Create the agent
+    agent = Agent(environment=agent_env)
+
+    # Create and deploy web application
+    task = """
+    Create and deploy a {app_type} web application: {app_description}
+
+    {feature_list}
+
+    Steps:
+    1. Design the application architecture
+    2. Implement the core functionality
+    3. Create user interface
+    4. Add error handling and validation
+    5. Test the application
+    6. Deploy to a web server
+    7. Provide access URL and documentation
+
+    Make sure the app is production-ready with proper styling.
+    """
+
+    response = agent.run(task)
+
+    print("Web application deployed successfully!")
+    await agent.disconnect()
+
+    return response
+
+# Deploy the application
+if __name__ == "__main__":
+    result = asyncio.run(deploy_web_app())
+''')
+
+
+class RPCError(MCPError):
+    """A JSON-RPC error along with the HTTP status the Node server uses for it"""
+
+    def __init__(self, code: int, message: str, status: int = 400):
+        super().__init__(code, message)
+        self.status = status
+
+
+def error_response(code: int, message: str, id: Any = None) -> Dict[str, Any]:
+    return {"jsonrpc": "2.0", "error": {"code": code, "message": message}, "id": id}
+
+
+def iso_time(timestamp: float) -> str:
+    """``Date.prototype.toISOString`` format, e.g. ``2024-01-01T12:00:00.000Z``"""
+    moment = datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+    return moment.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def js_json(value: Any) -> str:
+    """``JSON.stringify(value, null, 2)``"""
+    return json.dumps(value, indent=2, ensure_ascii=False)
+
+
+def mock_task_response(task: str) -> str:
+    for key, response in MOCK_TASK_RESPONSES.items():
+        if key in task.lower():
+            return response
+    return (
+        "Task will be executed by the PandaAGI agent with full autonomous capabilities "
+        "including web access, file operations, and code execution."
+    )
+
+
+def stream_chunks(result: Dict[str, Any], size: int = STREAM_CHUNK_SIZE) -> List[Dict[str, Any]]:
+    """Split tool output on line boundaries into content items of about ``size`` characters"""
+    chunks = []
+    for item in result.get("content", []):
+        lines = item["text"].split("\n")
+        chunk = ""
+        for index, line in enumerate(lines):
+            piece = line + "\n" if index < len(lines) - 1 else line
+            if chunk and len(chunk) + len(piece) > size:
+                chunks.append({"type": item["type"], "text": chunk})
+                chunk = ""
+            chunk += piece
+        if chunk:
+            chunks.append({"type": item["type"], "text": chunk})
+    return chunks
+
+
+def progress_message(id: Any, index: int, total: int, chunk: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "jsonrpc": "2.0",
+        "method": "notifications/progress",
+        "params": {"requestId": id, "progress": index + 1, "total": total, "content": [chunk]},
+    }
+
+
+class MCPServer:
+    """The PandaAGI MCP server as an ASGI app and a direct-call dispatcher"""
+
+    def __init__(self, resources_dir: str = DEFAULT_RESOURCES_DIR):
+        self.resources_dir = resources_dir
+        self.calls = 0
+        self._resource_files = {uri: file for _, uri, file in RESOURCES}
+        # Documents and their hashes are read from disk on first use
+        self._contents: Dict[str, str] = {}
+        self._hashes: Dict[str, str] = {}
+        self._resource_list: Optional[Dict[str, Any]] = None
+        self._tools = {
+            "create-agent": self._create_agent,
+            "run-agent-task": self._run_agent_task,
+            "generate-analysis-report": self._generate_analysis_report,
+            "create-dashboard": self._create_dashboard,
+            "deploy-web-app": self._deploy_web_app,
+        }
+
+    @classmethod
+    def from_env(cls) -> "MCPServer":
+        return cls(resources_dir=os.getenv("RESOURCES_DIR", DEFAULT_RESOURCES_DIR))
+
+    # -- dispatch ---------------------------------------------------------
+
+    def call(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run one method and return its ``result``; raises ``RPCError``
+
+        Catalog results are shared between calls and must not be mutated.
+        """
+        self.calls += 1
+        params = params or {}
+        if method == "mcp/init":
+            return SERVER_INFO
+        if method == "mcp/listTools":
+            return {"tools": TOOLS}
+        if method == "mcp/callTool":
+            handler = self._tools.get(params.get("name"))
+            if handler is None:
+                raise RPCError(-32602, "Unknown tool")
+            return handler(params.get("args") or {})
+        if method == "mcp/listResources":
+            return self._list_resources()
+        if method == "mcp/readResource":
+            return self._read_resource(params)
+        raise RPCError(-32601, "Method not found")
+
+    def respond(self, method: Any, params: Any, id: Any) -> Tuple[Dict[str, Any], int]:
+        """JSON-RPC response envelope and HTTP status for one call"""
+        try:
+            result = self.call(method, params)
+        except RPCError as e:
+            return error_response(e.code, e.message, id), e.status
+        except Exception as e:
+            return error_response(-32603, f"Internal error: {e}", id), 500
+        return {"jsonrpc": "2.0", "result": result, "id": id}, 200
+
+    def batch(self, requests: List[Any]) -> Tuple[Any, int]:
+        """JSON-RPC 2.0 batch: one response per call that carries an id"""
+        if not requests or len(requests) > MAX_BATCH_SIZE:
+            message = (
+                "Invalid Request: empty batch" if not requests
+                else f"Invalid Request: batch exceeds {MAX_BATCH_SIZE} calls"
+            )
+            return error_response(-32600, message), 400
+
+        responses = []
+        for request in requests:
+            if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+                responses.append(error_response(-32600, "Invalid Request"))
+                continue
+            response, _ = self.respond(request["method"], request.get("params") or {}, request.get("id"))
+            # Notifications (no id) are executed but not answered
+            if "id" in request:
+                responses.append(response)
+        return (responses, 200) if responses else (None, 204)
+
+    # -- long-lived connections -------------------------------------------
+
+    async def serve_connection(
+        self, recv: Callable[[], Awaitable[Optional[str]]], send: Callable[[str], Awaitable[None]]
+    ) -> None:
+        """Answer JSON-RPC messages from ``recv`` until it returns ``None``
+
+        Each message is one call or a batch, answered by id as soon as it is
+        done. Streamed tool calls send their progress notifications from a
+        task of their own, so a long stream doesn't hold up the calls behind it.
+        """
+        lock = asyncio.Lock()
+        streams: Set[asyncio.Task] = set()
+
+        async def reply(payload: Any) -> None:
+            text = json.dumps(payload, ensure_ascii=False)
+            async with lock:
+                await send(text)
+
+        try:
+            while True:
+                text = await recv()
+                if text is None:
+                    break
+                if not text.strip():
+                    continue
+                try:
+                    request = json.loads(text)
+                except ValueError as e:
+                    await reply(error_response(-32700, f"Parse error: {e}"))
+                    continue
+
+                if isinstance(request, list):
+                    payload, _ = self.batch(request)
+                    if payload is not None:
+                        await reply(payload)
+                    continue
+                if not isinstance(request, dict):
+                    await reply(error_response(-32600, "Invalid Request"))
+                    continue
+
+                params = request.get("params") or {}
+                response, _ = self.respond(request.get("method"), params, request.get("id"))
+                if "id" not in request:
+                    continue
+                if request.get("method") == "mcp/callTool" and params.get("stream") and "result" in response:
+                    task = asyncio.ensure_future(self._stream_messages(reply, response["result"], request["id"]))
+                    streams.add(task)
+                    task.add_done_callback(streams.discard)
+                else:
+                    await reply(response)
+        finally:
+            for task in streams:
+                task.cancel()
+
+    async def _stream_messages(self, reply: Callable[[Any], Awaitable[None]], result: Dict[str, Any], id: Any) -> None:
+        chunks = stream_chunks(result)
+        for index, chunk in enumerate(chunks):
+            await reply(progress_message(id, index, len(chunks), chunk))
+            await asyncio.sleep(0)
+        await reply({"jsonrpc": "2.0", "result": {"content": [], "streamed": True, "chunks": len(chunks)}, "id": id})
+
+    async def _websocket(self, receive, send) -> None:
+        if (await receive())["type"] != "websocket.connect":
+            return
+        await send({"type": "websocket.accept"})
+
+        async def recv() -> Optional[str]:
+            while True:
+                message = await receive()
+                if message["type"] == "websocket.disconnect":
+                    return None
+                if message["type"] == "websocket.receive":
+                    return message.get("text") or (message.get("bytes") or b"").decode("utf-8")
+
+        async def send_text(text: str) -> None:
+            await send({"type": "websocket.send", "text": text})
+
+        await self.serve_connection(recv, send_text)
+
+    # -- ASGI -------------------------------------------------------------
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "websocket":
+            await self._websocket(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        if scope["method"] == "OPTIONS":
+            await self._reply(send, 200, None, cors=True)
+            return
+        if scope["method"] != "POST":
+            await self._reply(send, 405, {"error": "Method not allowed"}, cors=True)
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        try:
+            request = json.loads(body)
+        except ValueError as e:
+            await self._reply(send, 500, error_response(-32603, f"Internal error: {e}"))
+            return
+
+        if isinstance(request, list):
+            payload, status = self.batch(request)
+            await self._reply(send, status, payload)
+            return
+        if not isinstance(request, dict):
+            await self._reply(send, 400, error_response(-32600, "Invalid Request"))
+            return
+
+        params = request.get("params") or {}
+        response, status = self.respond(request.get("method"), params, request.get("id"))
+        if request.get("method") == "mcp/callTool" and params.get("stream") and "result" in response:
+            await self._stream(send, response["result"], request.get("id"))
+        else:
+            await self._reply(send, status, response)
+
+    async def _reply(self, send, status: int, payload: Any, cors: bool = False) -> None:
+        body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = [(b"access-control-allow-origin", b"*")]
+        if payload is not None:
+            headers.append((b"content-type", b"application/json"))
+        if cors:
+            headers += [
+                (b"access-control-allow-headers", b"Content-Type"),
+                (b"access-control-allow-methods", b"POST, OPTIONS"),
+            ]
+        headers.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _stream(self, send, result: Dict[str, Any], id: Any) -> None:
+        """Send a tool result as NDJSON progress notifications, then the final response"""
+        chunks = stream_chunks(result)
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/x-ndjson"), (b"access-control-allow-origin", b"*")],
+        })
+        for index, chunk in enumerate(chunks):
+            line = json.dumps(progress_message(id, index, len(chunks), chunk), ensure_ascii=False) + "\n"
+            await send({"type": "http.response.body", "body": line.encode("utf-8"), "more_body": True})
+            await asyncio.sleep(0)
+        final = {"jsonrpc": "2.0", "result": {"content": [], "streamed": True, "chunks": len(chunks)}, "id": id}
+        await send({"type": "http.response.body", "body": (json.dumps(final) + "\n").encode("utf-8")})
+
+    # -- resources --------------------------------------------------------
+
+    def resource_content(self, uri: str) -> Optional[str]:
+        file = self._resource_files.get(uri)
+        if file is None:
+            return None
+        if uri not in self._contents:
+            with open(os.path.join(self.resources_dir, file), encoding="utf-8", newline="") as f:
+                self._contents[uri] = f.read()
+        return self._contents[uri]
+
+    def resource_hash(self, uri: str) -> Optional[str]:
+        if uri not in self._hashes:
+            content = self.resource_content(uri)
+            if content is None:
+                return None
+            self._hashes[uri] = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return self._hashes[uri]
+
+    def _list_resources(self) -> Dict[str, Any]:
+        if self._resource_list is None:
+            self._resource_list = {"resources": [
+                {"name": name, "uri": uri, "metadata": {"mimeType": "text/markdown", "hash": self.resource_hash(uri)}}
+                for name, uri, _ in RESOURCES
+            ]}
+        return self._resource_list
+
+    def _read_resource(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        uri = params.get("uri")
+        content = self.resource_content(uri)
+        if content is None:
+            raise RPCError(-32602, "Resource not found", status=404)
+        hash = self.resource_hash(uri)
+        # The caller already holds this exact document, so skip the body
+        if params.get("ifNoneMatch") and params["ifNoneMatch"] == hash:
+            return {"contents": [], "notModified": True, "hash": hash}
+        return {"contents": [{"uri": uri, "text": content, "hash": hash}]}
+
+    # -- tools ------------------------------------------------------------
+
+    @staticmethod
+    def _text(text: str) -> Dict[str, Any]:
+        return {"content": [{"type": "text", "text": text}]}
+
+    def _create_agent(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        name = args.get("name")
+        environment = args.get("environment", "local")
+        workspace_path = args.get("workspace_path", "./agent_workspace")
+
+        now = time.time()
+        config = {
+            "agentId": f"agent-{int(now * 1000)}",
+            "name": name,
+            "environment": environment,
+            "workspace_path": workspace_path,
+            "created_at": iso_time(now),
+            "status": "ready",
+            "capabilities": ["web_access", "file_system", "code_execution", "deployment"],
+        }
+        python_code = CREATE_AGENT_CODE.format(name=name, environment=environment, workspace_path=workspace_path)
+        return self._text(
+            f'Agent "{name}" configuration created successfully!\n\n'
+            f"Configuration:\n{js_json(config)}\n\n"
+            f"Python code to create the agent:\n```python\n{python_code}\n```"
+        )
+
+    def _run_agent_task(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        task = args.get("task")
+        agent_name = args.get("agent_name", "default")
+        environment = args.get("environment", "local")
+        workspace_path = args.get("workspace_path", "./agent_workspace")
+
+        python_code = RUN_AGENT_TASK_CODE.format(agent_name=agent_name, workspace_path=workspace_path, task=task)
+        return self._text(
+            f'Task execution configured for agent "{agent_name}":\n\n'
+            f"Task: {task}\n\n"
+            f"Python code to execute:\n```python\n{python_code}\n```\n\n"
+            f"Expected output:\n{mock_task_response(task or '')}"
+        )
+
+    def _generate_analysis_report(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        topic = args.get("topic")
+        # An explicit null means the same as leaving the field out
+        data_sources = args.get("data_sources") or []
+        report_type = args.get("report_type", "general")
+
+        # Arguments only: the output is cached and replayed, so no timestamps
+        config = {
+            "topic": topic,
+            "report_type": report_type,
+            "data_sources": data_sources,
+        }
+        sources = f"Research these data sources: {', '.join(data_sources)}" if data_sources else ""
+        python_code = ANALYSIS_REPORT_CODE.format(report_type=report_type, topic=topic, sources=sources)
+        return self._text(
+            "Analysis report generation configured:\n\n"
+            f"Configuration:\n{js_json(config)}\n\n"
+            f"Python code to generate the report:\n```python\n{python_code}\n```"
+        )
+
+    def _create_dashboard(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        data_description = args.get("data_description")
+        dashboard_type = args.get("dashboard_type", "custom")
+        chart_types = args.get("chart_types")
+        if chart_types is None:
+            chart_types = ["line", "bar"]
+
+        python_code = CREATE_DASHBOARD_CODE.format(
+            dashboard_type=dashboard_type, data_description=data_description, chart_types=", ".join(chart_types)
+        )
+        return self._text(
+            "Dashboard creation configured:\n\n"
+            f"Type: {dashboard_type}\n"
+            f"Data: {data_description}\n"
+            f"Chart Types: {', '.join(chart_types)}\n\n"
+            f"Python code to create the dashboard:\n```python\n{python_code}\n```"
+        )
+
+    def _deploy_web_app(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        app_description = args.get("app_description")
+        app_type = args.get("app_type", "streamlit")
+        features = args.get("features") or []
+
+        feature_list = f"Include these features: {', '.join(features)}" if features else ""
+        python_code = DEPLOY_WEB_APP_CODE.format(
+            app_type=app_type, app_description=app_description, feature_list=feature_list
+        )
+        return self._text(
+            "Web application deployment configured:\n\n"
+            f"Type: {app_type}\n"
+            f"Description: {app_description}\n"
+            f"Features: {', '.join(features)}\n\n"
+            f"Python code to deploy the application:\n```python\n{python_code}\n```"
+        )
+
+
+async def serve_stdio(server: MCPServer) -> None:
+    """Serve newline-delimited JSON-RPC on stdin/stdout until stdin closes"""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=64 * 1024 * 1024)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+    writer = asyncio.StreamWriter(transport, protocol, None, loop)
+
+    async def recv() -> Optional[str]:
+        line = await reader.readline()
+        return line.decode("utf-8") if line else None
+
+    async def send(text: str) -> None:
+        writer.write(text.encode("utf-8") + b"\n")
+        await writer.drain()
+
+    await server.serve_connection(recv, send)
+
+
+if __name__ == "__main__":
+    if "--stdio" in sys.argv[1:]:
+        asyncio.run(serve_stdio(MCPServer.from_env()))
+        sys.exit(0)
+
+    import uvicorn
+
+    from compression import CompressionMiddleware, ResponseCompressor
+
+    # WebSocket connections on any path reach the same server; compression
+    # middleware only touches HTTP responses
+    app = CompressionMiddleware(MCPServer.from_env(), ResponseCompressor.from_env())
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("MCP_SERVER_PORT", "8888")))
@@ -0,0 +1,521 @@
+"""
+Shared async transport for talking to an MCP server over HTTP.
+
+Both FastAPI apps route their upstream calls through a single pooled
+``httpx.AsyncClient`` so requests never block the event loop and TCP
+connections are kept alive and reused between calls. Idempotent calls are
+retried with jittered backoff within their timeout budget, and an optional
+circuit breaker fails calls fast while the server is unhealthy. Given several
+server URLs, calls go to the least-loaded, fastest healthy one (see
+``upstreams.py``) and idempotent calls can be hedged on a second server.
+"""
+
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Callable, ContextManager, Dict, List, Optional, Sequence, Tuple, Union
+
+import httpx
+
+from resilience import CircuitBreaker, RetryPolicy
+from upstreams import Upstream, UpstreamPool
+
+# Default timeout budgets in seconds. Keys are either an MCP method or a
+# "method:tool" pair so long-running tools can get their own budget.
+DEFAULT_TIMEOUTS = {
+    "default": 30.0,
+    "mcp/init": 10.0,
+    "mcp/listTools": 10.0,
+    "mcp/listResources": 10.0,
+    "mcp/readResource": 15.0,
+    "mcp/callTool": 60.0,
+    "mcp/callTool:run-agent-task": 300.0,
+}
+
+# Read-only methods that are safe to send again after a failed attempt
+IDEMPOTENT_METHODS = frozenset({"mcp/init", "mcp/listTools", "mcp/listResources", "mcp/readResource"})
+
+
+class MCPError(Exception):
+    """JSON-RPC error returned by the MCP server"""
+
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class MCPConnectionError(Exception):
+    """The MCP server could not be reached or returned an unusable response"""
+
+
+class MCPTimeoutError(MCPConnectionError):
+    """The MCP server did not answer within the call's timeout budget"""
+
+
+class CircuitOpenError(MCPConnectionError):
+    """The circuit breaker is open, so the call was not sent"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"MCP server circuit is open; retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+def method_key(method: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Return the method key used for timeouts, e.g. ``mcp/callTool:create-dashboard``"""
+    if method == "mcp/callTool" and params and params.get("name"):
+        return f"{method}:{params['name']}"
+    return method
+
+
+def _error_from(error: Any) -> MCPError:
+    error = error if isinstance(error, dict) else {}
+    return MCPError(error.get("code", -32603), error.get("message", "Unknown error"), error.get("data"))
+
+
+def parse_timeouts(spec: Optional[str]) -> Dict[str, float]:
+    """Parse ``"mcp/init=5,mcp/callTool:run-agent-task=600"`` into a timeout map"""
+    timeouts: Dict[str, float] = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        key, value = item.rsplit("=", 1)
+        timeouts[key.strip()] = float(value)
+    return timeouts
+
+
+class BaseTransport(ABC):
+    """What every transport to the MCP server shares, whatever the wire
+
+    Call ids, timeout budgets, the observer wrapping each upstream request,
+    retries of idempotent calls and the circuit breaker. Subclasses send
+    the JSON-RPC payloads in ``_post`` and ``stream``.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        connect_timeout: float = 5.0,
+        timeouts: Optional[Dict[str, float]] = None,
+        observer: Optional[Callable[[str], ContextManager]] = None,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.url = url
+        self.connect_timeout = connect_timeout
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self._ids = itertools.count(1)
+        # Wraps each upstream request, e.g. to record latency metrics
+        self.observer = observer
+        self.retry = retry or RetryPolicy(attempts=1)
+        self.breaker = breaker
+        self.stats = {"retries": 0}
+
+    def timeout_for(self, method: str, params: Optional[Dict[str, Any]] = None) -> float:
+        """Timeout budget for a call, most specific key first"""
+        for key in (method_key(method, params), method):
+            if key in self.timeouts:
+                return self.timeouts[key]
+        return self.timeouts["default"]
+
+    def _payload(self, method: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params or {},
+            "id": next(self._ids),
+        }
+
+    def _observe(self, key: str) -> ContextManager:
+        return self.observer(key) if self.observer else contextlib.nullcontext()
+
+    def _check_breaker(self) -> None:
+        if self.breaker is not None and not self.breaker.allow():
+            raise CircuitOpenError(self.breaker.retry_after())
+
+    def _record(self, error: Optional[BaseException]) -> None:
+        """Feed a call's outcome to the breaker; JSON-RPC errors mean the server is up"""
+        if self.breaker is None:
+            return
+        if isinstance(error, MCPConnectionError):
+            self.breaker.record_failure()
+        elif error is None or isinstance(error, MCPError):
+            self.breaker.record_success()
+
+    @abstractmethod
+    async def _post(self, payload: Any, timeout: float, key: str, hedge: bool = False) -> Any:
+        """Send one call or a batch and return the decoded body; ``hedge`` is a hint"""
+
+    async def request(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Send a JSON-RPC call and return its ``result``, raising on errors
+
+        Idempotent methods are retried on connection failures and timeouts, as
+        long as the method's timeout budget has room for another attempt, and
+        may be hedged where the transport supports it.
+        """
+        payload = self._payload(method, params)
+        key = method_key(method, params)
+        idempotent = method in IDEMPOTENT_METHODS
+        attempts = self.retry.attempts if idempotent else 1
+        deadline = time.monotonic() + self.timeout_for(method, params)
+        attempt = 1
+        while True:
+            try:
+                body = await self._post(payload, deadline - time.monotonic(), key, hedge=idempotent)
+                break
+            except CircuitOpenError:
+                raise
+            except MCPConnectionError:
+                delay = self.retry.backoff(attempt)
+                if attempt >= attempts or time.monotonic() + delay >= deadline:
+                    raise
+            attempt += 1
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+        if not isinstance(body, dict):
+            raise MCPConnectionError("Invalid JSON-RPC response from MCP server")
+        return body.get("result", {})
+
+    async def batch(
+        self, calls: Sequence[Tuple[str, Optional[Dict[str, Any]]]]
+    ) -> List[Union[Dict[str, Any], MCPError]]:
+        """Send calls as one JSON-RPC batch; results come back in call order
+
+        Each item is either the call's ``result`` or the ``MCPError`` it failed with.
+        """
+        payloads = [self._payload(method, params) for method, params in calls]
+        timeout = max(self.timeout_for(method, params) for method, params in calls)
+        body = await self._post(payloads, timeout, "batch")
+        if not isinstance(body, list):
+            raise MCPConnectionError("Invalid JSON-RPC batch response from MCP server")
+
+        by_id = {item.get("id"): item for item in body if isinstance(item, dict)}
+        results: List[Union[Dict[str, Any], MCPError]] = []
+        for payload in payloads:
+            item = by_id.get(payload["id"])
+            if item is None:
+                results.append(MCPError(-32603, "No response for batched call"))
+            elif "error" in item:
+                results.append(_error_from(item["error"]))
+            else:
+                results.append(item.get("result", {}))
+        return results
+
+    @abstractmethod
+    def stream(self, method: str, params: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Send a call and yield its progress notifications, then the final response"""
+
+    @abstractmethod
+    def describe(self) -> Dict[str, Any]:
+        """State of the transport for ``/health`` and ``/cache/stats``"""
+
+    @abstractmethod
+    async def aclose(self) -> None:
+        """Close connections; the transport reopens them on next use"""
+
+
+class MCPTransport(BaseTransport):
+    """Pooled, non-blocking JSON-RPC client for one or more MCP server URLs"""
+
+    def __init__(
+        self,
+        url: Union[str, Sequence[str]],
+        pool_size: int = 100,
+        keepalive: int = 20,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: float = 5.0,
+        timeouts: Optional[Dict[str, float]] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        observer: Optional[Callable[[str], ContextManager]] = None,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        pool: Optional[UpstreamPool] = None,
+    ):
+        urls = [url] if isinstance(url, str) else list(url)
+        self.pool = pool or UpstreamPool(urls)
+        super().__init__(self.pool.upstreams[0].url, connect_timeout, timeouts, observer, retry, breaker)
+        self.limits = httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    def from_env(cls, url: Union[str, Sequence[str]], **kwargs) -> "MCPTransport":
+        """Build a transport configured from ``MCP_*`` environment variables"""
+        breaker_enabled = os.getenv("MCP_BREAKER_ENABLED", "true").lower() in ("1", "true", "yes")
+        urls = [url] if isinstance(url, str) else list(url)
+        return cls(
+            urls,
+            pool_size=int(os.getenv("MCP_POOL_SIZE", "100")),
+            keepalive=int(os.getenv("MCP_POOL_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("MCP_KEEPALIVE_EXPIRY", "30")),
+            connect_timeout=float(os.getenv("MCP_CONNECT_TIMEOUT", "5")),
+            timeouts=parse_timeouts(os.getenv("MCP_TIMEOUTS")),
+            retry=RetryPolicy.from_env(),
+            breaker=CircuitBreaker.from_env() if breaker_enabled else None,
+            pool=UpstreamPool.from_env(urls),
+            **kwargs,
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared client, created lazily inside the running event loop
+
+        httpx advertises gzip, and brotli when the package is installed, and
+        decodes compressed responses transparently.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=httpx.Timeout(self.timeouts["default"], connect=self.connect_timeout),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def _post(self, payload: Any, timeout: float, key: str, hedge: bool = False) -> Any:
+        """POST a JSON-RPC payload and return the decoded body"""
+        self._check_breaker()
+        try:
+            with self._observe(key):
+                if hedge:
+                    body = await self._hedged(payload, timeout)
+                else:
+                    body = await self._attempt(self.pool.acquire(self.pool.pick()), payload, timeout)
+        except Exception as e:
+            self._record(e)
+            raise
+        self._record(None)
+        return body
+
+    async def _attempt(self, upstream: Upstream, payload: Any, timeout: float) -> Any:
+        """Send to an acquired upstream, feeding its outcome and latency to the pool"""
+        start = time.perf_counter()
+        try:
+            body = await self._send(upstream.url, payload, timeout)
+        except MCPConnectionError:
+            self.pool.release(upstream, time.perf_counter() - start, ok=False)
+            raise
+        except MCPError:
+            # A JSON-RPC error is a prompt answer from a healthy server
+            self.pool.release(upstream, time.perf_counter() - start, ok=True)
+            raise
+        except BaseException:
+            # Cancelled, e.g. the losing half of a hedged call
+            self.pool.release(upstream, None, ok=True)
+            raise
+        self.pool.release(upstream, time.perf_counter() - start, ok=True)
+        return body
+
+    async def _hedged(self, payload: Any, timeout: float) -> Any:
+        """Send to the best upstream and, past the hedge delay, also to the next best
+
+        The first answer wins and the other attempt is cancelled. JSON-RPC
+        errors are answers too; only transport failures wait for the other
+        attempt.
+        """
+        deadline = time.monotonic() + timeout
+        # Acquire before the task runs so concurrent calls see each other's load
+        first = self.pool.acquire(self.pool.pick())
+        tasks = [asyncio.ensure_future(self._attempt(first, payload, timeout))]
+        try:
+            delay = self.pool.hedge_delay()
+            if delay is not None and delay < timeout:
+                await asyncio.wait(tasks, timeout=delay)
+                backup = self.pool.pick(exclude=(first,))
+                if not tasks[0].done() and backup is not None and backup.available(time.monotonic()):
+                    backup.stats["hedges"] += 1
+                    tasks.append(asyncio.ensure_future(
+                        self._attempt(self.pool.acquire(backup), payload, deadline - time.monotonic())
+                    ))
+
+            error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    if isinstance(task.exception(), MCPError):
+                        raise task.exception()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _send(self, url: str, payload: Any, timeout: float) -> Any:
+        try:
+            # httpx timeouts apply per read, so a server trickling bytes could
+            # outlast the budget; wait_for enforces it as a total deadline
+            response = await asyncio.wait_for(
+                self.client.post(
+                    url,
+                    json=payload,
+                    timeout=httpx.Timeout(timeout, connect=min(self.connect_timeout, timeout)),
+                ),
+                timeout,
+            )
+        except (httpx.TimeoutException, asyncio.TimeoutError) as e:
+            raise MCPTimeoutError(f"MCP server did not respond within {timeout:.1f}s") from e
+        except httpx.HTTPError as e:
+            raise MCPConnectionError(str(e) or e.__class__.__name__) from e
+
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+
+        # The server reports JSON-RPC errors with 4xx statuses, so look at the
+        # envelope before treating the status code as a transport failure.
+        if isinstance(body, dict) and "error" in body:
+            raise _error_from(body["error"])
+
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise MCPConnectionError(str(e)) from e
+        return body
+
+    async def stream(self, method: str, params: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Send a call and yield JSON-RPC messages as the server produces them
+
+        Servers that stream answer with NDJSON: progress notifications followed
+        by the final response. Servers that don't are handled transparently, the
+        single JSON response being yielded as the only message.
+        """
+        payload = self._payload(method, params)
+        timeout = httpx.Timeout(self.timeout_for(method, params), connect=self.connect_timeout)
+
+        self._check_breaker()
+        upstream = self.pool.acquire(self.pool.pick())
+        start = time.perf_counter()
+        try:
+            with self._observe(method_key(method, params)):
+                async for message in self._stream(upstream.url, payload, timeout):
+                    yield message
+        except Exception as e:
+            self._record(e)
+            failed = isinstance(e, MCPConnectionError)
+            self.pool.release(upstream, time.perf_counter() - start if failed else None, ok=not failed)
+            raise
+        except BaseException:
+            self.pool.release(upstream, None, ok=True)
+            raise
+        self._record(None)
+        # A stream lasts as long as the task, so its duration says nothing
+        # about the upstream's latency; only failures feed the pool
+        self.pool.release(upstream, None, ok=True)
+
+    async def _stream(self, url: str, payload: Dict[str, Any], timeout: httpx.Timeout) -> AsyncIterator[Dict[str, Any]]:
+        try:
+            async with self.client.stream("POST", url, json=payload, timeout=timeout) as response:
+                if "ndjson" not in response.headers.get("content-type", ""):
+                    await response.aread()
+                    try:
+                        body = response.json()
+                    except ValueError:
+                        body = None
+                    if isinstance(body, dict) and "error" in body:
+                        raise _error_from(body["error"])
+                    response.raise_for_status()
+                    if not isinstance(body, dict):
+                        raise MCPConnectionError("Invalid JSON-RPC response from MCP server")
+                    yield body
+                    return
+
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    message = json.loads(line)
+                    if "error" in message:
+                        raise _error_from(message["error"])
+                    yield message
+        except httpx.HTTPStatusError as e:
+            raise MCPConnectionError(str(e)) from e
+        except httpx.TimeoutException as e:
+            raise MCPTimeoutError("MCP server stopped responding mid-stream") from e
+        except httpx.HTTPError as e:
+            raise MCPConnectionError(str(e) or e.__class__.__name__) from e
+        except ValueError as e:
+            raise MCPConnectionError(f"Invalid streamed message from MCP server: {e}") from e
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "transport": "http",
+            "retry": {"attempts": self.retry.attempts, "retries": self.stats["retries"]},
+            "breaker": self.breaker.describe() if self.breaker else None,
+            "upstreams": self.pool.describe(),
+        }
+
+    async def aclose(self) -> None:
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class InProcessTransport:
+    """Calls an in-process server's ``call(method, params)`` directly
+
+    Drop-in replacement for ``MCPTransport`` when the MCP server runs in the
+    same process (``mcp_server.MCPServer``): no HTTP hop and no JSON encoding.
+    Results may be shared with the server and must be treated as read-only.
+    """
+
+    def __init__(self, server, observer: Optional[Callable[[str], ContextManager]] = None):
+        self.server = server
+        self.url = "inprocess://"
+        self.observer = observer
+        # No network, so nothing to retry or trip a breaker on
+        self.breaker: Optional[CircuitBreaker] = None
+        self.stats = {"retries": 0}
+
+    def _observe(self, key: str) -> ContextManager:
+        return self.observer(key) if self.observer else contextlib.nullcontext()
+
+    def _call(self, method: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """``server.call``, with failures reported as the HTTP server would: -32603"""
+        try:
+            return self.server.call(method, params)
+        except MCPError:
+            raise
+        except Exception as e:
+            raise MCPError(-32603, f"Internal error: {e}") from e
+
+    async def request(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        with self._observe(method_key(method, params)):
+            return self._call(method, params)
+
+    async def batch(
+        self, calls: Sequence[Tuple[str, Optional[Dict[str, Any]]]]
+    ) -> List[Union[Dict[str, Any], MCPError]]:
+        results: List[Union[Dict[str, Any], MCPError]] = []
+        with self._observe("batch"):
+            for method, params in calls:
+                try:
+                    results.append(self._call(method, params))
+                except MCPError as e:
+                    results.append(e)
+        return results
+
+    async def stream(self, method: str, params: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the result as one message, like a server that doesn't stream"""
+        with self._observe(method_key(method, params)):
+            result = self._call(method, params)
+        yield {"jsonrpc": "2.0", "result": result}
+
+    def describe(self) -> Dict[str, Any]:
+        return {"transport": "inprocess", "retry": None, "breaker": None, "upstreams": None}
+
+    async def aclose(self) -> None:
+        pass
@@ -0,0 +1,277 @@
+"""
+Lightweight Prometheus-style metrics for the FastAPI clients.
+
+Tracks request latency histograms, in-flight gauges and error counters per
+FastAPI route, and the same for upstream MCP calls per method or tool
+(``mcp/callTool:create-dashboard``), so client overhead can be told apart
+from time spent waiting on the MCP server. Tool names come from callers, so
+only those in the last tool catalog seen get their own label; the rest share
+``mcp/callTool:other``. Rendered in the Prometheus text
+exposition format by ``Registry.render``; ``Registry.families`` gives the
+same values as data, for merging the metrics of several worker processes.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from starlette.routing import Match
+
+TOOL_CALL_PREFIX = "mcp/callTool:"
+
+# Seconds; spans cached sub-millisecond responses up to long agent runs
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+Sample = Tuple[Dict[str, str], float]
+
+
+class Family(NamedTuple):
+    """One metric's samples as ``(sample name, labels, value)``, ready to render or merge"""
+
+    name: str
+    kind: str
+    help: str
+    samples: List[Tuple[str, Dict[str, str], float]]
+    # Reported by a collector rather than tracked by a metric object
+    collected: bool = False
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        for labels, value in self._values.items():
+            yield self.name, dict(zip(self.labelnames, labels)), value
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        self._values[labels] = value
+
+
+class Histogram:
+    """Cumulative bucketed histogram with labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[0][i] += 1
+                break
+        entry[1] += value
+        entry[2] += 1
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        for labels, (counts, total, count) in self._values.items():
+            base = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", {**base, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_bucket", {**base, "le": "+Inf"}, count
+            yield f"{self.name}_sum", base, total
+            yield f"{self.name}_count", base, count
+
+
+class Registry:
+    """Holds metrics plus collectors that report external stats at render time"""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Iterable[Sample]]]]] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def collector(self, fn: Callable[[], Iterable[Tuple[str, str, str, Iterable[Sample]]]]) -> None:
+        """Register ``fn`` returning ``(name, type, help, [(labels, value), ...])`` tuples"""
+        self._collectors.append(fn)
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def families(self) -> List[Family]:
+        """Current value of every metric, then every collector's output"""
+        families: List[Family] = []
+        for metric in self._metrics:
+            families.append(Family(metric.name, metric.kind, metric.help, list(metric.samples())))
+        for collect in self._collectors:
+            for name, kind, help, samples in collect():
+                families.append(
+                    Family(name, kind, help, [(name, labels, value) for labels, value in samples], collected=True)
+                )
+        return families
+
+    def render(self, families: Optional[Iterable[Family]] = None) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        for family in self.families() if families is None else families:
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for name, labels, value in family.samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class ClientMetrics:
+    """The standard set of route and MCP metrics for one app"""
+
+    def __init__(self, registry: Optional[Registry] = None):
+        self.registry = registry or Registry()
+        r = self.registry
+        self.http_requests = r.counter(
+            "http_requests_total", "HTTP requests handled, by route and status", ("method", "route", "status"))
+        self.http_duration = r.histogram(
+            "http_request_duration_seconds", "Total time to serve a request", ("method", "route"))
+        self.http_in_flight = r.gauge(
+            "http_requests_in_flight", "Requests currently being served", ("method", "route"))
+        self.mcp_calls = r.counter(
+            "mcp_calls_total", "MCP calls made by route handlers, by outcome", ("method", "outcome"))
+        self.mcp_call_duration = r.histogram(
+            "mcp_call_duration_seconds", "Client-side time of an MCP call including coalescing waits", ("method",))
+        self.upstream_requests = r.counter(
+            "mcp_upstream_requests_total", "Requests sent to the MCP server, by outcome", ("method", "outcome"))
+        self.upstream_duration = r.histogram(
+            "mcp_upstream_duration_seconds", "Time spent waiting on the MCP server", ("method",))
+        self.upstream_in_flight = r.gauge(
+            "mcp_upstream_in_flight", "Requests currently waiting on the MCP server", ("method",))
+        # Tools that get a label of their own, from the last catalog seen
+        self.tools: FrozenSet[str] = frozenset()
+
+    def load_tools(self, catalog: Dict[str, Any]) -> None:
+        """Label calls to the tools listed in an ``mcp/listTools`` result by name"""
+        self.tools = frozenset(tool.get("name") for tool in catalog.get("tools", []) if isinstance(tool, dict))
+
+    def method_label(self, method: str) -> str:
+        """``method`` as a label value, with tools missing from the catalog folded into one"""
+        if method.startswith(TOOL_CALL_PREFIX) and method[len(TOOL_CALL_PREFIX):] not in self.tools:
+            return TOOL_CALL_PREFIX + "other"
+        return method
+
+    @contextmanager
+    def observe_call(self, method: str) -> Iterator[None]:
+        """Time an MCP call as seen by a route handler"""
+        method = self.method_label(method)
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            yield
+        except BaseException as e:
+            outcome = e.__class__.__name__
+            raise
+        finally:
+            self.mcp_calls.inc(method, outcome)
+            self.mcp_call_duration.observe(time.perf_counter() - start, method)
+
+    @contextmanager
+    def observe_upstream(self, method: str) -> Iterator[None]:
+        """Time one request on the wire to the MCP server"""
+        method = self.method_label(method)
+        self.upstream_in_flight.inc(method)
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            yield
+        except BaseException as e:
+            outcome = e.__class__.__name__
+            raise
+        finally:
+            self.upstream_in_flight.dec(method)
+            self.upstream_requests.inc(method, outcome)
+            self.upstream_duration.observe(time.perf_counter() - start, method)
+
+
+def route_label(scope: Dict[str, Any]) -> str:
+    """Path template of the route a request matches, to keep label cardinality bounded"""
+    app = scope.get("app")
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", scope["path"])
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, in-flight requests and statuses"""
+
+    def __init__(self, app, metrics: ClientMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_label(scope)
+        status = "500"
+        metrics = self.metrics
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        metrics.http_in_flight.inc(method, route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.http_in_flight.dec(method, route)
+            metrics.http_requests.inc(method, route, status)
+            metrics.http_duration.observe(time.perf_counter() - start, method, route)
@@ -1,22 +1,91 @@
-from fastapi import FastAPI, HTTPException, Depends
+import asyncio
+
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-import requests
+import json
+import math
 import os
-from typing import Dict, Any, List, Optional
+import time
+import uuid
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
 
+from admission import AdmissionMiddleware, ClientKeys, ConcurrencyLimiter, OverloadedError, RateLimiter
+from artifacts import ArtifactStore, file_response
+from compression import CompressionMiddleware, ResponseCompressor
+
+from health import HealthProber
+from jobs import SUCCEEDED, Job, JobQueue, MemoryJobStore, QueueFullError, SQLiteJobStore
+from mcp_cache import CATALOG_METHODS, CatalogCache, canonical_json
+from mcp_transport import (
+    CircuitOpenError, InProcessTransport, MCPConnectionError, MCPError, MCPTimeoutError, MCPTransport, method_key,
+)
+from metrics import ClientMetrics, MetricsMiddleware
+from responses import FastJSONResponse, model_response, raw_response
+from resource_store import ResourceStore, etag_for, etag_matches
+from result_store import ResultStore
+from search_index import SearchIndex
+from shared_state import SharedMetrics, SharedRateLimiter, SharedState, SharedToolCache
+from singleflight import SingleFlight
+from tool_cache import ToolResultCache
+from tool_schemas import ToolValidators
+
 # Load environment variables
 load_dotenv()
 
 # Get MCP server URL from environment variables
 MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://localhost:8888/mcp")
+# Comma-separated deployments to balance across; defaults to MCP_SERVER_URL alone
+MCP_SERVER_URLS = [url.strip() for url in os.getenv("MCP_SERVER_URLS", MCP_SERVER_URL).split(",") if url.strip()]
+
+# Calls per upstream JSON-RPC batch, and the most one /tools/batch may carry
+MCP_BATCH_SIZE = int(os.getenv("MCP_BATCH_SIZE", "50"))
+MCP_BATCH_MAX_CALLS = int(os.getenv("MCP_BATCH_MAX_CALLS", "500"))
+
+# Route and upstream latency metrics, served on /metrics
+metrics = ClientMetrics()
+
+# Rate limits, tool cache and metrics shared by the worker processes of
+# serve.py (SHARED_STATE_PATH); kept in memory when running as one process
+shared_state = SharedState.from_env()
+shared_metrics = SharedMetrics.from_env(shared_state, metrics.registry) if shared_state else None
+
+# Shared transport used by every route: pooled HTTP to MCP_SERVER_URLS,
+# MCP_TRANSPORT=websocket or stdio to multiplex every call over one
+# persistent connection, or inprocess to run the Python MCP server inside
+# this process
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "http")
+if MCP_TRANSPORT == "inprocess":
+    from mcp_server import MCPServer
+    mcp = InProcessTransport(MCPServer.from_env(), observer=metrics.observe_upstream)
+elif MCP_TRANSPORT == "websocket":
+    from mcp_multiplex import MultiplexedTransport
+    mcp = MultiplexedTransport.websocket(os.getenv("MCP_WS_URL", MCP_SERVER_URL), observer=metrics.observe_upstream)
+elif MCP_TRANSPORT == "stdio":
+    from mcp_multiplex import MultiplexedTransport
+    mcp = MultiplexedTransport.stdio(os.getenv("MCP_STDIO_COMMAND"), observer=metrics.observe_upstream)
+else:
+    mcp = MCPTransport.from_env(MCP_SERVER_URLS, observer=metrics.observe_upstream)
 
 app = FastAPI(
     title="PandaAGI MCP Client API",
     description="A FastAPI client for interacting with PandaAGI through Model Context Protocol (MCP)",
     version="1.0.0",
+    default_response_class=FastJSONResponse,
+)
+
+# gzip/brotli for JSON and text bodies above COMPRESSION_MIN_BYTES
+compressor = ResponseCompressor.from_env()
+app.add_middleware(CompressionMiddleware, compressor=compressor)
+
+# Per-client token buckets; health and metrics scrapes are never limited.
+# Added before CORS so that rejections still carry CORS headers.
+rate_limiter = SharedRateLimiter.from_env(shared_state) if shared_state else RateLimiter.from_env()
+app.add_middleware(
+    AdmissionMiddleware, limiter=rate_limiter, exempt=("/health", "/metrics"), keys=ClientKeys.from_env()
 )
 
 # Add CORS middleware
@@ -28,6 +97,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
 # Define models for request and response
 class MCPServerInfo(BaseModel):
     name: str
@@ -79,13 +150,43 @@ class ToolContentItem(BaseModel):
 class ToolResponse(BaseModel):
     content: List[ToolContentItem]
 
+class JobRequest(BaseModel):
+    name: str
+    args: Dict[str, Any] = {}
+    priority: int = 0
+
+class BatchToolRequest(BaseModel):
+    calls: List[ToolRequest]
+
+class BatchToolResult(BaseModel):
+    name: str
+    content: Optional[List[ToolContentItem]] = None
+    error: Optional[Dict[str, Any]] = None
+
+class BatchToolResponse(BaseModel):
+    results: List[BatchToolResult]
+
 class ResourceContentItem(BaseModel):
     uri: str
     text: str
+    hash: Optional[str] = None
 
 class ResourceResponse(BaseModel):
     contents: List[ResourceContentItem]
 
+class SearchHit(BaseModel):
+    uri: str
+    name: str
+    section: str
+    anchor: str
+    score: float
+    snippet: str
+
+class SearchResponse(BaseModel):
+    query: str
+    results: List[SearchHit]
+    catalog_version: Optional[str] = None
+
 class ToolInfo(BaseModel):
     name: str
     description: str
@@ -102,27 +203,260 @@ class ToolsListResponse(BaseModel):
 class ResourcesListResponse(BaseModel):
     resources: List[ResourceInfo]
 
+# Read-only methods whose concurrent identical calls share one upstream request
+COALESCED_METHODS = {"mcp/init", "mcp/listTools", "mcp/listResources", "mcp/readResource"}
+singleflight = SingleFlight()
+
+# Global cap on calls in flight upstream, with a bounded wait queue behind it
+upstream_limiter = ConcurrencyLimiter.from_env()
+
+def upstream_error(e: Exception) -> HTTPException:
+    """Map an MCP failure to the HTTP error returned to the caller"""
+    if isinstance(e, MCPError):
+        return HTTPException(status_code=400, detail=e.message)
+    if isinstance(e, (CircuitOpenError, OverloadedError)):
+        return HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+        )
+    if isinstance(e, MCPTimeoutError):
+        return HTTPException(status_code=504, detail=str(e))
+    return HTTPException(status_code=502, detail=f"Failed to connect to MCP server: {str(e)}")
+
+async def admitted_request(method: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Send one call upstream once the in-flight cap lets it through"""
+    async with upstream_limiter.slot():
+        return await mcp.request(method, params)
+
 # Helper function to make MCP requests
-def make_mcp_request(method: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+async def make_mcp_request(method: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
     """Make a request to the MCP server"""
-    payload = {
-        "jsonrpc": "2.0",
-        "method": method,
-        "params": params or {},
-        "id": 1
-    }
-    
     try:
-        response = requests.post(MCP_SERVER_URL, json=payload)
-        response.raise_for_status()
-        
-        result = response.json()
-        if "error" in result:
-            raise HTTPException(status_code=400, detail=result["error"]["message"])
-        
-        return result.get("result", {})
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=500, detail=f"Failed to connect to MCP server: {str(e)}")
+        with metrics.observe_call(method_key(method, params)):
+            if method in COALESCED_METHODS:
+                key = (method, canonical_json(params or {}))
+                result = await singleflight.do(key, lambda: admitted_request(method, params))
+            else:
+                result = await admitted_request(method, params)
+    except (MCPError, MCPConnectionError, OverloadedError) as e:
+        raise upstream_error(e) from e
+    if method == "mcp/listTools":
+        metrics.load_tools(result)
+    return result
+
+async def admitted_batch(calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+    async with upstream_limiter.slot():
+        return await mcp.batch(calls)
+
+async def make_mcp_batch(calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+    """Send calls upstream as JSON-RPC batches; per-call failures are returned as ``MCPError``"""
+    chunks = [calls[i:i + MCP_BATCH_SIZE] for i in range(0, len(calls), MCP_BATCH_SIZE)]
+    try:
+        responses = await asyncio.gather(*(admitted_batch(chunk) for chunk in chunks))
+    except (MCPError, MCPConnectionError, OverloadedError) as e:
+        raise upstream_error(e)
+    return [result for chunk in responses for result in chunk]
+
+# Catalog responses are static per deploy, so serve them from memory
+catalog_cache = CatalogCache(
+    make_mcp_request,
+    ttl=float(os.getenv("CATALOG_CACHE_TTL", "60")),
+    stale_ttl=float(os.getenv("CATALOG_CACHE_STALE_TTL", "300")),
+)
+
+async def get_catalog(method: str, response: Response) -> Dict[str, Any]:
+    """Fetch a catalog method through the cache and tag the response with its version"""
+    result, version = await catalog_cache.get(method)
+    response.headers["X-Catalog-Version"] = version
+    return result
+
+# Opt-in cache for tools whose output depends only on their arguments
+tool_cache = SharedToolCache.from_env(shared_state) if shared_state else ToolResultCache.from_env()
+
+# Optional disk-backed results that survive restarts (RESULT_STORE_PATH)
+result_store = ResultStore.from_env()
+
+def shares_calls(name: str) -> bool:
+    """Whether identical calls to a tool may share one upstream call and its result"""
+    return tool_cache.cacheable(name) or (result_store is not None and result_store.replayable(name))
+
+def tool_call_key(name: str, args: Dict[str, Any]) -> Tuple[str, str, str]:
+    """Single-flight key shared by single and batched calls of a tool"""
+    return "mcp/callTool", name, canonical_json(args)
+
+async def cached_tool_result(name: str, args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """A repeatable call's result from the tool cache, then the result store"""
+    cached = tool_cache.get(name, args)
+    if cached is None and result_store is not None and result_store.replayable(name):
+        cached = await result_store.run(result_store.lookup, name, args)
+        if cached is not None:
+            tool_cache.put(name, args, cached)
+    return cached
+
+def store_tool_result(name: str, args: Dict[str, Any], result: Dict[str, Any]) -> None:
+    """Keep a fresh result for repeat calls"""
+    tool_cache.put(name, args, result)
+    if result_store is not None and result_store.replayable(name):
+        # The caller has its result; the write needn't hold up the response
+        result_store.defer(result_store.put, name, args, result)
+
+async def call_mcp_tool(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Call a tool, answering repeatable calls from the result cache or store"""
+    name, args = params["name"], params.get("args") or {}
+    if not shares_calls(name):
+        # Side effects: every call runs, and the store only keeps the output
+        return await make_mcp_request("mcp/callTool", params)
+
+    cached = await cached_tool_result(name, args)
+    if cached is not None:
+        return cached
+    result = await singleflight.do(tool_call_key(name, args), lambda: make_mcp_request("mcp/callTool", params))
+    store_tool_result(name, args, result)
+    return result
+
+async def record_result(params: Dict[str, Any], result: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """``X-Result-Key`` for fetching a stored result again from ``/results/{key}``
+
+    Replayable results were stored by ``call_mcp_tool``; any other stored
+    tool's result is stored here, under a key of its own for this execution.
+    """
+    name, args = params["name"], params.get("args") or {}
+    if result_store is None or not result_store.stores(name):
+        return None
+    if result_store.replayable(name):
+        key = result_store.key(name, args)
+    else:
+        key = await result_store.run(result_store.put, name, args, result)
+    return {"X-Result-Key": key} if key else None
+
+# Arguments are checked against the listed tool schemas before any upstream call
+TOOL_VALIDATION = os.getenv("TOOL_VALIDATION", "true").lower() in ("1", "true", "yes")
+tool_validators = ToolValidators()
+
+async def load_tool_validators() -> bool:
+    """Compile checks for the current tool catalog; ``False`` when validation can't run"""
+    if not TOOL_VALIDATION:
+        return False
+    try:
+        catalog, version = await catalog_cache.get("mcp/listTools")
+    except HTTPException:
+        # Without a catalog the call goes upstream and reports the failure itself
+        return False
+    tool_validators.load(catalog, version)
+    return True
+
+async def check_tool_args(name: str, args: Dict[str, Any]) -> None:
+    """Reject arguments that don't match the tool's schema with 422, as FastAPI does for bodies"""
+    if await load_tool_validators():
+        errors = tool_validators.validate(name, args, ("body", "args"))
+        if errors:
+            raise HTTPException(status_code=422, detail=errors)
+
+async def run_job(name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+    """Execute a queued tool call"""
+    return await call_mcp_tool({"name": name, "args": args})
+
+def link_job_result(job: Job) -> None:
+    """Let a finished job's output be found by job id after a restart"""
+    if result_store is None or job.status != SUCCEEDED or not result_store.stores(job.name):
+        return
+    if result_store.replayable(job.name):
+        result_store.defer(result_store.link_job, job.id, result_store.key(job.name, job.args))
+    else:
+        # Each run is its own execution, stored under its job id
+        result_store.defer(result_store.put_job, job.id, job.name, job.args, job.result)
+
+# Long-running tool calls go through a bounded worker pool
+JOB_DB_PATH = os.getenv("JOB_DB_PATH")
+# Off when another process already failed the jobs a previous run left running
+JOB_RECOVERY = os.getenv("JOB_RECOVERY", "true").lower() in ("1", "true", "yes")
+job_queue = JobQueue(
+    run_job,
+    store=SQLiteJobStore(JOB_DB_PATH) if JOB_DB_PATH else MemoryJobStore(),
+    workers=int(os.getenv("JOB_WORKERS", "4")),
+    max_queued=int(os.getenv("JOB_QUEUE_MAX", "1000")),
+    on_finish=link_job_result,
+    poll_interval=float(os.getenv("JOB_POLL_INTERVAL", "1")),
+)
+
+# Files agents write to their workspaces, one directory per agent
+artifact_store = ArtifactStore.from_env()
+
+async def submit_job(name: str, args: Dict[str, Any], priority: int = 0) -> Dict[str, Any]:
+    """Queue a tool call and describe the new job"""
+    job_id = uuid.uuid4().hex
+    try:
+        # Agent tasks write to their agent's workspace, served from /artifacts/{agent name}
+        job = await job_queue.submit(name, artifact_store.scoped_args(name, args), priority, id=job_id)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return job.to_dict(include_result=False)
+
+# Resource bodies keyed by content hash, revalidated against the catalog
+resource_store = ResourceStore()
+
+def advertised_hash(catalog: Dict[str, Any], uri: str) -> Optional[str]:
+    """Content hash the server lists for a resource, if it publishes one"""
+    for resource in catalog.get("resources", []):
+        if resource.get("uri") == uri:
+            return (resource.get("metadata") or {}).get("hash")
+    return None
+
+async def load_resource(uri: str) -> Tuple[str, str]:
+    """Return ``(hash, text)`` for a resource, only downloading changed bodies"""
+    stored = resource_store.get(uri)
+    if stored is not None:
+        catalog, _ = await catalog_cache.get("mcp/listResources")
+        if advertised_hash(catalog, uri) == stored[0]:
+            resource_store.stats["hits"] += 1
+            return stored
+
+    params = {"uri": uri}
+    if stored is not None:
+        params["ifNoneMatch"] = stored[0]
+    result = await make_mcp_request("mcp/readResource", params)
+
+    if result.get("notModified") and stored is not None:
+        resource_store.stats["revalidated"] += 1
+        return stored
+
+    contents = result.get("contents") or []
+    if not contents:
+        raise HTTPException(status_code=502, detail="MCP server returned no resource contents")
+    resource_store.stats["fetched"] += 1
+    text = contents[0]["text"]
+    return resource_store.put(uri, text), text
+
+# Upstream health is probed in the background; health routes answer from memory
+health = HealthProber.from_env(lambda: mcp.request("mcp/init"))
+
+@app.on_event("startup")
+async def start_job_queue():
+    """Start the job workers, the health prober, result store upkeep and shared state syncing"""
+    await job_queue.start(recover=JOB_RECOVERY)
+    await health.start()
+    if result_store is not None:
+        await result_store.start()
+    if shared_metrics is not None:
+        await shared_metrics.start()
+    if shared_state is not None:
+        # Shared buckets are synced in the background
+        await rate_limiter.start()
+
+@app.on_event("shutdown")
+async def close_mcp_transport():
+    """Stop background tasks and release pooled upstream connections"""
+    await health.stop()
+    await job_queue.stop()
+    await mcp.aclose()
+    if result_store is not None:
+        await result_store.stop()
+    if shared_metrics is not None:
+        await shared_metrics.stop()
+    if shared_state is not None:
+        await rate_limiter.stop()
+        shared_state.close()
 
 @app.get("/", response_class=HTMLResponse)
 async def root():
@@ -177,16 +511,16 @@ async def root():
     """
 
 @app.get("/server", response_model=MCPInitResponse)
-async def get_server_info():
+async def get_server_info(response: Response):
     """Get information about the PandaAGI MCP server"""
-    result = make_mcp_request("mcp/init")
-    return MCPInitResponse(**result)
+    result = await get_catalog("mcp/init", response)
+    return model_response(MCPInitResponse, result, headers=response.headers)
 
 @app.get("/tools", response_model=ToolsListResponse)
-async def list_tools():
+async def list_tools(response: Response):
     """List all available PandaAGI tools"""
-    result = make_mcp_request("mcp/listTools")
-    return ToolsListResponse(**result)
+    result = await get_catalog("mcp/listTools", response)
+    return model_response(ToolsListResponse, result, headers=response.headers)
 
 @app.post("/agent/create")
 async def create_agent(request: CreateAgentRequest):
@@ -196,12 +530,12 @@ async def create_agent(request: CreateAgentRequest):
         "args": {
             "name": request.name,
             "environment": request.environment,
-            "workspace_path": request.workspace_path
+            "workspace_path": artifact_store.workspace_for(request.workspace_path, request.name)
         }
     }
     
-    result = make_mcp_request("mcp/callTool", params)
-    return {"status": "success", "result": result}
+    result = await make_mcp_request("mcp/callTool", params)
+    return raw_response({"status": "success", "result": result})
 
 @app.post("/agent/task")
 async def run_agent_task(request: RunTaskRequest):
@@ -212,12 +546,81 @@ async def run_agent_task(request: RunTaskRequest):
             "task": request.task,
             "agent_name": request.agent_name,
             "environment": request.environment,
-            "workspace_path": request.workspace_path
+            "workspace_path": artifact_store.workspace_for(request.workspace_path, request.agent_name)
         }
     }
     
-    result = make_mcp_request("mcp/callTool", params)
-    return {"status": "success", "result": result}
+    result = await call_mcp_tool(params)
+    return raw_response({"status": "success", "result": result}, headers=await record_result(params, result))
+
+def format_stream_event(event: str, data: Dict[str, Any], fmt: str) -> str:
+    """Encode one stream event as an SSE frame or an NDJSON line"""
+    if fmt == "ndjson":
+        return json.dumps({"event": event, **data}) + "\n"
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def relay_tool_stream(params: Dict[str, Any], fmt: str) -> AsyncIterator[str]:
+    """Relay upstream tool output chunk by chunk without buffering it"""
+    chunks = 0
+    try:
+        async with upstream_limiter.slot():
+            async for message in mcp.stream("mcp/callTool", {**params, "stream": True}):
+                if "result" in message:
+                    # A non-streaming server sends the whole result at once
+                    for item in message["result"].get("content", []):
+                        chunks += 1
+                        yield format_stream_event("chunk", {"content": [item]}, fmt)
+                    yield format_stream_event("done", {"chunks": chunks}, fmt)
+                    return
+                progress = message.get("params", {})
+                chunks += 1
+                yield format_stream_event("chunk", {
+                    "content": progress.get("content", []),
+                    "progress": progress.get("progress"),
+                    "total": progress.get("total"),
+                }, fmt)
+    except OverloadedError as e:
+        yield format_stream_event("error", {"message": str(e)}, fmt)
+    except MCPError as e:
+        yield format_stream_event("error", {"code": e.code, "message": e.message}, fmt)
+    except MCPConnectionError as e:
+        yield format_stream_event("error", {"message": f"Failed to connect to MCP server: {str(e)}"}, fmt)
+
+@app.post("/agent/task/stream")
+async def stream_agent_task(request: RunTaskRequest, format: str = "sse"):
+    """Execute a task and stream its output as Server-Sent Events or NDJSON"""
+    if format not in ("sse", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
+    # Fail fast with a proper status before the streaming response has started
+    if mcp.breaker is not None and mcp.breaker.retry_after() > 0:
+        raise upstream_error(CircuitOpenError(mcp.breaker.retry_after()))
+    if upstream_limiter.full():
+        raise upstream_error(OverloadedError("Too many upstream requests queued", upstream_limiter.retry_after()))
+    params = {
+        "name": "run-agent-task",
+        "args": {
+            "task": request.task,
+            "agent_name": request.agent_name,
+            "environment": request.environment,
+            "workspace_path": artifact_store.workspace_for(request.workspace_path, request.agent_name)
+        }
+    }
+
+    return StreamingResponse(
+        relay_tool_stream(params, format),
+        media_type="text/event-stream" if format == "sse" else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/agent/task/submit", status_code=202)
+async def submit_agent_task(request: RunTaskRequest, priority: int = 0):
+    """Queue a task for a PandaAGI agent and return its job id"""
+    return await submit_job("run-agent-task", {
+        "task": request.task,
+        "agent_name": request.agent_name,
+        "environment": request.environment,
+        "workspace_path": request.workspace_path
+    }, priority)
 
 @app.post("/analysis/report")
 async def generate_analysis_report(request: GenerateReportRequest):
@@ -231,8 +634,17 @@ async def generate_analysis_report(request: GenerateReportRequest):
         }
     }
     
-    result = make_mcp_request("mcp/callTool", params)
-    return {"status": "success", "result": result}
+    result = await call_mcp_tool(params)
+    return raw_response({"status": "success", "result": result}, headers=await record_result(params, result))
+
+@app.post("/analysis/report/submit", status_code=202)
+async def submit_analysis_report(request: GenerateReportRequest, priority: int = 0):
+    """Queue an analysis report and return its job id"""
+    return await submit_job("generate-analysis-report", {
+        "topic": request.topic,
+        "data_sources": request.data_sources,
+        "report_type": request.report_type
+    }, priority)
 
 @app.post("/dashboard/create")
 async def create_dashboard(request: CreateDashboardRequest):
@@ -246,8 +658,8 @@ async def create_dashboard(request: CreateDashboardRequest):
         }
     }
     
-    result = make_mcp_request("mcp/callTool", params)
-    return {"status": "success", "result": result}
+    result = await call_mcp_tool(params)
+    return raw_response({"status": "success", "result": result}, headers=await record_result(params, result))
 
 @app.post("/webapp/deploy")
 async def deploy_web_app(request: DeployWebAppRequest):
@@ -261,43 +673,372 @@ async def deploy_web_app(request: DeployWebAppRequest):
         }
     }
     
-    result = make_mcp_request("mcp/callTool", params)
-    return {"status": "success", "result": result}
+    result = await call_mcp_tool(params)
+    return raw_response({"status": "success", "result": result})
 
 @app.post("/tools/call", response_model=ToolResponse)
 async def call_tool(request: ToolRequest):
     """Call any PandaAGI tool with custom parameters"""
+    await check_tool_args(request.name, request.args)
     params = {
         "name": request.name,
         "args": request.args
     }
     
-    result = make_mcp_request("mcp/callTool", params)
-    return ToolResponse(**result)
+    result = await call_mcp_tool(params)
+    return model_response(ToolResponse, result)
+
+@app.post("/tools/batch", response_model=BatchToolResponse)
+async def call_tools_batch(request: BatchToolRequest):
+    """Call many PandaAGI tools in as few upstream requests as possible"""
+    if not request.calls:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one call")
+    if len(request.calls) > MCP_BATCH_MAX_CALLS:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds {MCP_BATCH_MAX_CALLS} calls")
+
+    # Fail invalid calls in place and answer cached ones locally, as single
+    # calls are answered
+    results: List[Any] = [None] * len(request.calls)
+    if await load_tool_validators():
+        for i, call in enumerate(request.calls):
+            errors = tool_validators.validate(call.name, call.args, ("body", "calls", i, "args"))
+            if errors:
+                results[i] = MCPError(-32602, "Invalid params", errors)
+    for i, call in enumerate(request.calls):
+        if results[i] is None and shares_calls(call.name):
+            results[i] = await cached_tool_result(call.name, call.args)
+
+    # Repeatable calls join an identical call already in flight, from this
+    # batch or any other request; only the rest go upstream
+    loop = asyncio.get_running_loop()
+    sent: List[int] = []
+    owned: Dict[int, asyncio.Future] = {}
+    joined: Dict[int, asyncio.Future] = {}
+    for i, call in enumerate(request.calls):
+        if results[i] is not None:
+            continue
+        if not shares_calls(call.name):
+            sent.append(i)
+            continue
+        future = loop.create_future()
+        shared = singleflight.share(tool_call_key(call.name, call.args), future)
+        if shared is future:
+            sent.append(i)
+            owned[i] = future
+        else:
+            joined[i] = shared
+
+    async def send_misses() -> None:
+        calls = [("mcp/callTool", {"name": request.calls[i].name, "args": request.calls[i].args}) for i in sent]
+        try:
+            responses = await make_mcp_batch(calls)
+        except Exception as e:
+            # A failed batch fails every call it led, so no waiter is left hanging
+            for future in owned.values():
+                future.set_exception(e)
+            raise
+        for i, result in zip(sent, responses):
+            results[i] = result
+            if isinstance(result, MCPError):
+                if i in owned:
+                    # Waiters on the key see the failure a single call would raise
+                    error = upstream_error(result)
+                    error.__cause__ = result
+                    owned[i].set_exception(error)
+                continue
+            store_tool_result(request.calls[i].name, request.calls[i].args, result)
+            if i in owned:
+                owned[i].set_result(result)
+
+    if sent:
+        # Its own task, so a caller going away doesn't cancel calls others wait on
+        await asyncio.shield(asyncio.ensure_future(send_misses()))
+    for i, future in joined.items():
+        try:
+            results[i] = await asyncio.shield(future)
+        except HTTPException as e:
+            # Per-call failures stay in place; a failed upstream fails the batch
+            if not isinstance(e.__cause__, MCPError):
+                raise
+            results[i] = e.__cause__
+
+    items = []
+    for call, result in zip(request.calls, results):
+        if isinstance(result, MCPError):
+            error = {"code": result.code, "message": result.message}
+            if result.data is not None:
+                error["data"] = result.data
+            items.append({"name": call.name, "error": error})
+        else:
+            items.append({"name": call.name, "content": result.get("content", [])})
+    return model_response(BatchToolResponse, {"results": items})
+
+@app.post("/jobs", status_code=202)
+async def submit_tool_job(request: JobRequest):
+    """Queue any PandaAGI tool call; higher priorities run first"""
+    await check_tool_args(request.name, request.args)
+    return await submit_job(request.name, request.args, request.priority)
+
+@app.get("/jobs")
+async def list_jobs(status: Optional[str] = None, limit: int = 100):
+    """List recent jobs, optionally filtered by status"""
+    jobs = await job_queue.list(status=status, limit=limit)
+    return {"jobs": [job.to_dict(include_result=False) for job in jobs], "queue": job_queue.describe()}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Poll a job's status and result"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        # The job record may be gone with a restart while its output was kept
+        record = await result_store.run(result_store.get_job, job_id) if result_store is not None else None
+        if record is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return raw_response({
+            "id": job_id,
+            "name": record["name"],
+            "args": record["args"],
+            "status": SUCCEEDED,
+            "finished_at": record["created_at"],
+            "result": record["result"],
+            "result_key": record["key"],
+        })
+    return raw_response(job.to_dict())
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    job = await job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict(include_result=False)
+
+@app.get("/results/{key}")
+async def get_result(key: str):
+    """A stored tool result by the request key from ``X-Result-Key``"""
+    record = await result_store.run(result_store.get, key) if result_store is not None else None
+    if record is None:
+        raise HTTPException(status_code=404, detail="Result not found")
+    return raw_response(record)
+
+@app.api_route("/artifacts/{scope}", methods=["GET", "HEAD"])
+@app.api_route("/artifacts/{scope}/{path:path}", methods=["GET", "HEAD"])
+async def get_artifact(scope: str, request: Request, path: str = ""):
+    """Download a workspace file, with Range and conditional requests, or list a directory"""
+    try:
+        target = await run_in_threadpool(artifact_store.resolve, scope, path)
+        if await run_in_threadpool(os.path.isdir, target):
+            return raw_response(await run_in_threadpool(artifact_store.listing, scope, path, target))
+        return await file_response(target, request.headers, request.method)
+    except (FileNotFoundError, NotADirectoryError, PermissionError):
+        raise HTTPException(status_code=404, detail="Artifact not found")
 
 @app.get("/resources", response_model=ResourcesListResponse)
-async def list_resources():
+async def list_resources(response: Response):
     """List all available PandaAGI documentation resources"""
-    result = make_mcp_request("mcp/listResources")
-    return ResourcesListResponse(**result)
+    result = await get_catalog("mcp/listResources", response)
+    return model_response(ResourcesListResponse, result, headers=response.headers)
 
 @app.post("/resources/read", response_model=ResourceResponse)
-async def read_resource(request: ResourceRequest):
+async def read_resource(
+    request: ResourceRequest,
+    if_none_match: Optional[str] = Header(None),
+):
     """Read a specific PandaAGI documentation resource"""
-    params = {"uri": request.uri}
-    result = make_mcp_request("mcp/readResource", params)
-    return ResourceResponse(**result)
+    hash_, text = await load_resource(request.uri)
+    headers = {"ETag": etag_for(hash_), "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, hash_):
+        return Response(status_code=304, headers=headers)
+
+    return model_response(
+        ResourceResponse, {"contents": [{"uri": request.uri, "text": text, "hash": hash_}]}, headers=headers
+    )
+
+# Inverted index over the resources, refreshed per changed content hash
+search_index = SearchIndex()
 
-# Health check endpoint
+async def sync_search_index() -> str:
+    """Bring the index up to date with the catalog and return the catalog version"""
+    catalog, version = await catalog_cache.get("mcp/listResources")
+    if version == search_index.catalog_version:
+        return version
+
+    resources = catalog.get("resources", [])
+    for resource in resources:
+        uri = resource.get("uri")
+        advertised = (resource.get("metadata") or {}).get("hash")
+        # Only documents whose hash moved are read and re-indexed
+        if uri and (advertised is None or advertised != search_index.hash_for(uri)):
+            hash_, text = await load_resource(uri)
+            search_index.update(uri, hash_, text, resource.get("name"))
+    listed = {resource.get("uri") for resource in resources}
+    for uri in search_index.uris():
+        if uri not in listed:
+            search_index.remove(uri)
+    search_index.catalog_version = version
+    return version
+
+@app.get("/resources/search", response_model=SearchResponse)
+async def search_resources(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50)):
+    """Full-text search over the documentation resources, ranked by section"""
+    # Concurrent queries after a catalog change share one index refresh
+    version = await singleflight.do(("search-index",), sync_search_index)
+    return model_response(
+        SearchResponse, {"query": q, "results": search_index.search(q, limit), "catalog_version": version}
+    )
+
+def collect_cache_metrics():
+    """Expose cache, coalescing and job queue counters alongside the request metrics"""
+    catalog = catalog_cache.stats
+    yield "mcp_catalog_cache_total", "counter", "Catalog cache lookups by result", [
+        ({"result": result}, catalog[result]) for result in ("hits", "stale_hits", "misses")
+    ]
+    yield "mcp_resource_store_total", "counter", "Resource reads by how they were answered", [
+        ({"result": result}, value) for result, value in resource_store.stats.items()
+    ]
+    yield "mcp_singleflight_total", "counter", "Coalesced calls by role", [
+        ({"role": "leader"}, singleflight.stats["leaders"]),
+        ({"role": "deduplicated"}, singleflight.stats["deduplicated"]),
+    ]
+    yield "mcp_tool_cache_total", "counter", "Tool result cache lookups and evictions", [
+        ({"result": result}, value) for result, value in tool_cache.stats.items()
+    ]
+    yield "mcp_tool_cache_bytes", "gauge", "Bytes held by the tool result cache", [({}, tool_cache.bytes)]
+    if result_store is not None:
+        yield "mcp_result_store_total", "counter", "Result store lookups, writes and maintenance", [
+            ({"event": event}, value) for event, value in result_store.stats.items()
+        ]
+        yield "mcp_result_store_bytes", "gauge", "Bytes of results held on disk", [({}, result_store.bytes)]
+    yield "mcp_upstream_retries_total", "counter", "Idempotent calls sent again after a failure", [
+        ({}, mcp.stats["retries"])
+    ]
+    if mcp.breaker is not None:
+        yield "mcp_circuit_open", "gauge", "1 while the circuit breaker fails calls fast", [
+            ({}, 1 if mcp.breaker.state == "open" else 0)
+        ]
+        yield "mcp_circuit_rejected_total", "counter", "Calls rejected by the open circuit breaker", [
+            ({}, mcp.breaker.stats["rejected"])
+        ]
+    if "connects" in mcp.stats:
+        yield "mcp_connection_events_total", "counter", "Persistent upstream connection events", [
+            ({"event": event}, mcp.stats[event]) for event in ("connects", "disconnects", "orphaned")
+        ]
+    upstreams = getattr(mcp, "pool", None)
+    if upstreams is not None:
+        yield "mcp_upstream_outstanding", "gauge", "In-flight calls per upstream", [
+            ({"upstream": u.url}, u.outstanding) for u in upstreams.upstreams
+        ]
+        yield "mcp_upstream_ewma_seconds", "gauge", "Smoothed latency per upstream", [
+            ({"upstream": u.url}, u.ewma) for u in upstreams.upstreams
+        ]
+        yield "mcp_upstream_available", "gauge", "1 unless the upstream is ejected", [
+            ({"upstream": u.url}, 1 if u.available(time.monotonic()) else 0) for u in upstreams.upstreams
+        ]
+        yield "mcp_upstream_hedges_total", "counter", "Hedged duplicates sent per upstream", [
+            ({"upstream": u.url}, u.stats["hedges"]) for u in upstreams.upstreams
+        ]
+    limiter = upstream_limiter.describe()
+    yield "mcp_upstream_admission", "gauge", "Upstream calls holding or waiting for a slot", [
+        ({"state": "in_flight"}, limiter["in_flight"]),
+        ({"state": "queued"}, limiter["queued"]),
+    ]
+    yield "mcp_upstream_admission_total", "counter", "Upstream slot requests by outcome", [
+        ({"result": result}, limiter[result]) for result in ("admitted", "waited", "rejected", "timed_out")
+    ]
+    yield "http_rate_limited_total", "counter", "Requests answered 429 by the per-client rate limit", [
+        ({}, rate_limiter.stats["limited"])
+    ]
+    compression = compressor.describe()
+    yield "http_response_compression_total", "counter", "Response bodies compressed, or skipped as too small", [
+        ({"result": result}, compression[result]) for result in ("compressed", "cache_hits", "too_small")
+    ]
+    yield "http_response_compression_bytes_total", "counter", "Body bytes before and after compression", [
+        ({"stage": "in"}, compression["bytes_in"]),
+        ({"stage": "out"}, compression["bytes_out"]),
+    ]
+    yield "mcp_tool_validation_total", "counter", "Tool calls checked against the catalog schemas", [
+        ({"result": result}, tool_validators.stats[result]) for result in ("validated", "rejected", "unknown")
+    ]
+    index = search_index.describe()
+    yield "mcp_search_index_sections", "gauge", "Resource sections in the search index", [({}, index["sections"])]
+    yield "mcp_search_index_total", "counter", "Search index updates and queries", [
+        ({"event": event}, value) for event, value in index["stats"].items()
+    ]
+    yield "mcp_upstream_ready", "gauge", "1 while the last background health probe succeeded", [
+        ({}, 1 if health.ready() else 0)
+    ]
+    if health.latency is not None:
+        yield "mcp_health_probe_latency_seconds", "gauge", "Latency of the last health probe", [
+            ({}, health.latency)
+        ]
+    queue = job_queue.describe()
+    yield "mcp_jobs", "gauge", "Jobs by queue state", [
+        ({"state": "running"}, queue["running"]),
+        ({"state": "queued"}, queue["queued"]),
+    ]
+
+metrics.registry.collector(collect_cache_metrics)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics for routes, upstream MCP calls and caches, across all workers"""
+    text = shared_metrics.render() if shared_metrics is not None else metrics.registry.render()
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Report hit rates and cached catalog versions"""
+    return {
+        "catalog": catalog_cache.describe(),
+        "resources": resource_store.describe(),
+        "singleflight": singleflight.describe(),
+        "tools": tool_cache.describe(),
+        "compression": compressor.describe(),
+        "search": search_index.describe(),
+        "validation": tool_validators.describe(),
+        "results": await result_store.run(result_store.describe) if result_store is not None else None,
+    }
+
+@app.post("/cache/invalidate")
+async def invalidate_cache(method: Optional[str] = None):
+    """Drop cached catalogs and tool results so the next request refetches them"""
+    methods = CATALOG_METHODS + ("mcp/callTool",)
+    if method is not None and method not in methods:
+        raise HTTPException(status_code=400, detail=f"Unknown cached method: {method}")
+    if method in (None, "mcp/callTool"):
+        tool_cache.clear()
+        if result_store is not None:
+            # Outputs stay readable by key and job id; they just aren't replayed
+            await result_store.run(result_store.invalidate)
+    if method != "mcp/callTool":
+        catalog_cache.invalidate(method)
+    return {"status": "invalidated", "methods": [method] if method else list(methods)}
+
+# Health check endpoints
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    try:
-        # Test connection to MCP server
-        make_mcp_request("mcp/init")
-        return {"status": "healthy", "mcp_server": "connected"}
-    except Exception as e:
-        return {"status": "unhealthy", "error": str(e)}
+    """Upstream status from the last background probe"""
+    return {
+        "status": "healthy" if health.ready() else "unhealthy",
+        "mcp_server": "connected" if health.ready() else "unreachable",
+        "probe": health.describe(),
+        "circuit": mcp.breaker.state if mcp.breaker is not None else None,
+        "upstreams": mcp.describe()["upstreams"],
+        "admission": {"upstream": upstream_limiter.describe(), "rate_limit": rate_limiter.describe()},
+    }
+
+@app.get("/health/live")
+async def liveness():
+    """The process is up and serving requests"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness(response: Response):
+    """Ready while the last upstream probe succeeded recently; 503 otherwise"""
+    if not health.ready():
+        response.status_code = 503
+        return {"status": "not_ready", "probe": health.describe()}
+    return {"status": "ready", "probe": health.describe()}
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,107 @@
+"""
+Retry and circuit breaker policies for upstream MCP calls.
+
+``RetryPolicy`` spaces out retries of idempotent calls with full-jitter
+exponential backoff so clients recovering from the same incident don't
+retry in lockstep. ``CircuitBreaker`` counts consecutive upstream failures
+and, once the threshold is reached, fails calls immediately for a cool-down
+period before letting a few trial calls through to probe for recovery.
+"""
+
+import os
+import random
+import time
+from typing import Any, Dict
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class RetryPolicy:
+    """Bounded retries with full-jitter exponential backoff"""
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.1, max_delay: float = 2.0):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls(
+            attempts=int(os.getenv("MCP_RETRY_ATTEMPTS", "3")),
+            base_delay=float(os.getenv("MCP_RETRY_BASE_DELAY", "0.1")),
+            max_delay=float(os.getenv("MCP_RETRY_MAX_DELAY", "2")),
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number ``attempt`` (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """Closed -> open after ``failure_threshold`` consecutive failures, half-open after ``reset_timeout``"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, half_open_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._half_opened_at = 0.0
+        self._trials = 0
+        self.stats = {"rejected": 0, "opened": 0}
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreaker":
+        return cls(
+            failure_threshold=int(os.getenv("MCP_BREAKER_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("MCP_BREAKER_RESET", "30")),
+            half_open_calls=int(os.getenv("MCP_BREAKER_HALF_OPEN_CALLS", "1")),
+        )
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; counts rejections"""
+        now = time.monotonic()
+        if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+        # Also re-arm trials whose outcome was never recorded (e.g. cancelled calls)
+        if self.state == HALF_OPEN and now - self._half_opened_at >= self.reset_timeout:
+            self._half_opened_at = now
+            self._trials = 0
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and self._trials < self.half_open_calls:
+            self._trials += 1
+            return True
+        self.stats["rejected"] += 1
+        return False
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets trial calls through again"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.stats["opened"] += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout": self.reset_timeout,
+            "retry_after": round(self.retry_after(), 3),
+            "stats": dict(self.stats),
+        }
@@ -0,0 +1,80 @@
+"""
+Content-addressed store for MCP resource bodies.
+
+Documents are kept once per SHA-256 of their text and looked up by URI, so
+the client can answer conditional requests and revalidate upstream by hash
+instead of re-downloading unchanged documents.
+"""
+
+import hashlib
+from typing import Dict, Optional, Tuple
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 hex digest of a resource body, matching the server's hashes"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def etag_for(hash_: str) -> str:
+    """Strong ETag for a content hash"""
+    return f'"{hash_}"'
+
+
+def etag_matches(if_none_match: Optional[str], hash_: str) -> bool:
+    """Whether an ``If-None-Match`` header covers the given content hash"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        # If-None-Match uses weak comparison, so W/ prefixes are ignored
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag.strip('"') == hash_:
+            return True
+    return False
+
+
+class ResourceStore:
+    """Maps resource URIs to content hashes and hashes to bodies"""
+
+    def __init__(self):
+        self._bodies: Dict[str, str] = {}
+        self._uris: Dict[str, str] = {}
+        self.stats = {"hits": 0, "revalidated": 0, "fetched": 0}
+
+    def get(self, uri: str) -> Optional[Tuple[str, str]]:
+        """Return ``(hash, text)`` for a URI if its body is stored"""
+        hash_ = self._uris.get(uri)
+        if hash_ is None:
+            return None
+        return hash_, self._bodies[hash_]
+
+    def hash_for(self, uri: str) -> Optional[str]:
+        """Stored content hash for a URI"""
+        return self._uris.get(uri)
+
+    def put(self, uri: str, text: str) -> str:
+        """Store a body for a URI and return its content hash"""
+        hash_ = content_hash(text)
+        previous = self._uris.get(uri)
+        self._bodies[hash_] = text
+        self._uris[uri] = hash_
+        if previous and previous != hash_ and previous not in self._uris.values():
+            del self._bodies[previous]
+        return hash_
+
+    def discard(self, uri: str) -> None:
+        """Forget a URI and drop its body if nothing else references it"""
+        hash_ = self._uris.pop(uri, None)
+        if hash_ and hash_ not in self._uris.values():
+            self._bodies.pop(hash_, None)
+
+    def describe(self) -> Dict[str, object]:
+        return {
+            "documents": len(self._uris),
+            "bodies": len(self._bodies),
+            "bytes": sum(len(text.encode("utf-8")) for text in self._bodies.values()),
+            "stats": dict(self.stats),
+        }
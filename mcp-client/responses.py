@@ -0,0 +1,73 @@
+"""
+Fast JSON response path for the FastAPI routes.
+
+Returning a model instance under ``response_model`` makes FastAPI validate
+the data again, convert it with ``jsonable_encoder`` and encode it with
+``json.dumps``. Returning a ``Response`` skips all of that, so routes here
+validate upstream payloads once and let pydantic-core serialize the model
+straight to bytes or, for pass-through payloads that need no model, encode
+the dict with orjson when it is installed.
+"""
+
+import functools
+import json
+from typing import Any, Dict, Mapping, Optional, Type
+
+from pydantic import BaseModel, TypeAdapter
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Encode JSON-compatible data compactly as UTF-8"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response encoded with orjson, or the stdlib when it is missing"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@functools.lru_cache(maxsize=None)
+def _adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def model_response(
+    model: Type[BaseModel],
+    data: Any,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """Validate ``data`` against ``model`` once and serialize it in pydantic-core"""
+    adapter = _adapter(model)
+    # dump_json writes bytes directly; model_dump_json would build a str first
+    body = adapter.dump_json(adapter.validate_python(data))
+    return Response(body, status_code=status_code, headers=_headers(headers), media_type="application/json")
+
+
+def raw_response(
+    data: Any,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> FastJSONResponse:
+    """Pass a payload through without any model validation"""
+    return FastJSONResponse(data, status_code=status_code, headers=_headers(headers))
+
+
+def _headers(headers: Optional[Mapping[str, str]]) -> Optional[Dict[str, str]]:
+    # Headers set on an injected ``Response`` are dropped when a route returns
+    # its own response, so routes hand them over explicitly
+    if headers is None:
+        return None
+    return {key: value for key, value in headers.items() if key.lower() != "content-length"}
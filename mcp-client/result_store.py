@@ -0,0 +1,380 @@
+"""
+Disk-backed store of tool results that survives restarts.
+
+Results are kept in SQLite, keyed by a hash of the canonical tool call and
+optionally linked to the job that produced them, so a warm restart or a
+rolling deploy can still answer for work already done. Deterministic tools
+are answered from the store on a repeat call and keyed by their arguments.
+Results of tools with side effects, such as agent tasks, get a key of their
+own per execution, so a second run with the same arguments never overwrites
+the first; they are only kept to be looked up again by key or job id.
+
+The store is bounded by bytes: the least recently read results go first.
+Read times are kept in memory and written in bulk, so a hit costs no write.
+Expired and evicted rows leave free pages behind, which a background task
+hands back to the filesystem by incremental vacuuming once they make up a
+good part of the file. From async code every call goes through ``run`` or
+``defer``, which use the store's own database thread.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, Optional, TypeVar
+
+from db_thread import DatabaseThread
+from mcp_cache import canonical_json
+from tool_cache import NON_IDEMPOTENT_TOOLS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORED_TOOLS = ("generate-analysis-report", "create-dashboard", "run-agent-task")
+
+# Compact once free pages are at least this share of the database file
+COMPACT_FREE_RATIO = 0.25
+
+T = TypeVar("T")
+
+
+class ResultStore:
+    """SQLite store of tool results, looked up by request key or job id"""
+
+    def __init__(
+        self,
+        path: str,
+        tools: Iterable[str] = DEFAULT_STORED_TOOLS,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl: float = 7 * 24 * 3600,
+        maintenance_interval: float = 30.0,
+    ):
+        self.path = path
+        self.tools = frozenset(tools)
+        self.max_bytes = max_bytes
+        # 0 keeps results until they are evicted for space
+        self.ttl = ttl
+        self.maintenance_interval = maintenance_interval
+        # Read times not yet written: key -> accessed_at
+        self._touched: Dict[str, float] = {}
+        self._thread = DatabaseThread("result-store")
+        self._task: Optional[asyncio.Task] = None
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        # Must be set before the first table exists to take effect
+        self._db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                args TEXT NOT NULL,
+                result TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at);
+            CREATE TABLE IF NOT EXISTS job_results (
+                job_id TEXT PRIMARY KEY,
+                key TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS settings (
+                name TEXT PRIMARY KEY,
+                value REAL NOT NULL
+            );
+            """
+        )
+        self._db.commit()
+        self.bytes = self._total_bytes()
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evictions": 0, "expired": 0, "compactions": 0, "errors": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["ResultStore"]:
+        """Store at ``RESULT_STORE_PATH``, or ``None`` when it isn't set"""
+        path = os.getenv("RESULT_STORE_PATH")
+        if not path:
+            return None
+        tools = os.getenv("RESULT_STORE_TOOLS", ",".join(DEFAULT_STORED_TOOLS))
+        return cls(
+            path,
+            tools=[tool.strip() for tool in tools.split(",") if tool.strip()],
+            max_bytes=int(os.getenv("RESULT_STORE_MAX_BYTES", str(256 * 1024 * 1024))),
+            ttl=float(os.getenv("RESULT_STORE_TTL", str(7 * 24 * 3600))),
+            maintenance_interval=float(os.getenv("RESULT_STORE_MAINTENANCE_INTERVAL", "30")),
+        )
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Call one of the store's methods on its database thread and wait for it"""
+        return await self._thread.run(fn, *args)
+
+    def defer(self, fn: Callable[..., Any], *args: Any) -> None:
+        """Queue a write on the database thread without waiting for it"""
+        self._thread.defer(fn, *args)
+
+    async def start(self) -> None:
+        """Expire, evict and compact in the background every ``maintenance_interval`` seconds"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._maintain_forever())
+
+    async def stop(self) -> None:
+        """Stop maintenance, write pending read times and close the database"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.run(self.close)
+        self._thread.close()
+
+    async def _maintain_forever(self) -> None:
+        while True:
+            await self.run(self.maintain)
+            await asyncio.sleep(self.maintenance_interval)
+
+    @staticmethod
+    def key(name: str, args: Dict[str, Any]) -> str:
+        """Request key of a tool call: a hash of its canonical JSON"""
+        return hashlib.sha256(canonical_json([name, args or {}]).encode("utf-8")).hexdigest()[:32]
+
+    def stores(self, name: str) -> bool:
+        return name in self.tools
+
+    def replayable(self, name: str) -> bool:
+        """Whether a repeat call may be answered from the store instead of running again"""
+        return name in self.tools and name not in NON_IDEMPOTENT_TOOLS
+
+    def lookup(self, name: str, args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Stored result of a replayable call, or ``None``"""
+        if not self.replayable(name):
+            return None
+        record = self.get(self.key(name, args), replay=True)
+        if record is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return record["result"]
+
+    def get(self, key: str, replay: bool = False) -> Optional[Dict[str, Any]]:
+        """The stored record for a result key: tool name, args, result and timestamps
+
+        With ``replay``, results stored before the last ``invalidate()`` are
+        skipped.
+        """
+        query = "SELECT key, name, args, result, created_at FROM results WHERE key = ?"
+        if replay:
+            query += " AND created_at > (SELECT COALESCE(MAX(value), 0) FROM settings WHERE name = 'replay_after')"
+        try:
+            row = self._db.execute(query, (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl and row[4] + self.ttl <= time.time():
+                self._delete(key)
+                self._db.commit()
+                self.stats["expired"] += 1
+                return None
+        except sqlite3.Error as e:
+            self._failed("read", e)
+            return None
+        self._touched[key] = time.time()
+        key, name, args, result, created_at = row
+        return {"key": key, "name": name, "args": json.loads(args), "result": json.loads(result), "created_at": created_at}
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The stored record of the result a job produced"""
+        try:
+            row = self._db.execute("SELECT key FROM job_results WHERE job_id = ?", (job_id,)).fetchone()
+        except sqlite3.Error as e:
+            self._failed("read", e)
+            return None
+        return self.get(row[0]) if row else None
+
+    def put(
+        self, name: str, args: Dict[str, Any], result: Dict[str, Any], key: Optional[str] = None
+    ) -> Optional[str]:
+        """Store a result, evicting old ones past the byte budget; returns its key
+
+        Replayable calls are keyed by their arguments. Any other call is one
+        execution, stored under ``key`` or a fresh id. A failure to write is
+        logged and otherwise ignored, since the result was already delivered.
+        """
+        if not self.stores(name):
+            return None
+        if key is None:
+            key = self.key(name, args) if self.replayable(name) else uuid.uuid4().hex
+        body = json.dumps(result, ensure_ascii=False)
+        size = len(body.encode("utf-8"))
+        if size > self.max_bytes:
+            return None
+        now = time.time()
+        try:
+            previous = self._db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, name, canonical_json(args or {}), body, size, now, now),
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            self._failed("write", e)
+            return None
+        self.bytes += size - (previous[0] if previous else 0)
+        self.stats["stored"] += 1
+        if self.bytes > self.max_bytes:
+            self.evict()
+        return key
+
+    def put_job(self, job_id: str, name: str, args: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """Store one execution's result under its job id and link the job to it"""
+        if self.put(name, args, result, key=job_id):
+            self.link_job(job_id, job_id)
+
+    def link_job(self, job_id: str, key: str) -> None:
+        """Record that a job produced the result stored under ``key``"""
+        try:
+            self._db.execute("INSERT OR REPLACE INTO job_results VALUES (?, ?)", (job_id, key))
+            self._db.commit()
+        except sqlite3.Error as e:
+            self._failed("write", e)
+
+    def evict(self) -> None:
+        """Drop least recently read results until the store is within its budget"""
+        self.flush()
+        try:
+            # Other processes may share the file, so trust the database's total
+            self.bytes = self._total_bytes()
+            excess = self.bytes - self.max_bytes
+            if excess <= 0:
+                return
+            evicted = freed = 0
+            for key, size in self._db.execute("SELECT key, size FROM results ORDER BY accessed_at").fetchall():
+                if freed >= excess:
+                    break
+                self._delete(key)
+                evicted += 1
+                freed += size
+            self._db.commit()
+        except sqlite3.Error as e:
+            self._failed("evict", e)
+            return
+        self.bytes -= freed
+        self.stats["evictions"] += evicted
+
+    def flush(self) -> None:
+        """Write the read times recorded since the last flush in one transaction"""
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        try:
+            self._db.executemany(
+                "UPDATE results SET accessed_at = ? WHERE key = ?", [(at, key) for key, at in touched.items()]
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            self._failed("flush", e)
+
+    def maintain(self) -> None:
+        """Periodic upkeep: write read times, drop expired results, compact if worthwhile"""
+        self.flush()
+        self.expire()
+        if self.bytes > self.max_bytes:
+            self.evict()
+        self.compact(force=False)
+
+    def expire(self) -> int:
+        """Delete results older than the TTL; returns how many"""
+        if not self.ttl:
+            return 0
+        try:
+            cursor = self._db.execute("DELETE FROM results WHERE created_at <= ?", (time.time() - self.ttl,))
+            self._db.commit()
+        except sqlite3.Error as e:
+            self._failed("expire", e)
+            return 0
+        if cursor.rowcount:
+            self.stats["expired"] += cursor.rowcount
+            self.bytes = self._total_bytes()
+        return cursor.rowcount
+
+    def compact(self, force: bool = True) -> bool:
+        """Release free pages and trim the write-ahead log
+
+        Without ``force`` this only runs once free pages reach
+        ``COMPACT_FREE_RATIO`` of the file.
+        """
+        try:
+            pages = self._db.execute("PRAGMA page_count").fetchone()[0]
+            free = self._db.execute("PRAGMA freelist_count").fetchone()[0]
+            if not force and (not pages or free / pages < COMPACT_FREE_RATIO):
+                return False
+            # Links to evicted results lead nowhere
+            self._db.execute("DELETE FROM job_results WHERE key NOT IN (SELECT key FROM results)")
+            self._db.commit()
+            # Frees one page per step; executescript steps it to the end
+            self._db.executescript("PRAGMA incremental_vacuum;")
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
+            self._failed("compact", e)
+            return False
+        self.stats["compactions"] += 1
+        return True
+
+    def invalidate(self) -> None:
+        """Stop answering repeat calls from the results stored so far
+
+        They can still be read by key and job id until they expire or are
+        evicted; only new results are replayed.
+        """
+        try:
+            self._db.execute("INSERT OR REPLACE INTO settings VALUES ('replay_after', ?)", (time.time(),))
+            self._db.commit()
+        except sqlite3.Error as e:
+            self._failed("invalidate", e)
+
+    def clear(self) -> None:
+        """Delete every stored result, job outputs included"""
+        try:
+            self._db.execute("DELETE FROM results")
+            self._db.execute("DELETE FROM job_results")
+            self._db.commit()
+        except sqlite3.Error as e:
+            self._failed("clear", e)
+            return
+        self.bytes = 0
+        self.compact()
+
+    def describe(self) -> Dict[str, Any]:
+        try:
+            entries = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            file_bytes = self._db.execute("PRAGMA page_count").fetchone()[0] * self._page_size()
+        except sqlite3.Error:
+            entries = file_bytes = None
+        return {
+            "path": self.path,
+            "tools": sorted(self.tools),
+            "entries": entries,
+            "bytes": self.bytes,
+            "file_bytes": file_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "stats": dict(self.stats),
+        }
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
+
+    def _delete(self, key: str) -> None:
+        self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+
+    def _total_bytes(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def _page_size(self) -> int:
+        return self._db.execute("PRAGMA page_size").fetchone()[0]
+
+    def _failed(self, operation: str, error: sqlite3.Error) -> None:
+        self.stats["errors"] += 1
+        logger.warning("Result store %s failed: %s", operation, error)
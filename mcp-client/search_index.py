@@ -0,0 +1,195 @@
+"""
+Full-text search over MCP documentation resources.
+
+Documents are split into sections at their markdown headings and each
+section is indexed as its own unit in an inverted index, so a hit points to
+the part of a document that answers the query rather than the whole page.
+Ranking is Okapi BM25 with heading terms counted twice. Resources are indexed
+by content hash: re-indexing a URI whose hash is unchanged is a no-op, and a
+changed resource only has its own postings replaced.
+"""
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set
+
+TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it its of on or that the this to was what when "
+    "where which will with you your".split()
+)
+
+SNIPPET_CHARS = 240
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords; ``run-agent-task`` gives three tokens"""
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def slugify(heading: str) -> str:
+    """GitHub-style anchor for a heading"""
+    return re.sub(r"[^\w\- ]", "", heading.lower()).strip().replace(" ", "-")
+
+
+class Section(NamedTuple):
+    uri: str
+    title: str
+    anchor: str
+    text: str
+    length: int
+
+
+def split_sections(text: str) -> List[Section]:
+    """Split markdown at headings; text before the first heading is its own section
+
+    Lines inside fenced code blocks are never headings, so ``# comments`` in
+    code samples stay part of their section.
+    """
+    sections = []
+    title, lines, fenced = "", [], False
+    for line in text.splitlines():
+        if line.lstrip().startswith(("```", "~~~")):
+            fenced = not fenced
+        match = None if fenced else HEADING_RE.match(line)
+        if match:
+            sections.append((title, "\n".join(lines).strip()))
+            title, lines = match.group(2), []
+        else:
+            lines.append(line)
+    sections.append((title, "\n".join(lines).strip()))
+    return [Section("", title, slugify(title), body, 0) for title, body in sections if title or body]
+
+
+def make_snippet(text: str, terms: Set[str], width: int = SNIPPET_CHARS) -> str:
+    """The line of ``text`` with the most query terms, trimmed around the first match"""
+    best, best_hits = "", -1
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        hits = len(terms.intersection(tokenize(line)))
+        if hits > best_hits:
+            best, best_hits = line, hits
+    if len(best) <= width:
+        return best
+    lowered = best.lower()
+    first = min((lowered.find(term) for term in terms if term in lowered), default=0)
+    start = max(0, min(first - width // 4, len(best) - width))
+    snippet = best[start:start + width]
+    return ("..." if start else "") + snippet + ("..." if start + width < len(best) else "")
+
+
+class SearchIndex:
+    """Inverted index of resource sections with BM25 ranking"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, heading_weight: int = 2):
+        self.k1 = k1
+        self.b = b
+        self.heading_weight = heading_weight
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._sections: Dict[int, Section] = {}
+        # uri -> (content hash, resource name, section ids)
+        self._documents: Dict[str, Any] = {}
+        self._next_id = 0
+        self._total_length = 0
+        # Catalog version the index was last synced against
+        self.catalog_version: Optional[str] = None
+        self.stats = {"indexed": 0, "unchanged": 0, "removed": 0, "queries": 0}
+
+    def hash_for(self, uri: str) -> Optional[str]:
+        document = self._documents.get(uri)
+        return document[0] if document else None
+
+    def uris(self) -> Iterable[str]:
+        return list(self._documents)
+
+    def update(self, uri: str, hash_: str, text: str, name: Optional[str] = None) -> bool:
+        """Index a resource's text; returns ``False`` when that hash is already indexed"""
+        if self.hash_for(uri) == hash_:
+            self.stats["unchanged"] += 1
+            return False
+        self._drop(uri)
+
+        ids = []
+        for section in split_sections(text):
+            terms = Counter(tokenize(section.text))
+            for term in tokenize(section.title):
+                terms[term] += self.heading_weight
+            length = sum(terms.values())
+            section_id = self._next_id
+            self._next_id += 1
+            self._sections[section_id] = section._replace(uri=uri, length=length)
+            self._total_length += length
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[section_id] = tf
+            ids.append(section_id)
+
+        self._documents[uri] = (hash_, name or uri, ids)
+        self.stats["indexed"] += 1
+        return True
+
+    def remove(self, uri: str) -> None:
+        if uri in self._documents:
+            self._drop(uri)
+            self.stats["removed"] += 1
+
+    def _drop(self, uri: str) -> None:
+        document = self._documents.pop(uri, None)
+        if document is None:
+            return
+        for section_id in document[2]:
+            section = self._sections.pop(section_id)
+            self._total_length -= section.length
+            for term in set(tokenize(section.text)) | set(tokenize(section.title)):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(section_id, None)
+                    if not postings:
+                        del self._postings[term]
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Best-matching sections for ``query``, highest BM25 score first"""
+        self.stats["queries"] += 1
+        terms = set(tokenize(query))
+        count = len(self._sections)
+        if not terms or not count:
+            return []
+        average = self._total_length / count
+
+        scores: Dict[int, float] = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for section_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._sections[section_id].length / average)
+                scores[section_id] = scores.get(section_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        results = []
+        for section_id, score in ranked:
+            section = self._sections[section_id]
+            results.append({
+                "uri": section.uri,
+                "name": self._documents[section.uri][1],
+                "section": section.title,
+                "anchor": section.anchor,
+                "score": round(score, 4),
+                "snippet": make_snippet(section.text, terms),
+            })
+        return results
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self._documents),
+            "sections": len(self._sections),
+            "terms": len(self._postings),
+            "catalog_version": self.catalog_version,
+            "stats": dict(self.stats),
+        }
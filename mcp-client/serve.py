@@ -0,0 +1,220 @@
+"""
+Production entry point: serves a client app from several worker processes.
+
+    python serve.py                              # pandaagi_main:app on :8001, a worker per core
+    python serve.py main:app --workers 4 --port 8000
+
+Each worker is a uvicorn server in its own process, so requests are spread
+over every core instead of sharing one event loop. On Linux every worker
+listens on its own ``SO_REUSEPORT`` socket and the kernel balances incoming
+connections across them evenly. Elsewhere the workers share a single socket
+bound by this process. A worker that dies is started again.
+
+With more than one worker, state that must agree across them lives in a
+SQLite side store under ``SHARED_STATE_DIR`` (see ``shared_state.py``):
+rate-limit buckets, the tool result cache and metrics. Jobs go to
+``JOB_DB_PATH``, which defaults to the same directory, so any worker can
+answer for a job, and the first worker free runs it. Jobs a previous run
+left running are failed here once, before the workers start. The catalog,
+resource and search caches stay per worker; each refills with one upstream
+call.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+
+logger = logging.getLogger("serve")
+
+# A worker that exits this soon after starting is failing to boot, not crashing under load
+STARTUP_GRACE = 5.0
+
+REUSE_PORT = hasattr(socket, "SO_REUSEPORT") and sys.platform.startswith("linux")
+
+
+def bind_socket(host: str, port: int, backlog: int, reuse_port: bool, listen: bool = True) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    if listen:
+        sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(options: Dict[str, Any], sock: Optional[socket.socket]) -> None:
+    """Body of a worker process: one uvicorn server on ``sock`` or its own reuse-port socket"""
+    config = uvicorn.Config(**options)
+    if sock is None:
+        sock = bind_socket(config.host, config.port, config.backlog, reuse_port=True)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def prepare_shared_state(state_dir: str) -> None:
+    """Point workers at the side store and settle what a previous run left behind"""
+    from jobs import JobQueue, SQLiteJobStore
+    from shared_state import SharedState
+
+    os.environ.setdefault("SHARED_STATE_PATH", os.path.join(state_dir, "state.db"))
+    os.environ.setdefault("JOB_DB_PATH", os.path.join(state_dir, "jobs.db"))
+
+    state = SharedState(os.environ["SHARED_STATE_PATH"])
+    # Counters start from zero with the server, as they would in one process
+    state.db.execute("DELETE FROM metric_snapshots")
+    state.close()
+
+    store = SQLiteJobStore(os.environ["JOB_DB_PATH"])
+    interrupted = JobQueue(None, store=store).recover()
+    store.close()
+    if interrupted:
+        logger.info("Marked %d interrupted jobs as failed", interrupted)
+    # Workers joining later must not fail jobs that other workers are running
+    os.environ["JOB_RECOVERY"] = "false"
+
+
+class Supervisor:
+    """Starts the worker processes, restarts any that die and stops them all on a signal"""
+
+    def __init__(self, options: Dict[str, Any], workers: int, reuse_port: bool, graceful_timeout: float):
+        self.options = options
+        self.workers = workers
+        self.reuse_port = reuse_port
+        self.graceful_timeout = graceful_timeout
+        # Spawned rather than forked, so no worker inherits this process's threads or sqlite handles
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: List[multiprocessing.process.BaseProcess] = []
+        self._started: List[float] = []
+        self._socket: Optional[socket.socket] = None
+        self._stop = threading.Event()
+        self.failed = False
+
+    def run(self) -> None:
+        host, port, backlog = self.options["host"], self.options["port"], self.options["backlog"]
+        # With reuse-port this socket only claims the port, so a clash shows up
+        # here rather than in every worker; it never listens, so it gets no connections
+        self._socket = bind_socket(host, port, backlog, self.reuse_port, listen=not self.reuse_port)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: self._stop.set())
+
+        logger.info(
+            "Serving %s on %s:%d with %d workers (%s)", self.options["app"], host, port, self.workers,
+            "SO_REUSEPORT" if self.reuse_port else "shared socket",
+        )
+        for _ in range(self.workers):
+            self._spawn()
+        try:
+            while not self._stop.wait(0.5):
+                self._restart_dead()
+        finally:
+            self._shutdown()
+            self._socket.close()
+
+    def _spawn(self, index: Optional[int] = None) -> None:
+        sock = None if self.reuse_port else self._socket
+        process = self._context.Process(target=run_worker, args=(self.options, sock), daemon=False)
+        process.start()
+        if index is None:
+            self._processes.append(process)
+            self._started.append(time.monotonic())
+        else:
+            self._processes[index] = process
+            self._started[index] = time.monotonic()
+
+    def _restart_dead(self) -> None:
+        for index, process in enumerate(self._processes):
+            if process.is_alive():
+                continue
+            if process.exitcode and time.monotonic() - self._started[index] < STARTUP_GRACE:
+                logger.error("Worker %d failed on startup (exit code %s); stopping", process.pid, process.exitcode)
+                self.failed = True
+                self._stop.set()
+                return
+            logger.warning("Worker %d exited with code %s; starting a new one", process.pid, process.exitcode)
+            self._spawn(index)
+
+    def _shutdown(self) -> None:
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + self.graceful_timeout
+        for process in self._processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning("Worker %d did not stop in time; killing it", process.pid)
+                process.kill()
+                process.join()
+
+
+def cli(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Serve a client app from several worker processes")
+    parser.add_argument("app", nargs="?", default=os.getenv("SERVE_APP", "pandaagi_main:app"),
+                        help="import string of the ASGI app")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8001")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))),
+                        help="worker processes; defaults to one per core")
+    parser.add_argument("--backlog", type=int, default=int(os.getenv("SERVE_BACKLOG", "2048")),
+                        help="pending connections per listening socket")
+    # Longer than the usual 60s load balancer idle timeout, so the balancer
+    # closes idle connections first and never sends on one being closed here
+    parser.add_argument("--keep-alive", type=float, default=float(os.getenv("SERVE_KEEP_ALIVE", "75")),
+                        help="seconds an idle keep-alive connection stays open")
+    parser.add_argument("--limit-concurrency", type=int, default=os.getenv("SERVE_LIMIT_CONCURRENCY"),
+                        help="connections per worker before new ones get 503")
+    parser.add_argument("--max-requests", type=int, default=os.getenv("SERVE_MAX_REQUESTS"),
+                        help="requests a worker serves before it is replaced")
+    parser.add_argument("--graceful-timeout", type=float, default=float(os.getenv("SERVE_GRACEFUL_TIMEOUT", "30")),
+                        help="seconds workers get to finish in-flight requests on shutdown")
+    parser.add_argument("--access-log", action="store_true",
+                        default=os.getenv("SERVE_ACCESS_LOG", "false").lower() in ("1", "true", "yes"))
+    parser.add_argument("--no-reuse-port", dest="reuse_port", action="store_false", default=REUSE_PORT,
+                        help="share one listening socket instead of one per worker")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    state_dir = None
+    if args.workers > 1:
+        state_dir = os.getenv("SHARED_STATE_DIR")
+        created = state_dir is None
+        if created:
+            state_dir = tempfile.mkdtemp(prefix="mcp-client-state-")
+        else:
+            os.makedirs(state_dir, exist_ok=True)
+        prepare_shared_state(state_dir)
+
+    options = {
+        "app": args.app,
+        "host": args.host,
+        "port": args.port,
+        "backlog": args.backlog,
+        "timeout_keep_alive": args.keep_alive,
+        "limit_concurrency": args.limit_concurrency,
+        "limit_max_requests": args.max_requests,
+        "access_log": args.access_log,
+    }
+    supervisor = Supervisor(options, args.workers, args.reuse_port, args.graceful_timeout)
+    try:
+        supervisor.run()
+    finally:
+        if state_dir is not None and created:
+            shutil.rmtree(state_dir, ignore_errors=True)
+    if supervisor.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,401 @@
+"""
+State shared by the worker processes of one server.
+
+``serve.py`` runs an app in several processes, and each has its own memory.
+Whatever has to agree across them lives in one SQLite database at
+``SHARED_STATE_PATH``:
+
+- ``SharedRateLimiter`` keeps the token buckets there, so a client gets the
+  configured rate in total rather than once per worker. Workers admit from
+  local copies and reconcile in the background, off the request path.
+- ``SharedToolCache`` keeps tool results there, so a result computed by one
+  worker answers the same call on every other, and invalidation reaches all
+  of them.
+- ``SharedMetrics`` publishes each worker's metrics there, and a scrape of
+  any worker answers for all of them.
+
+The database only holds state for the life of the server, so writes skip
+fsync. Each operation is a single statement on a primary key, cheap next to
+serving the request that triggers it.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from admission import RateLimiter
+from db_thread import DatabaseThread
+from mcp_cache import canonical_json
+from metrics import Family, Registry
+from tool_cache import ToolResultCache
+
+logger = logging.getLogger(__name__)
+
+
+class SharedState:
+    """Connection to the side store shared by the workers of one server"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.db = self.connect()
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                client TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS tool_cache (
+                name TEXT NOT NULL,
+                args TEXT NOT NULL,
+                result TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (name, args)
+            );
+            CREATE INDEX IF NOT EXISTS tool_cache_expires ON tool_cache (expires_at);
+            CREATE TABLE IF NOT EXISTS metric_snapshots (
+                worker TEXT PRIMARY KEY,
+                families TEXT NOT NULL,
+                updated REAL NOT NULL
+            );
+            """
+        )
+
+    @classmethod
+    def from_env(cls) -> Optional["SharedState"]:
+        """Store at ``SHARED_STATE_PATH``, or ``None`` for a single process keeping state in memory"""
+        path = os.getenv("SHARED_STATE_PATH")
+        return cls(path) if path else None
+
+    def connect(self) -> sqlite3.Connection:
+        """A new connection to the store, for a component that uses it from its own thread"""
+        # Autocommit: every statement is its own transaction
+        db = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        db.execute("PRAGMA synchronous = OFF")
+        return db
+
+    def close(self) -> None:
+        self.db.close()
+
+
+class SharedRateLimiter(RateLimiter):
+    """``RateLimiter`` whose buckets are shared by every worker process
+
+    Each worker admits requests from its own copy of the buckets in memory,
+    so a check never waits on the database. Every ``sync_interval`` seconds
+    a background task writes the tokens the worker took since the last sync
+    to the shared buckets and reads back what is left after every worker's
+    share. That is one write transaction per worker per interval rather than
+    one per request. Workers can overdraw a bucket between syncs, up to a
+    full burst each for a client new to all of them; the shared balance
+    then goes negative and everyone waits for the refill, so the total rate
+    over time still holds.
+    """
+
+    # Charge a client's takes to its shared bucket and return the balance
+    TAKE = """
+        INSERT INTO rate_buckets VALUES (:client, :burst - :taken, :now)
+        ON CONFLICT (client) DO UPDATE SET
+            tokens = MIN(:burst, tokens + MAX(0, :now - updated) * :rate) - :taken,
+            updated = MAX(updated, :now)
+        RETURNING tokens
+    """
+
+    # Syncs between sweeps of buckets that have refilled completely
+    SWEEP_EVERY = 100
+
+    def __init__(
+        self,
+        state: SharedState,
+        rate: float,
+        burst: Optional[float] = None,
+        max_clients: int = 10000,
+        sync_interval: float = 0.1,
+    ):
+        super().__init__(rate, burst, max_clients)
+        self.sync_interval = sync_interval
+        # Its own connection, used only on its own thread
+        self._db = state.connect()
+        self._thread = DatabaseThread("rate-limit")
+        # client -> tokens taken here since the last sync; limited clients
+        # are listed with 0 so their balance is refreshed too
+        self._taken: Dict[str, int] = {}
+        self._syncs = 0
+        self._task: Optional[asyncio.Task] = None
+        self.stats["sync_errors"] = 0
+
+    @classmethod
+    def from_env(cls, state: SharedState) -> "SharedRateLimiter":
+        limiter = RateLimiter.from_env()
+        return cls(
+            state, limiter.rate, limiter.burst, limiter.max_clients,
+            sync_interval=float(os.getenv("RATE_LIMIT_SYNC_INTERVAL", "0.1")),
+        )
+
+    def check(self, client: str) -> float:
+        """Take a token for ``client``; 0 if admitted, else seconds until one is available"""
+        wait = super().check(client)
+        self._taken[client] = self._taken.get(client, 0) + (0 if wait else 1)
+        return wait
+
+    async def start(self) -> None:
+        """Sync with the other workers in the background"""
+        if self._task is None and self.enabled:
+            self._task = asyncio.ensure_future(self._sync_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Tokens taken since the last sync still count for the other workers
+        if self._taken:
+            await self._thread.run(self._sync, self._taken)
+        await self._thread.run(self._db.close)
+        self._thread.close()
+
+    async def _sync_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            if not self._taken:
+                continue
+            taken, self._taken = self._taken, {}
+            balances = await self._thread.run(self._sync, taken)
+            now = time.monotonic()
+            for client, tokens in balances.items():
+                bucket = self._buckets.get(client)
+                if bucket is not None:
+                    # Less what this worker took while the sync ran
+                    bucket[0] = tokens - self._taken.get(client, 0)
+                    bucket[1] = now
+
+    def _sync(self, taken: Dict[str, int]) -> Dict[str, float]:
+        """Charge ``taken`` to the shared buckets; returns each client's shared balance"""
+        now = time.time()
+        balances = {}
+        try:
+            self._db.execute("BEGIN IMMEDIATE")
+            for client, count in taken.items():
+                balances[client] = self._db.execute(
+                    self.TAKE, {"client": client, "taken": count, "burst": self.burst, "rate": self.rate, "now": now}
+                ).fetchone()[0]
+            self._syncs += 1
+            if self._syncs % self.SWEEP_EVERY == 0:
+                # A bucket idle long enough to refill is the same as no bucket at all
+                self._db.execute("DELETE FROM rate_buckets WHERE updated < ?", (now - self.burst / self.rate,))
+            self._db.execute("COMMIT")
+        except sqlite3.Error as e:
+            # Workers keep limiting on their own buckets until the store is back
+            if self._db.in_transaction:
+                self._db.execute("ROLLBACK")
+            self.stats["sync_errors"] += 1
+            logger.warning("Shared rate limit sync failed: %s", e)
+            return {}
+        return balances
+
+    def describe(self) -> Dict[str, Any]:
+        return {**super().describe(), "shared": True, "sync_interval": self.sync_interval}
+
+
+class SharedToolCache(ToolResultCache):
+    """``ToolResultCache`` held in the shared store instead of each worker's memory
+
+    Every lookup reads the store, so a result cached or invalidated by one
+    worker is seen by all of them at once. Reads don't take a lock; only
+    puts write. Past the entry or byte budget, the entries closest to
+    expiring are dropped first, which needs no write on every hit.
+    """
+
+    def __init__(self, state: SharedState, policies: Dict[str, float], max_entries: int = 1000,
+                 max_bytes: int = 64 * 1024 * 1024):
+        super().__init__(policies, max_entries, max_bytes)
+        self._db = state.db
+        self.stats["errors"] = 0
+        self.bytes = self._totals()[1]
+
+    @classmethod
+    def from_env(cls, state: SharedState) -> "SharedToolCache":
+        cache = ToolResultCache.from_env()
+        return cls(state, cache.policies, cache.max_entries, cache.max_bytes)
+
+    def get(self, name: str, args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Cached result for a call, or ``None``"""
+        if not self.cacheable(name):
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT result, expires_at FROM tool_cache WHERE name = ? AND args = ?", self.key(name, args)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._failed("read", e)
+            row = None
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+        if row[1] <= time.time():
+            # Left for the next put to sweep, rather than writing on a read
+            self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return json.loads(row[0])
+
+    def put(self, name: str, args: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """Store a result if the tool's policy allows it and it fits the budget"""
+        if not self.cacheable(name):
+            return
+        body = canonical_json(result)
+        size = len(body.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO tool_cache VALUES (?, ?, ?, ?, ?)",
+                (*self.key(name, args), body, size, now + self.policies[name]),
+            )
+            self._db.execute("DELETE FROM tool_cache WHERE expires_at <= ?", (now,))
+            entries, self.bytes = self._totals()
+            if entries > self.max_entries or self.bytes > self.max_bytes:
+                self._evict(entries)
+        except sqlite3.Error as e:
+            self._failed("write", e)
+
+    def _evict(self, entries: int) -> None:
+        rows = self._db.execute("SELECT name, args, size FROM tool_cache ORDER BY expires_at").fetchall()
+        for name, args, size in rows:
+            if entries <= self.max_entries and self.bytes <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM tool_cache WHERE name = ? AND args = ?", (name, args))
+            entries -= 1
+            self.bytes -= size
+            self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        try:
+            self._db.execute("DELETE FROM tool_cache")
+        except sqlite3.Error as e:
+            self._failed("clear", e)
+            return
+        self.bytes = 0
+
+    def describe(self) -> Dict[str, Any]:
+        try:
+            entries, self.bytes = self._totals()
+        except sqlite3.Error:
+            entries = None
+        return {
+            "policies": dict(self.policies),
+            "entries": entries,
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "shared": True,
+            "stats": dict(self.stats),
+        }
+
+    def _totals(self) -> Tuple[int, int]:
+        return self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM tool_cache").fetchone()
+
+    def _failed(self, operation: str, error: sqlite3.Error) -> None:
+        self.stats["errors"] += 1
+        logger.warning("Shared tool cache %s failed: %s", operation, error)
+
+
+class SharedMetrics:
+    """Publishes one worker's metrics to the shared store and renders every worker's
+
+    Counters and histograms are summed across workers, including workers
+    that have exited, so totals never go backwards while the server runs.
+    The in-flight gauges tracked by the registry are summed across live
+    workers. Gauges reported by collectors describe one process, such as
+    its queue depth or probe latency, so they keep a ``worker`` label.
+    A worker counts as live while it has published within
+    ``3 * interval`` seconds.
+    """
+
+    def __init__(self, state: SharedState, registry: Registry, interval: float = 1.0):
+        self.registry = registry
+        self.interval = interval
+        self.worker = str(os.getpid())
+        self._db = state.db
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, state: SharedState, registry: Registry) -> "SharedMetrics":
+        return cls(state, registry, interval=float(os.getenv("SHARED_METRICS_INTERVAL", "1")))
+
+    async def start(self) -> None:
+        """Publish in the background every ``interval`` seconds"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Final counts, so requests served just before exiting still add up
+        self.publish()
+
+    async def _run(self) -> None:
+        while True:
+            self.publish()
+            await asyncio.sleep(self.interval)
+
+    def publish(self) -> None:
+        families = [family._asdict() for family in self.registry.families()]
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO metric_snapshots VALUES (?, ?, ?)",
+                (self.worker, json.dumps(families, separators=(",", ":")), time.time()),
+            )
+        except sqlite3.Error as e:
+            logger.warning("Publishing metrics failed: %s", e)
+
+    def render(self) -> str:
+        """Metrics of every worker in the Prometheus text format"""
+        self.publish()
+        try:
+            rows = self._db.execute("SELECT worker, families, updated FROM metric_snapshots").fetchall()
+        except sqlite3.Error as e:
+            logger.warning("Reading worker metrics failed: %s", e)
+            return self.registry.render()
+        live_after = time.time() - 3 * self.interval
+        snapshots = [
+            (worker, updated >= live_after, [Family(**family) for family in json.loads(families)])
+            for worker, families, updated in rows
+        ]
+        return self.registry.render(merge_families(snapshots))
+
+
+def merge_families(snapshots: List[Tuple[str, bool, List[Family]]]) -> List[Family]:
+    """Combine ``(worker, live, families)`` snapshots as described on ``SharedMetrics``"""
+    merged: "OrderedDict[str, Family]" = OrderedDict()
+    # family -> (sample name, labels) -> value
+    values: Dict[str, "OrderedDict[Tuple[str, Tuple[Tuple[str, str], ...]], float]"] = {}
+    for worker, live, families in snapshots:
+        for family in families:
+            per_worker = family.kind == "gauge" and family.collected
+            if family.kind == "gauge" and not live:
+                continue
+            if family.name not in merged:
+                merged[family.name] = family
+                values[family.name] = OrderedDict()
+            samples = values[family.name]
+            for name, labels, value in family.samples:
+                if per_worker:
+                    labels = {**labels, "worker": worker}
+                key = (name, tuple(labels.items()))
+                samples[key] = samples.get(key, 0.0) + value
+    return [
+        family._replace(samples=[(name, dict(labels), value) for (name, labels), value in values[family.name].items()])
+        for family in merged.values()
+    ]
@@ -0,0 +1,60 @@
+"""
+Single-flight coalescing for identical in-flight upstream calls.
+
+Concurrent callers with the same key share one upstream call instead of each
+sending their own, which keeps cache expiries and deploys from turning into
+a thundering herd against the MCP server.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {"leaders": 0, "deduplicated": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn`` unless an identical call is already in flight, then share its outcome"""
+        future = self._calls.get(key)
+        if future is None:
+            self.stats["leaders"] += 1
+            # Run the call as its own task so a cancelled caller doesn't
+            # cancel it for everyone else waiting on the same key.
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.stats["deduplicated"] += 1
+        return await asyncio.shield(future)
+
+    def share(self, key: Hashable, future: asyncio.Future) -> asyncio.Future:
+        """Register ``future`` as the call for ``key``, or return the call already in flight
+
+        For callers that send many calls together, such as a batch, and settle
+        each call's future themselves. A caller that gets its own future back
+        must resolve it, or cancel it, or callers waiting on ``key`` hang.
+        """
+        current = self._calls.get(key)
+        if current is not None:
+            self.stats["deduplicated"] += 1
+            return current
+        self.stats["leaders"] += 1
+        self._calls[key] = future
+        future.add_done_callback(lambda done: self._finish(key, done))
+        return future
+
+    def _finish(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # Mark the exception as retrieved in case every caller went away
+        if not future.cancelled():
+            future.exception()
+
+    def describe(self) -> Dict[str, Any]:
+        return {"in_flight": len(self._calls), **self.stats}
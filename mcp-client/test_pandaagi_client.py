@@ -3,11 +3,29 @@
 Test script for PandaAGI MCP Client API
 """
 
+import asyncio
 import requests
 import json
 import os
+import tempfile
+import time
 from typing import Dict, Any
 
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from compression import CompressionMiddleware, ResponseCompressor
+from mcp_server import MCPServer
+from mcp_transport import CircuitOpenError, MCPConnectionError, MCPTransport
+from resilience import CircuitBreaker, RetryPolicy
+from resource_store import etag_for, etag_matches
+from result_store import ResultStore
+from shared_state import SharedRateLimiter, SharedState
+from upstreams import UpstreamPool
+
 # API base URL
 API_BASE = os.getenv("API_BASE", "http://localhost:8001")
 
@@ -103,6 +121,30 @@ def test_run_task():
         print("❌ Task execution failed")
         return False
 
+def test_stream_task():
+    """Test streaming a task's output"""
+    print("\n📡 Testing streamed task execution...")
+    try:
+        response = requests.post(
+            f"{API_BASE}/agent/task/stream",
+            params={"format": "ndjson"},
+            json={"task": "Tell me a joke about pandas and AI"},
+            stream=True
+        )
+        response.raise_for_status()
+        events = [json.loads(line) for line in response.iter_lines() if line]
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Request failed: {e}")
+        return False
+
+    chunks = [event for event in events if event.get("event") == "chunk"]
+    if chunks and events[-1].get("event") == "done":
+        print(f"✅ Received {len(chunks)} streamed chunks")
+        return True
+    else:
+        print("❌ Streamed task execution failed")
+        return False
+
 def test_generate_report():
     """Test generating an analysis report"""
     print("\n📊 Testing analysis report generation...")
@@ -151,6 +193,91 @@ def test_deploy_webapp():
         print("❌ Web app deployment failed")
         return False
 
+def test_batch_tools():
+    """Test calling several tools in one batch"""
+    print("\n📦 Testing batched tool calls...")
+    data = {
+        "calls": [
+            {"name": "create-dashboard", "args": {"data_description": "Monthly revenue"}},
+            {"name": "generate-analysis-report", "args": {"topic": "EV market"}}
+        ]
+    }
+    result = make_request("POST", "/tools/batch", data)
+    results = result.get("results", [])
+    if len(results) == 2 and all(item.get("content") for item in results):
+        print(f"✅ Batch returned {len(results)} results")
+        return True
+    else:
+        print("❌ Batched tool calls failed")
+        return False
+
+def test_invalid_tool_args():
+    """Test that arguments not matching a tool's schema are rejected"""
+    print("\n🚫 Testing tool argument validation...")
+    data = {"name": "generate-analysis-report", "args": {"topic": 42}}
+    try:
+        response = requests.post(f"{API_BASE}/tools/call", json=data)
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Request failed: {e}")
+        return False
+
+    if response.status_code == 422:
+        errors = response.json().get("detail", [])
+        print(f"✅ Invalid arguments rejected with {len(errors)} error(s)")
+        return True
+    else:
+        print(f"❌ Expected 422, got {response.status_code}")
+        return False
+
+def test_jobs():
+    """Test submitting a job and polling it until it finishes"""
+    print("\n⏳ Testing background jobs...")
+    data = {"name": "generate-analysis-report", "args": {"topic": "Job queue smoke test"}}
+    job = make_request("POST", "/jobs", data)
+    job_id = job.get("id")
+    if not job_id:
+        print("❌ Job submission failed")
+        return False
+
+    for _ in range(50):
+        job = make_request("GET", f"/jobs/{job_id}")
+        if job.get("status") not in ("queued", "running"):
+            break
+        time.sleep(0.1)
+
+    listed = [item["id"] for item in make_request("GET", "/jobs").get("jobs", [])]
+    if job.get("status") == "succeeded" and job_id in listed:
+        print(f"✅ Job {job_id} succeeded")
+        return True
+    else:
+        print(f"❌ Job ended as {job.get('status')}")
+        return False
+
+def test_artifact_range():
+    """Test resuming an artifact download with a Range request
+
+    Writes its file under ``ARTIFACTS_DIR``, so run it next to the server.
+    """
+    print("\n📥 Testing artifact Range requests...")
+    directory = os.path.join(os.getenv("ARTIFACTS_DIR", "./agent_workspace"), "smoke-test")
+    os.makedirs(directory, exist_ok=True)
+    body = b"0123456789" * 10
+    with open(os.path.join(directory, "range.txt"), "wb") as f:
+        f.write(body)
+
+    try:
+        response = requests.get(f"{API_BASE}/artifacts/smoke-test/range.txt", headers={"Range": "bytes=10-19"})
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Request failed: {e}")
+        return False
+
+    if response.status_code == 206 and response.content == body[10:20]:
+        print(f"✅ Partial content: {response.headers.get('Content-Range')}")
+        return True
+    else:
+        print(f"❌ Expected 206 with bytes 10-19, got {response.status_code}")
+        return False
+
 def test_list_resources():
     """Test listing available resources"""
     print("\n📚 Testing resources list...")
@@ -179,6 +306,333 @@ def test_read_resource():
         print("❌ Failed to read resource")
         return False
 
+def test_resource_etag():
+    """Test revalidating a resource with its ETag"""
+    print("\n🏷️ Testing resource revalidation...")
+    data = {"uri": "docs://pandaagi-quickstart"}
+    try:
+        response = requests.post(f"{API_BASE}/resources/read", json=data)
+        etag = response.headers.get("ETag")
+        revalidated = requests.post(f"{API_BASE}/resources/read", json=data, headers={"If-None-Match": etag or ""})
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Request failed: {e}")
+        return False
+
+    if etag and revalidated.status_code == 304:
+        print(f"✅ Unchanged resource answered with 304 for ETag {etag}")
+        return True
+    else:
+        print(f"❌ Expected 304, got {revalidated.status_code}")
+        return False
+
+def test_search_resources():
+    """Test full-text search over resources"""
+    print("\n🔎 Testing resource search...")
+    result = make_request("GET", "/resources/search?q=deploy+web+app&limit=3")
+    hits = result.get("results", [])
+    if hits:
+        print(f"✅ Found {len(hits)} matching sections:")
+        for hit in hits:
+            print(f"   - {hit['name']} › {hit['section']} ({hit['score']})")
+        return True
+    else:
+        print("❌ No search results")
+        return False
+
+def refusing_server(refusals: Dict[str, int]) -> httpx.MockTransport:
+    """An in-process MCP server that refuses ``refusals["left"]`` connections before answering"""
+    server = httpx.ASGITransport(app=MCPServer())
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        refusals["sent"] = refusals.get("sent", 0) + 1
+        if refusals.get("left"):
+            refusals["left"] -= 1
+            raise httpx.ConnectError("Connection refused", request=request)
+        return await server.handle_async_request(request)
+
+    return httpx.MockTransport(handle)
+
+def test_retry_and_breaker():
+    """Test retries of read-only calls and the circuit breaker
+
+    Runs against an in-process MCP server, so no API server is needed.
+    """
+    print("\n🔁 Testing retries and circuit breaker...")
+    refusals = {"left": 0}
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.2)
+    mcp = MCPTransport(
+        "http://mcp/mcp",
+        transport=refusing_server(refusals),
+        retry=RetryPolicy(attempts=3, base_delay=0.01),
+        breaker=breaker,
+    )
+
+    async def run() -> Dict[str, bool]:
+        checks = {}
+        refusals["left"] = 2
+        tools = await mcp.request("mcp/listTools")
+        checks["read-only call retried past 2 refusals"] = bool(tools.get("tools")) and mcp.stats["retries"] == 2
+
+        refusals["left"], refusals["sent"] = 1, 0
+        try:
+            await mcp.request("mcp/callTool", {"name": "create-dashboard", "args": {"data_description": "x"}})
+            checks["tool call not retried"] = False
+        except MCPConnectionError:
+            checks["tool call not retried"] = refusals["sent"] == 1
+
+        refusals["left"] = 10
+        try:
+            await mcp.request("mcp/listTools")
+        except MCPConnectionError:
+            pass
+        sent = refusals["sent"]
+        try:
+            await mcp.request("mcp/init")
+            checks["open breaker fails fast"] = False
+        except CircuitOpenError:
+            checks["open breaker fails fast"] = breaker.state == "open" and refusals["sent"] == sent
+
+        refusals["left"] = 0
+        await asyncio.sleep(0.25)
+        await mcp.request("mcp/init")
+        checks["trial call closes breaker"] = breaker.state == "closed"
+        await mcp.aclose()
+        return checks
+
+    checks = asyncio.run(run())
+    for name, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {name}")
+    return all(checks.values())
+
+def test_upstream_balancing():
+    """Test latency-aware routing, ejection and hedging across two MCP servers
+
+    Both upstreams are the in-process MCP server behind a handler that adds
+    delays or refuses connections per host, so no API server is needed.
+    """
+    print("\n⚖️ Testing upstream balancing...")
+    server = httpx.ASGITransport(app=MCPServer())
+    delays = {"fast": 0.0, "slow": 0.05}
+    down = set()
+    stall = {"once": False}
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        if request.url.host in down:
+            raise httpx.ConnectError("Connection refused", request=request)
+        if stall["once"]:
+            stall["once"] = False
+            await asyncio.sleep(1.0)
+        await asyncio.sleep(delays[request.url.host])
+        return await server.handle_async_request(request)
+
+    def transport(pool: UpstreamPool) -> MCPTransport:
+        return MCPTransport(
+            [u.url for u in pool.upstreams], transport=httpx.MockTransport(handle),
+            retry=RetryPolicy(attempts=3, base_delay=0.01), pool=pool,
+        )
+
+    async def run() -> Dict[str, bool]:
+        checks = {}
+        pool = UpstreamPool(["http://fast/mcp", "http://slow/mcp"])
+        mcp = transport(pool)
+        for _ in range(20):
+            await mcp.request("mcp/init")
+        fast, slow = pool.upstreams
+        checks[f"faster upstream preferred ({fast.stats['requests']} vs {slow.stats['requests']})"] = (
+            fast.stats["requests"] > 3 * slow.stats["requests"]
+        )
+        await mcp.aclose()
+
+        delays.update(fast=0.01, slow=0.01)
+        down.add("slow")
+        pool = UpstreamPool(["http://fast/mcp", "http://slow/mcp"], eject_after=2)
+        mcp = transport(pool)
+        results = await asyncio.gather(*(mcp.request("mcp/listTools") for _ in range(20)), return_exceptions=True)
+        ejected = pool.describe()[1]
+        checks["failing upstream ejected"] = not ejected["available"] and ejected["ejections"] == 1
+        checks["read-only calls retried on the healthy upstream"] = all(isinstance(r, dict) for r in results)
+        await mcp.aclose()
+
+        down.clear()
+        pool = UpstreamPool(["http://fast/mcp", "http://slow/mcp"], hedge_percentile=50, hedge_min_samples=5)
+        mcp = transport(pool)
+        for _ in range(10):
+            await mcp.request("mcp/init")
+        hedges = sum(u.stats["hedges"] for u in pool.upstreams)
+        stall["once"] = True
+        start = time.monotonic()
+        await mcp.request("mcp/init")
+        elapsed = time.monotonic() - start
+        checks[f"stalled call hedged ({elapsed * 1000:.0f}ms)"] = (
+            elapsed < 0.5 and sum(u.stats["hedges"] for u in pool.upstreams) == hedges + 1
+        )
+        await mcp.aclose()
+        return checks
+
+    checks = asyncio.run(run())
+    for name, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {name}")
+    return all(checks.values())
+
+def test_compression_cache():
+    """Test negotiated compression, its cache key and weak ETags
+
+    Wraps a small in-process app in ``CompressionMiddleware``. Its documents
+    all share one ETag, as two resources with identical text would.
+    """
+    print("\n🗜️ Testing response compression...")
+    etag = etag_for("same-hash")
+
+    async def read(request: Request) -> Response:
+        if etag_matches(request.headers.get("if-none-match"), "same-hash"):
+            return Response(status_code=304, headers={"ETag": etag})
+        uri = (await request.json())["uri"]
+        body = json.dumps({"uri": uri, "text": "panda " * 500})
+        return Response(body, media_type="application/json", headers={"ETag": etag})
+
+    async def small(request: Request) -> Response:
+        return Response('{"ok": true}', media_type="application/json")
+
+    compressor = ResponseCompressor()
+    app = Starlette(routes=[Route("/read", read, methods=["POST"]), Route("/small", small)])
+    app.add_middleware(CompressionMiddleware, compressor=compressor)
+
+    async def run() -> Dict[str, bool]:
+        checks = {}
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://client") as client:
+            codings = []
+            for accept in ("br", "gzip", "br;q=0.5, gzip"):
+                response = await client.post("/read", json={"uri": "docs://a"}, headers={"Accept-Encoding": accept})
+                codings.append(response.headers.get("content-encoding"))
+            expected = ["br" if "br" in compressor.encodings else None, "gzip", "gzip"]
+            checks[f"encoding negotiated ({', '.join(map(str, codings))})"] = codings == expected
+
+            first = await client.post("/read", json={"uri": "docs://a"}, headers={"Accept-Encoding": "gzip"})
+            other = await client.post("/read", json={"uri": "docs://b"}, headers={"Accept-Encoding": "gzip"})
+            checks["same ETag, different request, different body"] = (
+                first.json()["uri"] == "docs://a" and other.json()["uri"] == "docs://b"
+            )
+            hits = compressor.stats["cache_hits"]
+            again = await client.post("/read", json={"uri": "docs://b"}, headers={"Accept-Encoding": "gzip"})
+            checks["repeat served from cache"] = (
+                compressor.stats["cache_hits"] == hits + 1 and again.content == other.content
+            )
+
+            weak = first.headers.get("etag", "")
+            revalidated = await client.post(
+                "/read", json={"uri": "docs://a"}, headers={"Accept-Encoding": "gzip", "If-None-Match": weak}
+            )
+            checks[f"weak ETag {weak} revalidates"] = weak == "W/" + etag and revalidated.status_code == 304
+
+            small_response = await client.get("/small", headers={"Accept-Encoding": "gzip"})
+            checks["small body sent as is"] = "content-encoding" not in small_response.headers
+        return checks
+
+    checks = asyncio.run(run())
+    for name, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {name}")
+    return all(checks.values())
+
+def test_result_store():
+    """Test result store replay, eviction by last read and compaction
+
+    Uses a throwaway SQLite file, so no API server is needed.
+    """
+    print("\n🗄️ Testing result store...")
+    report = "generate-analysis-report"
+    text = "x" * 2000
+
+    def result(topic: str) -> Dict[str, Any]:
+        return {"content": [{"type": "text", "text": f"{topic}: {text}"}]}
+
+    async def run(path: str) -> Dict[str, bool]:
+        checks = {}
+        store = ResultStore(path, tools=[report, "run-agent-task"], max_bytes=7000)
+        await store.start()
+        store.defer(store.put, report, {"topic": "a"}, result("a"))
+        replayed = await store.run(store.lookup, report, {"topic": "a"})
+        checks["deferred write replayed"] = replayed == result("a")
+
+        key = await store.run(store.put, "run-agent-task", {"task": "t"}, result("t"))
+        checks["side-effect result kept but not replayed"] = (
+            await store.run(store.lookup, "run-agent-task", {"task": "t"}) is None
+            and (await store.run(store.get, key))["result"] == result("t")
+        )
+
+        # Three results fit the budget; d pushes out the least recently read
+        await store.run(store.clear)
+        for topic in "abc":
+            await store.run(store.put, report, {"topic": topic}, result(topic))
+        await asyncio.sleep(0.01)
+        await store.run(store.lookup, report, {"topic": "a"})
+        await store.run(store.put, report, {"topic": "d"}, result("d"))
+        kept = "".join([topic for topic in "abcd" if await store.run(store.lookup, report, {"topic": topic})])
+        checks[f"least recently read evicted (kept {kept})"] = kept == "acd" and store.bytes <= store.max_bytes
+
+        store.max_bytes = 100 * 1024 * 1024
+        for n in range(200):
+            await store.run(store.put, report, {"topic": f"bulk-{n}"}, result(f"bulk-{n}"))
+        before = (await store.run(store.describe))["file_bytes"]
+        store.max_bytes = 7000
+        await store.run(store.maintain)
+        compacted = (await store.run(store.describe))["file_bytes"]
+        checks[f"eviction compacted ({before // 1024} KiB -> {compacted // 1024} KiB)"] = (
+            compacted < before / 2 and store.stats["compactions"] >= 1
+        )
+        await store.stop()
+
+        reopened = ResultStore(path, tools=[report, "run-agent-task"], max_bytes=7000)
+        checks["results survive a restart"] = reopened.lookup(report, {"topic": "bulk-199"}) is not None
+        reopened.close()
+        return checks
+
+    with tempfile.TemporaryDirectory() as directory:
+        checks = asyncio.run(run(os.path.join(directory, "results.db")))
+    for name, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {name}")
+    return all(checks.values())
+
+def test_shared_rate_limit():
+    """Test that workers sharing state hold a client to one rate in total
+
+    Three limiters on one throwaway side store stand in for three workers.
+    """
+    print("\n🚦 Testing shared rate limiting...")
+
+    async def run(path: str) -> Dict[str, bool]:
+        checks = {}
+        state = SharedState(path)
+        workers = [SharedRateLimiter(state, rate=10, burst=10, sync_interval=0.05) for _ in range(3)]
+        for worker in workers:
+            await worker.start()
+
+        admitted = 0
+        slowest = 0.0
+        start = time.monotonic()
+        while time.monotonic() - start < 2.5:
+            for worker in workers:
+                began = time.perf_counter()
+                admitted += worker.check("ip:noisy") == 0
+                slowest = max(slowest, time.perf_counter() - began)
+            await asyncio.sleep(0.002)
+        # One limiter would admit its burst of 10 and 25 more over 2.5s, three
+        # separate ones three times that. Each worker lets a new client burst
+        # before the first sync, and the debt is paid back before more get in.
+        checks[f"one rate across workers ({admitted} admitted)"] = 25 <= admitted <= 45
+        checks[f"checks stay in memory ({slowest * 1e6:.0f}µs worst)"] = slowest < 0.005
+        checks["other clients unaffected"] = workers[0].check("ip:quiet") == 0
+
+        for worker in workers:
+            await worker.stop()
+        state.close()
+        return checks
+
+    with tempfile.TemporaryDirectory() as directory:
+        checks = asyncio.run(run(os.path.join(directory, "shared.db")))
+    for name, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {name}")
+    return all(checks.values())
+
 def main():
     """Run all tests"""
     print("🐼 PandaAGI MCP Client API Test Suite")
@@ -190,11 +644,23 @@ def main():
         test_list_tools,
         test_create_agent,
         test_run_task,
+        test_stream_task,
         test_generate_report,
         test_create_dashboard,
         test_deploy_webapp,
+        test_batch_tools,
+        test_invalid_tool_args,
+        test_jobs,
+        test_artifact_range,
         test_list_resources,
-        test_read_resource
+        test_read_resource,
+        test_resource_etag,
+        test_search_resources,
+        test_retry_and_breaker,
+        test_upstream_balancing,
+        test_compression_cache,
+        test_result_store,
+        test_shared_rate_limit
     ]
     
     passed = 0
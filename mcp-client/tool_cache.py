@@ -0,0 +1,125 @@
+"""
+Opt-in result cache for deterministic MCP tools.
+
+Tools that only template output from their arguments can be answered from
+memory for repeated calls. Entries are keyed on the canonical JSON of the
+arguments and evicted least-recently-used once the entry or byte budget is
+exceeded, or when their per-tool TTL runs out.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from mcp_cache import canonical_json
+
+# Tools whose output is a pure function of their arguments
+DEFAULT_CACHEABLE_TOOLS = ("generate-analysis-report", "create-dashboard", "deploy-web-app")
+
+# Tools with side effects are never cached, whatever the configuration says
+NON_IDEMPOTENT_TOOLS = frozenset({"create-agent", "run-agent-task"})
+
+
+def parse_policies(spec: Optional[str], default_ttl: float) -> Dict[str, float]:
+    """Parse ``"create-dashboard=600,deploy-web-app"`` into a tool -> TTL map"""
+    policies: Dict[str, float] = {}
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, ttl = item.partition("=")
+        policies[name.strip()] = float(ttl) if ttl else default_ttl
+    return policies
+
+
+class ToolResultCache:
+    """LRU + TTL cache of tool results bounded by entry count and bytes"""
+
+    def __init__(
+        self,
+        policies: Dict[str, float],
+        max_entries: int = 1000,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.policies = {name: ttl for name, ttl in policies.items() if name not in NON_IDEMPOTENT_TOOLS}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        # key -> (result, size, expires_at)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Dict[str, Any], int, float]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    @classmethod
+    def from_env(cls) -> "ToolResultCache":
+        """Build the cache from ``TOOL_CACHE_*`` variables; disabled unless opted in"""
+        policies: Dict[str, float] = {}
+        if os.getenv("TOOL_CACHE_ENABLED", "false").lower() in ("1", "true", "yes"):
+            default_ttl = float(os.getenv("TOOL_CACHE_TTL", "300"))
+            policies = parse_policies(
+                os.getenv("TOOL_CACHE_TOOLS", ",".join(DEFAULT_CACHEABLE_TOOLS)), default_ttl
+            )
+        return cls(
+            policies,
+            max_entries=int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1000")),
+            max_bytes=int(os.getenv("TOOL_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        )
+
+    def cacheable(self, name: str) -> bool:
+        return name in self.policies
+
+    @staticmethod
+    def key(name: str, args: Dict[str, Any]) -> Tuple[str, str]:
+        return name, canonical_json(args or {})
+
+    def get(self, name: str, args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Cached result for a call, or ``None``"""
+        if not self.cacheable(name):
+            return None
+        key = self.key(name, args)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        if entry[2] <= time.monotonic():
+            self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry[0]
+
+    def put(self, name: str, args: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """Store a result if the tool's policy allows it and it fits the budget"""
+        if not self.cacheable(name):
+            return
+        size = len(canonical_json(result).encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        key = self.key(name, args)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (result, size, time.monotonic() + self.policies[name])
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "policies": dict(self.policies),
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "stats": dict(self.stats),
+        }
@@ -0,0 +1,265 @@
+"""
+Tool-argument validation from the JSON Schemas published by ``mcp/listTools``.
+
+Each schema is compiled once into a tree of small checking functions, so a
+call costs a few dict lookups and ``isinstance`` checks instead of an
+upstream round trip that only comes back with -32602. The compiled set is
+keyed by catalog version and rebuilt only when the catalog changes.
+
+The subset covered is what tool schemas actually use: ``type``, ``enum``,
+``const``, ``properties``, ``required``, ``additionalProperties``, ``items``,
+string and array length bounds, numeric bounds and ``pattern``. Keywords
+outside it are ignored, so an unfamiliar schema can only make the check
+more lenient, never reject a call the server would accept.
+
+Violations are reported in the shape FastAPI uses for its own 422 errors.
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+Loc = Tuple[Any, ...]
+Errors = List[Dict[str, Any]]
+Check = Callable[[Any, Loc, Errors], None]
+
+# JSON Schema type -> Python types; bool is an int subclass and is excluded below
+JSON_TYPES: Dict[str, Tuple[type, ...]] = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "array": (list, tuple),
+    "object": (dict,),
+    "null": (type(None),),
+}
+
+TYPE_NAMES = {
+    "string": "a valid string",
+    "integer": "a valid integer",
+    "number": "a valid number",
+    "boolean": "a valid boolean",
+    "array": "a valid list",
+    "object": "a valid dictionary",
+    "null": "None",
+}
+
+
+def _error(errors: Errors, loc: Loc, type_: str, msg: str, value: Any) -> None:
+    errors.append({"type": type_, "loc": list(loc), "msg": msg, "input": value})
+
+
+def _is_type(value: Any, name: str) -> bool:
+    if isinstance(value, bool) and name in ("integer", "number"):
+        return False
+    if name == "integer" and isinstance(value, float):
+        return value.is_integer()
+    return isinstance(value, JSON_TYPES.get(name, object))
+
+
+def compile_schema(schema: Any) -> Check:
+    """Checking function for ``schema``; it appends violations to ``errors``"""
+    if schema is False:
+        return _reject
+    if not isinstance(schema, dict):
+        return _accept
+
+    checks: List[Check] = []
+    types = schema.get("type")
+    if types is not None:
+        checks.append(_type_check([types] if isinstance(types, str) else list(types)))
+    if "enum" in schema:
+        checks.append(_enum_check(schema["enum"]))
+    if "const" in schema:
+        checks.append(_enum_check([schema["const"]]))
+
+    bounds = [(key, schema[key]) for key in ("minLength", "maxLength") if key in schema]
+    if bounds or "pattern" in schema:
+        checks.append(_string_check(bounds, schema.get("pattern")))
+    bounds = [(key, schema[key]) for key in ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum")
+              if key in schema]
+    if bounds:
+        checks.append(_number_check(bounds))
+    if "items" in schema or "minItems" in schema or "maxItems" in schema:
+        checks.append(_array_check(schema.get("items", True), schema.get("minItems"), schema.get("maxItems")))
+    if "properties" in schema or "required" in schema or "additionalProperties" in schema:
+        checks.append(_object_check(
+            schema.get("properties") or {}, schema.get("required") or (), schema.get("additionalProperties", True)
+        ))
+
+    if not checks:
+        return _accept
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value: Any, loc: Loc, errors: Errors) -> None:
+        for check in checks:
+            check(value, loc, errors)
+    return check_all
+
+
+def _accept(value: Any, loc: Loc, errors: Errors) -> None:
+    pass
+
+
+def _reject(value: Any, loc: Loc, errors: Errors) -> None:
+    _error(errors, loc, "extra_forbidden", "Extra inputs are not permitted", value)
+
+
+def _type_check(types: Sequence[str]) -> Check:
+    msg = "Input should be " + " or ".join(TYPE_NAMES.get(name, name) for name in types)
+    error_type = f"{types[0]}_type" if len(types) == 1 else "type_error"
+    # Exact Python types that pass outright; subclasses and integral floats
+    # for "integer" take the slow path
+    exact = frozenset(
+        python_type
+        for name in types
+        for python_type in JSON_TYPES.get(name, ())
+        if name == "boolean" or python_type is not bool
+    )
+
+    def check(value: Any, loc: Loc, errors: Errors) -> None:
+        if type(value) not in exact and not any(_is_type(value, name) for name in types):
+            _error(errors, loc, error_type, msg, value)
+    return check
+
+
+def _enum_check(options: Sequence[Any]) -> Check:
+    msg = "Input should be " + (" or ".join(repr(option) for option in options) if options else "nothing")
+    if all(isinstance(option, str) for option in options):
+        allowed = frozenset(options)
+
+        def check(value: Any, loc: Loc, errors: Errors) -> None:
+            if not isinstance(value, str) or value not in allowed:
+                _error(errors, loc, "enum", msg, value)
+        return check
+
+    def check_any(value: Any, loc: Loc, errors: Errors) -> None:
+        if not any(_json_equal(value, option) for option in options):
+            _error(errors, loc, "enum", msg, value)
+    return check_any
+
+
+def _json_equal(a: Any, b: Any) -> bool:
+    # In JSON true is not 1, though Python says otherwise
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    return a == b
+
+
+def _string_check(bounds: Sequence[Tuple[str, int]], pattern: Optional[str]) -> Check:
+    regex = re.compile(pattern) if pattern else None
+
+    def check(value: Any, loc: Loc, errors: Errors) -> None:
+        if not isinstance(value, str):
+            return
+        for key, bound in bounds:
+            if key == "minLength" and len(value) < bound:
+                _error(errors, loc, "string_too_short", f"String should have at least {bound} characters", value)
+            elif key == "maxLength" and len(value) > bound:
+                _error(errors, loc, "string_too_long", f"String should have at most {bound} characters", value)
+        if regex is not None and not regex.search(value):
+            _error(errors, loc, "string_pattern_mismatch", f"String should match pattern '{pattern}'", value)
+    return check
+
+
+def _number_check(bounds: Sequence[Tuple[str, float]]) -> Check:
+    tests = {
+        "minimum": (lambda v, b: v >= b, "greater_than_equal", "greater than or equal to"),
+        "maximum": (lambda v, b: v <= b, "less_than_equal", "less than or equal to"),
+        "exclusiveMinimum": (lambda v, b: v > b, "greater_than", "greater than"),
+        "exclusiveMaximum": (lambda v, b: v < b, "less_than", "less than"),
+    }
+    compiled = [(tests[key], bound) for key, bound in bounds if isinstance(bound, (int, float))]
+
+    def check(value: Any, loc: Loc, errors: Errors) -> None:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return
+        for (test, error_type, words), bound in compiled:
+            if not test(value, bound):
+                _error(errors, loc, error_type, f"Input should be {words} {bound}", value)
+    return check
+
+
+def _array_check(items: Any, min_items: Optional[int], max_items: Optional[int]) -> Check:
+    item_check = compile_schema(items)
+    check_items = item_check is not _accept
+
+    def check(value: Any, loc: Loc, errors: Errors) -> None:
+        if not isinstance(value, (list, tuple)):
+            return
+        if min_items is not None and len(value) < min_items:
+            _error(errors, loc, "too_short", f"List should have at least {min_items} items", value)
+        if max_items is not None and len(value) > max_items:
+            _error(errors, loc, "too_long", f"List should have at most {max_items} items", value)
+        if check_items:
+            for index, item in enumerate(value):
+                item_check(item, loc + (index,), errors)
+    return check
+
+
+def _object_check(properties: Dict[str, Any], required: Sequence[str], additional: Any) -> Check:
+    compiled = {name: compile_schema(sub) for name, sub in properties.items()}
+    # Only properties with something to check are visited per call
+    active = {name: check for name, check in compiled.items() if check is not _accept}
+    required = tuple(required)
+    forbid_extra = additional is False
+    extra_check = None if additional in (True, False) else compile_schema(additional)
+
+    def check(value: Any, loc: Loc, errors: Errors) -> None:
+        if not isinstance(value, dict):
+            return
+        for name in required:
+            if name not in value:
+                _error(errors, loc + (name,), "missing", "Field required", value)
+        for name, item in value.items():
+            prop_check = active.get(name)
+            if prop_check is not None:
+                prop_check(item, loc + (name,), errors)
+            elif name in compiled:
+                continue
+            elif forbid_extra:
+                _error(errors, loc + (name,), "extra_forbidden", "Extra inputs are not permitted", item)
+            elif extra_check is not None:
+                extra_check(item, loc + (name,), errors)
+    return check
+
+
+class ToolValidators:
+    """Compiled argument checks for every tool in a catalog, rebuilt per catalog version"""
+
+    def __init__(self):
+        self.catalog_version: Optional[str] = None
+        self._checks: Dict[str, Check] = {}
+        self.stats = {"compiles": 0, "validated": 0, "rejected": 0, "unknown": 0}
+
+    def load(self, catalog: Dict[str, Any], version: str) -> None:
+        """Compile the schemas of ``catalog`` unless ``version`` is already loaded"""
+        if version == self.catalog_version:
+            return
+        checks = {}
+        for tool in catalog.get("tools", []):
+            schema = tool.get("schema") or tool.get("inputSchema")
+            checks[tool["name"]] = compile_schema(schema if schema is not None else True)
+        self._checks = checks
+        self.catalog_version = version
+        self.stats["compiles"] += 1
+
+    def validate(self, name: str, args: Any, loc: Loc = ("args",)) -> Optional[Errors]:
+        """Violations of ``args`` against ``name``'s schema; ``None`` if the tool isn't listed
+
+        Unknown tools are left to the server, which may have been deployed
+        with tools the cached catalog doesn't list yet.
+        """
+        check = self._checks.get(name)
+        if check is None:
+            self.stats["unknown"] += 1
+            return None
+        errors: Errors = []
+        check(args, loc, errors)
+        self.stats["validated"] += 1
+        if errors:
+            self.stats["rejected"] += 1
+        return errors
+
+    def describe(self) -> Dict[str, Any]:
+        return {"catalog_version": self.catalog_version, "tools": len(self._checks), **self.stats}
@@ -0,0 +1,154 @@
+"""
+Load balancing across several MCP server deployments.
+
+Each call goes to the upstream with the lowest ``(outstanding + 1) * EWMA
+latency`` score, so slow or busy deployments receive less traffic without
+being starved of the samples that would show them recovering. Upstreams that
+fail repeatedly are ejected for a cool-down that doubles on every relapse
+and are re-admitted on probation once it runs out. Recent latencies also
+give the hedging delay: the point past which an idempotent call is worth
+duplicating on another upstream.
+"""
+
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+
+class Upstream:
+    """One MCP server URL and its load and latency statistics"""
+
+    def __init__(self, url: str, initial_latency: float = 0.1):
+        self.url = url
+        self.outstanding = 0
+        self.ewma = initial_latency
+        self.failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.stats = {"requests": 0, "errors": 0, "hedges": 0}
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def score(self) -> float:
+        # Untried upstreams go first: until it has a sample, the initial
+        # latency is a guess that could keep the fastest one idle forever
+        if not self.stats["requests"]:
+            return 0.0
+        return (self.outstanding + 1) * self.ewma
+
+    def describe(self, now: float) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "available": self.available(now),
+            "outstanding": self.outstanding,
+            "ewma_ms": round(self.ewma * 1000, 3),
+            "consecutive_failures": self.failures,
+            "ejected_for": round(max(0.0, self.ejected_until - now), 3),
+            "ejections": self.ejections,
+            **self.stats,
+        }
+
+
+class UpstreamPool:
+    """Least-loaded, latency-aware choice among upstreams with passive ejection"""
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        alpha: float = 0.3,
+        eject_after: int = 3,
+        eject_seconds: float = 30.0,
+        max_eject_seconds: float = 300.0,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 20,
+        window: int = 500,
+    ):
+        if not urls:
+            raise ValueError("At least one upstream URL is required")
+        self.upstreams = [Upstream(url) for url in urls]
+        self.alpha = alpha
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.max_eject_seconds = max_eject_seconds
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        # Recent successful latencies across all upstreams, for the hedge delay
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+    @classmethod
+    def from_env(cls, urls: Sequence[str]) -> "UpstreamPool":
+        hedge = os.getenv("MCP_HEDGE_PERCENTILE")
+        return cls(
+            urls,
+            alpha=float(os.getenv("MCP_EWMA_ALPHA", "0.3")),
+            eject_after=int(os.getenv("MCP_EJECT_AFTER", "3")),
+            eject_seconds=float(os.getenv("MCP_EJECT_SECONDS", "30")),
+            max_eject_seconds=float(os.getenv("MCP_EJECT_MAX_SECONDS", "300")),
+            hedge_percentile=float(hedge) if hedge else None,
+        )
+
+    def pick(self, exclude: Sequence[Upstream] = ()) -> Optional[Upstream]:
+        """Best available upstream not in ``exclude``
+
+        When every candidate is ejected, the one due back first is used anyway:
+        failing open beats refusing all traffic.
+        """
+        candidates = [u for u in self.upstreams if u not in exclude]
+        if not candidates:
+            return None
+        now = time.monotonic()
+        available = [u for u in candidates if u.available(now)]
+        if not available:
+            return min(candidates, key=lambda u: u.ejected_until)
+        best = min(u.score() for u in available)
+        return random.choice([u for u in available if u.score() == best])
+
+    def acquire(self, upstream: Upstream) -> Upstream:
+        """Count a call as in flight on ``upstream`` until it is released"""
+        upstream.outstanding += 1
+        upstream.stats["requests"] += 1
+        return upstream
+
+    def release(self, upstream: Upstream, latency: Optional[float], ok: bool) -> None:
+        """Record a finished call; ``latency`` is ``None`` for abandoned hedges"""
+        upstream.outstanding -= 1
+        if latency is None:
+            return
+        if ok:
+            upstream.ewma += self.alpha * (latency - upstream.ewma)
+            upstream.failures = 0
+            upstream.ejections = 0
+            self._latencies.append(latency)
+            return
+
+        upstream.stats["errors"] += 1
+        now = time.monotonic()
+        if not upstream.available(now):
+            # Sent before the ejection; it already counted towards it
+            return
+        upstream.failures += 1
+        # Failures are slow as far as routing is concerned
+        upstream.ewma += self.alpha * (max(latency, upstream.ewma * 2) - upstream.ewma)
+        # An upstream back on probation is ejected again on its first failure
+        if upstream.failures >= self.eject_after or (upstream.ejections and upstream.ejected_until <= now):
+            cooldown = min(self.max_eject_seconds, self.eject_seconds * 2 ** upstream.ejections)
+            upstream.ejected_until = now + cooldown
+            upstream.ejections += 1
+            upstream.failures = 0
+            # Come back as fast as the best peer so probation sees real traffic
+            upstream.ewma = min(u.ewma for u in self.upstreams)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or ``None`` when hedging is off or unwarmed"""
+        if not self.hedge_percentile or len(self.upstreams) < 2 or len(self._latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        rank = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))
+        return ordered[rank]
+
+    def describe(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [upstream.describe(now) for upstream in self.upstreams]
@@ -12,7 +12,16 @@
  * - Code execution and deployment
  */
 
+const crypto = require('crypto');
+const fs = require('fs');
+const path = require('path');
+const zlib = require('zlib');
+
 exports.handler = async (event, context) => {
+  return compressResponse(handleRequest(event), event.headers || {});
+};
+
+function handleRequest(event) {
   // Only handle POST requests
   if (event.httpMethod !== 'POST') {
     return {
@@ -42,38 +51,13 @@ exports.handler = async (event, context) => {
 
   try {
     const request = JSON.parse(event.body);
-    const { method, params, id } = request;
 
-    switch (method) {
-      case 'mcp/init':
-        return handleInit(id);
-      
-      case 'mcp/listTools':
-        return handleListTools(id);
-      
-      case 'mcp/callTool':
-        return handleCallTool(params, id);
-      
-      case 'mcp/listResources':
-        return handleListResources(id);
-      
-      case 'mcp/readResource':
-        return handleReadResource(params, id);
-      
-      default:
-        return {
-          statusCode: 400,
-          headers: {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-          },
-          body: JSON.stringify({
-            jsonrpc: "2.0",
-            error: { code: -32601, message: "Method not found" },
-            id
-          })
-        };
+    if (Array.isArray(request)) {
+      return handleBatch(request);
     }
+
+    const { method, params, id } = request;
+    return dispatch(method, params, id, { allowStream: true });
   } catch (error) {
     return {
       statusCode: 500,
@@ -88,193 +72,361 @@ exports.handler = async (event, context) => {
       })
     };
   }
-};
+}
+
+const MAX_BATCH_SIZE = 100;
+
+// Maximum characters of tool output per streamed progress message
+const STREAM_CHUNK_SIZE = 512;
+
+function dispatch(method, params, id, options = {}) {
+  switch (method) {
+    case 'mcp/init':
+      return handleInit(id);
+    
+    case 'mcp/listTools':
+      return handleListTools(id);
+    
+    case 'mcp/callTool': {
+      const response = handleCallTool(params, id);
+      // Streaming only makes sense for a standalone call, not inside a batch
+      if (options.allowStream && params && params.stream && response.statusCode === 200) {
+        return streamToolResponse(response, id);
+      }
+      return response;
+    }
+    
+    case 'mcp/listResources':
+      return handleListResources(id);
+    
+    case 'mcp/readResource':
+      return handleReadResource(params, id);
+    
+    default:
+      return {
+        statusCode: 400,
+        headers: {
+          'Content-Type': 'application/json',
+          'Access-Control-Allow-Origin': '*'
+        },
+        body: JSON.stringify({
+          jsonrpc: "2.0",
+          error: { code: -32601, message: "Method not found" },
+          id
+        })
+      };
+  }
+}
+
+// Re-encode a tool result as NDJSON: one notifications/progress message per
+// chunk of output, followed by the final response carrying no content. A
+// Netlify function returns its body whole, so the lines are all rendered
+// before anything is sent; this is the stream format, not incremental delivery.
+function streamToolResponse(response, id) {
+  const { result } = JSON.parse(response.body);
+  const chunks = [];
+
+  for (const item of result.content || []) {
+    const textLines = item.text.split("\n");
+    let chunk = "";
+    textLines.forEach((line, index) => {
+      const piece = index < textLines.length - 1 ? line + "\n" : line;
+      if (chunk && chunk.length + piece.length > STREAM_CHUNK_SIZE) {
+        chunks.push({ type: item.type, text: chunk });
+        chunk = "";
+      }
+      chunk += piece;
+    });
+    if (chunk) {
+      chunks.push({ type: item.type, text: chunk });
+    }
+  }
+
+  const lines = chunks.map((chunk, index) => JSON.stringify({
+    jsonrpc: "2.0",
+    method: "notifications/progress",
+    params: {
+      requestId: id,
+      progress: index + 1,
+      total: chunks.length,
+      content: [chunk]
+    }
+  }));
+  lines.push(JSON.stringify({
+    jsonrpc: "2.0",
+    result: { content: [], streamed: true, chunks: chunks.length },
+    id
+  }));
 
-function handleInit(id) {
   return {
     statusCode: 200,
     headers: {
-      'Content-Type': 'application/json',
+      'Content-Type': 'application/x-ndjson',
       'Access-Control-Allow-Origin': '*'
     },
-    body: JSON.stringify({
-      jsonrpc: "2.0",
-      result: {
-        protocolVersion: "2024-11-05",
-        capabilities: {
-          tools: {},
-          resources: {}
-        },
-        serverInfo: {
-          name: "pandaagi-mcp-server",
-          version: "1.0.0",
-          description: "MCP server for PandaAGI - Agentic General Intelligence"
-        }
-      },
-      id
-    })
+    body: lines.join("\n") + "\n"
   };
 }
 
-function handleListTools(id) {
+// JSON-RPC 2.0 batch: one response object per call that carries an id
+function handleBatch(requests) {
+  if (requests.length === 0 || requests.length > MAX_BATCH_SIZE) {
+    return {
+      statusCode: 400,
+      headers: {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*'
+      },
+      body: JSON.stringify({
+        jsonrpc: "2.0",
+        error: {
+          code: -32600,
+          message: requests.length === 0 ? "Invalid Request: empty batch" : `Invalid Request: batch exceeds ${MAX_BATCH_SIZE} calls`
+        },
+        id: null
+      })
+    };
+  }
+
+  const responses = [];
+
+  for (const request of requests) {
+    if (!request || typeof request !== 'object' || typeof request.method !== 'string') {
+      responses.push({
+        jsonrpc: "2.0",
+        error: { code: -32600, message: "Invalid Request" },
+        id: null
+      });
+      continue;
+    }
+
+    const id = request.id === undefined ? null : request.id;
+    let response;
+    try {
+      response = JSON.parse(dispatch(request.method, request.params || {}, id).body);
+    } catch (error) {
+      response = {
+        jsonrpc: "2.0",
+        error: { code: -32603, message: "Internal error: " + error.message },
+        id
+      };
+    }
+
+    // Notifications (no id) are executed but not answered
+    if (request.id !== undefined) {
+      responses.push(response);
+    }
+  }
+
+  if (responses.length === 0) {
+    return {
+      statusCode: 204,
+      headers: {
+        'Access-Control-Allow-Origin': '*'
+      },
+      body: ''
+    };
+  }
+
   return {
     statusCode: 200,
     headers: {
       'Content-Type': 'application/json',
       'Access-Control-Allow-Origin': '*'
     },
-    body: JSON.stringify({
-      jsonrpc: "2.0",
-      result: {
-        tools: [
-          {
-            name: "create-agent",
-            description: "Create a new PandaAGI agent with specified configuration",
-            schema: {
-              type: "object",
-              properties: {
-                name: {
-                  type: "string",
-                  description: "Name for the agent"
-                },
-                environment: {
-                  type: "string",
-                  enum: ["local", "docker"],
-                  description: "Execution environment for the agent",
-                  default: "local"
-                },
-                workspace_path: {
-                  type: "string",
-                  description: "Path to the agent's workspace directory",
-                  default: "./agent_workspace"
-                }
-              },
-              required: ["name"],
-              additionalProperties: false
-            }
+    body: JSON.stringify(responses)
+  };
+}
+
+// Catalog results never change within a deploy, so they are serialized once
+// at module load and each response only splices in the request id.
+const INIT_RESULT = JSON.stringify({
+  protocolVersion: "2024-11-05",
+  capabilities: {
+    tools: {},
+    resources: {}
+  },
+  serverInfo: {
+    name: "pandaagi-mcp-server",
+    version: "1.0.0",
+    description: "MCP server for PandaAGI - Agentic General Intelligence"
+  }
+});
+
+const LIST_TOOLS_RESULT = JSON.stringify({
+  tools: [
+    {
+      name: "create-agent",
+      description: "Create a new PandaAGI agent with specified configuration",
+      schema: {
+        type: "object",
+        properties: {
+          name: {
+            type: "string",
+            description: "Name for the agent"
           },
-          {
-            name: "run-agent-task",
-            description: "Execute a task using a PandaAGI agent",
-            schema: {
-              type: "object",
-              properties: {
-                task: {
-                  type: "string",
-                  description: "The task or instruction for the agent to execute"
-                },
-                agent_name: {
-                  type: "string",
-                  description: "Name of the agent to use (optional, will create default if not specified)"
-                },
-                environment: {
-                  type: "string",
-                  enum: ["local", "docker"],
-                  description: "Execution environment",
-                  default: "local"
-                },
-                workspace_path: {
-                  type: "string",
-                  description: "Workspace directory path",
-                  default: "./agent_workspace"
-                }
-              },
-              required: ["task"],
-              additionalProperties: false
-            }
+          environment: {
+            type: "string",
+            enum: ["local", "docker"],
+            description: "Execution environment for the agent",
+            default: "local"
           },
-          {
-            name: "generate-analysis-report",
-            description: "Generate an analysis report using PandaAGI's data analysis capabilities",
-            schema: {
-              type: "object",
-              properties: {
-                topic: {
-                  type: "string",
-                  description: "Topic or subject for the analysis report"
-                },
-                data_sources: {
-                  type: "array",
-                  items: {
-                    type: "string"
-                  },
-                  description: "List of data sources or keywords for research"
-                },
-                report_type: {
-                  type: "string",
-                  enum: ["market_analysis", "competitive_analysis", "trend_analysis", "general"],
-                  description: "Type of analysis report to generate",
-                  default: "general"
-                }
-              },
-              required: ["topic"],
-              additionalProperties: false
-            }
+          workspace_path: {
+            type: "string",
+            description: "Path to the agent's workspace directory",
+            default: "./agent_workspace"
+          }
+        },
+        required: ["name"],
+        additionalProperties: false
+      }
+    },
+    {
+      name: "run-agent-task",
+      description: "Execute a task using a PandaAGI agent",
+      schema: {
+        type: "object",
+        properties: {
+          task: {
+            type: "string",
+            description: "The task or instruction for the agent to execute"
           },
-          {
-            name: "create-dashboard",
-            description: "Create a data visualization dashboard using PandaAGI",
-            schema: {
-              type: "object",
-              properties: {
-                data_description: {
-                  type: "string",
-                  description: "Description of the data to visualize"
-                },
-                dashboard_type: {
-                  type: "string",
-                  enum: ["sales", "analytics", "performance", "custom"],
-                  description: "Type of dashboard to create",
-                  default: "custom"
-                },
-                chart_types: {
-                  type: "array",
-                  items: {
-                    type: "string",
-                    enum: ["line", "bar", "pie", "scatter", "heatmap", "table"]
-                  },
-                  description: "Preferred chart types for the dashboard"
-                }
-              },
-              required: ["data_description"],
-              additionalProperties: false
-            }
+          agent_name: {
+            type: "string",
+            description: "Name of the agent to use (optional, will create default if not specified)"
           },
-          {
-            name: "deploy-web-app",
-            description: "Deploy a web application using PandaAGI's deployment capabilities",
-            schema: {
-              type: "object",
-              properties: {
-                app_description: {
-                  type: "string",
-                  description: "Description of the web application to create and deploy"
-                },
-                app_type: {
-                  type: "string",
-                  enum: ["streamlit", "flask", "fastapi", "static"],
-                  description: "Type of web application framework",
-                  default: "streamlit"
-                },
-                features: {
-                  type: "array",
-                  items: {
-                    type: "string"
-                  },
-                  description: "List of features to include in the application"
-                }
-              },
-              required: ["app_description"],
-              additionalProperties: false
-            }
+          environment: {
+            type: "string",
+            enum: ["local", "docker"],
+            description: "Execution environment",
+            default: "local"
+          },
+          workspace_path: {
+            type: "string",
+            description: "Workspace directory path",
+            default: "./agent_workspace"
           }
-        ]
-      },
-      id
-    })
+        },
+        required: ["task"],
+        additionalProperties: false
+      }
+    },
+    {
+      name: "generate-analysis-report",
+      description: "Generate an analysis report using PandaAGI's data analysis capabilities",
+      schema: {
+        type: "object",
+        properties: {
+          topic: {
+            type: "string",
+            description: "Topic or subject for the analysis report"
+          },
+          data_sources: {
+            type: "array",
+            items: {
+              type: "string"
+            },
+            description: "List of data sources or keywords for research"
+          },
+          report_type: {
+            type: "string",
+            enum: ["market_analysis", "competitive_analysis", "trend_analysis", "general"],
+            description: "Type of analysis report to generate",
+            default: "general"
+          }
+        },
+        required: ["topic"],
+        additionalProperties: false
+      }
+    },
+    {
+      name: "create-dashboard",
+      description: "Create a data visualization dashboard using PandaAGI",
+      schema: {
+        type: "object",
+        properties: {
+          data_description: {
+            type: "string",
+            description: "Description of the data to visualize"
+          },
+          dashboard_type: {
+            type: "string",
+            enum: ["sales", "analytics", "performance", "custom"],
+            description: "Type of dashboard to create",
+            default: "custom"
+          },
+          chart_types: {
+            type: "array",
+            items: {
+              type: "string",
+              enum: ["line", "bar", "pie", "scatter", "heatmap", "table"]
+            },
+            description: "Preferred chart types for the dashboard"
+          }
+        },
+        required: ["data_description"],
+        additionalProperties: false
+      }
+    },
+    {
+      name: "deploy-web-app",
+      description: "Deploy a web application using PandaAGI's deployment capabilities",
+      schema: {
+        type: "object",
+        properties: {
+          app_description: {
+            type: "string",
+            description: "Description of the web application to create and deploy"
+          },
+          app_type: {
+            type: "string",
+            enum: ["streamlit", "flask", "fastapi", "static"],
+            description: "Type of web application framework",
+            default: "streamlit"
+          },
+          features: {
+            type: "array",
+            items: {
+              type: "string"
+            },
+            description: "List of features to include in the application"
+          }
+        },
+        required: ["app_description"],
+        additionalProperties: false
+      }
+    }
+  ]
+});
+
+// JSON-RPC response body around an already serialized result
+function resultBody(resultJson, id) {
+  const idJson = id === undefined ? '' : ',"id":' + JSON.stringify(id);
+  return '{"jsonrpc":"2.0","result":' + resultJson + idJson + '}';
+}
+
+// Response for an already serialized result that never changes. Everything
+// before the id is marked as static so it is compressed only once.
+function staticResultResponse(resultJson, id) {
+  return {
+    statusCode: 200,
+    headers: {
+      'Content-Type': 'application/json',
+      'Access-Control-Allow-Origin': '*'
+    },
+    body: resultBody(resultJson, id),
+    staticPrefix: '{"jsonrpc":"2.0","result":' + resultJson
   };
 }
 
+function handleInit(id) {
+  return staticResultResponse(INIT_RESULT, id);
+}
+
+function handleListTools(id) {
+  return staticResultResponse(LIST_TOOLS_RESULT, id);
+}
+
 function handleCallTool(params, id) {
   const { name, args } = params;
   
@@ -390,17 +542,18 @@ async def run_task():
     # Create the agent
     agent = Agent(environment=agent_env)
     
-    # Execute the task
-    print(f"Executing task: ${task}")
-    response = agent.run("${task}")
-    
-    print("Task completed!")
-    print("Response:", response.output)
+    try:
+        # Execute the task
+        print(f"Executing task: ${task}")
+        response = agent.run("${task}")
     
-    # Cleanup
-    await agent.disconnect()
+        print("Task completed!")
+        print("Response:", response.output)
     
-    return response
+        return response
+    finally:
+        # Cleanup, also when the task fails
+        await agent.disconnect()
 
 # Run the task
 if __name__ == "__main__":
@@ -434,13 +587,15 @@ if __name__ == "__main__":
 }
 
 function handleGenerateAnalysisReport(args, id) {
-  const { topic, data_sources = [], report_type = "general" } = args;
+  const { topic, report_type = "general" } = args;
+  // An explicit null means the same as leaving the field out
+  const data_sources = args.data_sources ?? [];
   
+  // Arguments only: the output is cached and replayed, so no timestamps
   const reportConfig = {
     topic: topic,
     report_type: report_type,
-    data_sources: data_sources,
-    generated_at: new Date().toISOString()
+    data_sources: data_sources
   };
 
   const pythonCode = `
@@ -509,7 +664,8 @@ if __name__ == "__main__":
 }
 
 function handleCreateDashboard(args, id) {
-  const { data_description, dashboard_type = "custom", chart_types = ["line", "bar"] } = args;
+  const { data_description, dashboard_type = "custom" } = args;
+  const chart_types = args.chart_types ?? ["line", "bar"];
   
   const pythonCode = `
 # Create Dashboard with PandaAGI
@@ -579,7 +735,8 @@ if __name__ == "__main__":
 }
 
 function handleDeployWebApp(args, id) {
-  const { app_description, app_type = "streamlit", features = [] } = args;
+  const { app_description, app_type = "streamlit" } = args;
+  const features = args.features ?? [];
   
   const pythonCode = `
 # Deploy Web App with PandaAGI
@@ -649,403 +806,257 @@ if __name__ == "__main__":
   };
 }
 
+// Documentation served as resources. Each document lives in its own markdown
+// file and is only read from disk the first time it is needed.
+const RESOURCES = [
+  { name: "PandaAGI Documentation", uri: "docs://pandaagi-docs", file: "pandaagi-docs.md" },
+  { name: "PandaAGI Quick Start Guide", uri: "docs://pandaagi-quickstart", file: "pandaagi-quickstart.md" },
+  { name: "Agent Best Practices", uri: "docs://agent-best-practices", file: "agent-best-practices.md" },
+  { name: "PandaAGI Examples", uri: "docs://pandaagi-examples", file: "pandaagi-examples.md" }
+];
+
+const RESOURCES_DIR = process.env.RESOURCES_DIR || path.join(__dirname, '..', 'resources');
+const resourceFiles = new Map(RESOURCES.map(resource => [resource.uri, resource.file]));
+
+// Document text, content hashes and serialized read results are memoized per
+// warm instance
+const resourceContents = new Map();
+const resourceHashes = new Map();
+const readResourceResults = new Map();
+
+// Listing needs every document's hash, so it is serialized on first use
+let listResourcesResult = null;
+
 function handleListResources(id) {
-  return {
-    statusCode: 200,
-    headers: {
-      'Content-Type': 'application/json',
-      'Access-Control-Allow-Origin': '*'
-    },
-    body: JSON.stringify({
-      jsonrpc: "2.0",
-      result: {
-        resources: [
-          {
-            name: "PandaAGI Documentation",
-            uri: "docs://pandaagi-docs",
-            metadata: {
-              mimeType: "text/markdown"
-            }
-          },
-          {
-            name: "PandaAGI Quick Start Guide",
-            uri: "docs://pandaagi-quickstart",
-            metadata: {
-              mimeType: "text/markdown"
-            }
-          },
-          {
-            name: "Agent Best Practices",
-            uri: "docs://agent-best-practices",
-            metadata: {
-              mimeType: "text/markdown"
-            }
-          },
-          {
-            name: "PandaAGI Examples",
-            uri: "docs://pandaagi-examples",
-            metadata: {
-              mimeType: "text/markdown"
-            }
-          }
-        ]
-      },
-      id
-    })
-  };
+  if (listResourcesResult === null) {
+    listResourcesResult = JSON.stringify({
+      resources: RESOURCES.map(({ name, uri }) => ({
+        name,
+        uri,
+        metadata: {
+          mimeType: "text/markdown",
+          hash: getResourceHash(uri)
+        }
+      }))
+    });
+  }
+
+  return staticResultResponse(listResourcesResult, id);
 }
 
-function handleReadResource(params, id) {
-  const { uri } = params;
-  
-  let content = "";
-  
-  switch (uri) {
-    case "docs://pandaagi-docs":
-      content = `# PandaAGI SDK Documentation
-
-## Overview
-PandaAGI is a powerful SDK for building Agentic General Intelligence applications. It provides a simple API for creating AI agents that can execute tasks autonomously.
-
-## Key Features
-- **Agentic Capabilities**: Build AI agents that can accomplish tasks through tools
-- **Local Orchestration**: All execution happens in your environment with full control
-- **Universal Capability**: Create solutions for any domain or use case
-- **Developer-First**: Focus on user experience while we handle AI complexity
-
-## Core Components
-1. **The API**: Bidirectional WebSocket connection for real-time interaction
-2. **The SDK**: Handles orchestration, state management, and communication
-3. **The Execution Environment**: Secure, isolated context for agent operations
-
-## Built-in Agent Capabilities
-- 🌐 **Internet Access**: Real-time information gathering from any source
-- 🗂️ **File System**: Complete control over digital assets
-- 💻 **Code Execution**: Dynamic programming in multiple languages
-- 🚀 **Deployment**: Deploy web servers and APIs directly
-
-## Installation
-\`\`\`bash
-pip install panda-agi
-\`\`\`
-
-## Basic Usage
-\`\`\`python
-import asyncio
-from panda_agi import Agent
-from panda_agi.envs import LocalEnv
+function getResourceHash(uri) {
+  if (!resourceHashes.has(uri)) {
+    const content = getResourceContent(uri);
+    if (content === null) {
+      return null;
+    }
+    resourceHashes.set(uri, crypto.createHash('sha256').update(content, 'utf8').digest('hex'));
+  }
+  return resourceHashes.get(uri);
+}
 
-async def main():
-    # Create environment
-    agent_env = LocalEnv("./workspace")
-    
-    # Create agent
-    agent = Agent(environment=agent_env)
-    
-    # Execute task
-    response = agent.run("Analyze market trends")
-    print(response.output)
-    
-    # Cleanup
-    await agent.disconnect()
+function handleReadResource(params, id) {
+  const { uri, ifNoneMatch } = params;
+  const content = getResourceContent(uri);
 
-asyncio.run(main())
-\`\`\``;
-      break;
-      
-    case "docs://pandaagi-quickstart":
-      content = `# PandaAGI Quick Start Guide
-
-## Prerequisites
-- Python 3.8+
-- PandaAGI API key from [agi.pandas-ai.com](https://agi.pandas-ai.com/)
-
-## Step 1: Installation
-\`\`\`bash
-pip install panda-agi
-\`\`\`
-
-## Step 2: Set API Key
-\`\`\`bash
-export PANDA_AGI_KEY=your_api_key
-\`\`\`
-
-## Step 3: Create Your First Agent
-\`\`\`python
-import asyncio
-from panda_agi import Agent
-from panda_agi.envs import LocalEnv
+  if (content === null) {
+    return {
+      statusCode: 404,
+      headers: {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*'
+      },
+      body: JSON.stringify({
+        jsonrpc: "2.0",
+        error: { code: -32602, message: "Resource not found" },
+        id
+      })
+    };
+  }
 
-async def first_agent():
-    # Create workspace
-    agent_env = LocalEnv("./my_workspace")
-    
-    # Create agent
-    agent = Agent(environment=agent_env)
-    
-    # Simple task
-    response = agent.run("Tell me a joke about pandas")
-    print(response.output)
-    
-    await agent.disconnect()
+  const hash = getResourceHash(uri);
 
-asyncio.run(first_agent())
-\`\`\`
-
-## Step 4: Try Advanced Tasks
-\`\`\`python
-# Generate a report
-response = agent.run("Create a market analysis report for renewable energy")
-
-# Build a dashboard
-response = agent.run("Create a sales dashboard from our CSV data")
-
-# Deploy a website
-response = agent.run("Build a portfolio website for our company")
-\`\`\`
-
-## Next Steps
-- Explore the examples directory
-- Read the full documentation
-- Join the Discord community
-- Start building your own applications!`;
-      break;
-      
-    case "docs://agent-best-practices":
-      content = `# PandaAGI Agent Best Practices
-
-## Agent Design Principles
-
-### 1. Clear Task Definition
-- Write specific, actionable instructions
-- Break complex tasks into smaller steps
-- Provide context and constraints
-
-### 2. Environment Management
-- Use dedicated workspaces for different projects
-- Keep environments clean and organized
-- Monitor resource usage
-
-### 3. Error Handling
-- Implement proper error handling in your code
-- Test agents with various scenarios
-- Monitor agent performance and logs
-
-## Task Writing Guidelines
-
-### Good Task Examples:
-\`\`\`python
-# Specific and actionable
-agent.run("Analyze sales data from Q4 2024 and create a bar chart showing monthly revenue")
-
-# Provides context
-agent.run("Create a Python web scraper for product prices from ecommerce sites, focusing on electronics")
-\`\`\`
-
-### Avoid Vague Tasks:
-\`\`\`python
-# Too vague
-agent.run("Do something with data")
-
-# Lacks specificity
-agent.run("Make a website")
-\`\`\`
-
-## Performance Optimization
-
-### 1. Workspace Organization
-- Keep files organized in logical folders
-- Use descriptive file names
-- Clean up temporary files regularly
-
-### 2. Resource Management
-- Monitor memory and CPU usage
-- Use appropriate environment sizes
-- Implement caching where beneficial
-
-### 3. Security Considerations
-- Validate inputs and outputs
-- Use secure environments for sensitive data
-- Implement proper access controls
-
-## Common Patterns
-
-### Data Analysis Pipeline:
-1. Load and validate data
-2. Explore and clean data
-3. Perform analysis
-4. Generate visualizations
-5. Create report
-
-### Web Application Development:
-1. Design application architecture
-2. Implement core functionality
-3. Create user interface
-4. Add error handling
-5. Test and deploy
-
-## Troubleshooting Tips
-- Check API key configuration
-- Verify workspace permissions
-- Monitor agent logs for errors
-- Test with simpler tasks first
-- Use the community forum for help`;
-      break;
-      
-    case "docs://pandaagi-examples":
-      content = `# PandaAGI Examples
-
-## Example 1: Data Analysis Report
-\`\`\`python
-import asyncio
-from panda_agi import Agent
-from panda_agi.envs import LocalEnv
+  // The caller already holds this exact document, so skip the body
+  if (ifNoneMatch && ifNoneMatch === hash) {
+    return {
+      statusCode: 200,
+      headers: {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*'
+      },
+      body: JSON.stringify({
+        jsonrpc: "2.0",
+        result: {
+          contents: [],
+          notModified: true,
+          hash
+        },
+        id
+      })
+    };
+  }
 
-async def data_analysis_example():
-    agent_env = LocalEnv("./analysis_workspace")
-    agent = Agent(environment=agent_env)
-    
-    task = """
-    Analyze the provided sales data and create a comprehensive report:
-    1. Load the CSV file
-    2. Calculate key metrics (total sales, growth rate, top products)
-    3. Create visualizations (line charts, bar charts, pie charts)
-    4. Generate insights and recommendations
-    5. Export as PDF report
-    """
-    
-    response = agent.run(task)
-    print("Analysis complete:", response.output)
-    
-    await agent.disconnect()
-\`\`\`
+  if (!readResourceResults.has(uri)) {
+    readResourceResults.set(uri, JSON.stringify({
+      contents: [
+        {
+          uri: uri,
+          text: content,
+          hash
+        }
+      ]
+    }));
+  }
 
-## Example 2: Web Application
-\`\`\`python
-async def web_app_example():
-    agent_env = LocalEnv("./webapp_workspace")
-    agent = Agent(environment=agent_env)
-    
-    task = """
-    Create a Streamlit web application for data visualization:
-    1. Build an interface for uploading CSV files
-    2. Add data filtering and sorting controls
-    3. Create interactive charts (plotly)
-    4. Add export functionality
-    5. Deploy the app locally
-    """
-    
-    response = agent.run(task)
-    await agent.disconnect()
-\`\`\`
+  return staticResultResponse(readResourceResults.get(uri), id);
+}
 
-## Example 3: Market Research
-\`\`\`python
-async def market_research_example():
-    agent_env = LocalEnv("./research_workspace")
-    agent = Agent(environment=agent_env)
-    
-    task = """
-    Conduct market research on electric vehicles:
-    1. Search for recent market data and trends
-    2. Analyze competitor information
-    3. Identify key market drivers
-    4. Create market size projections
-    5. Generate executive summary
-    """
-    
-    response = agent.run(task)
-    await agent.disconnect()
-\`\`\`
+// Response compression. Bodies under the threshold aren't worth the CPU, and
+// NDJSON streams are left alone so progress lines aren't held back.
+const COMPRESSION_MIN_BYTES = parseInt(process.env.COMPRESSION_MIN_BYTES || '1024', 10);
+const BROTLI_QUALITY = parseInt(process.env.COMPRESSION_BROTLI_QUALITY || '5', 10);
+
+function acceptedEncodings(headers) {
+  const header = headers['accept-encoding'] || headers['Accept-Encoding'] || '';
+  const accepted = new Set();
+  for (const item of header.split(',')) {
+    const [coding, ...params] = item.trim().toLowerCase().split(';');
+    const q = params.map(p => p.trim()).find(p => p.startsWith('q='));
+    if (coding && !(q && parseFloat(q.slice(2)) === 0)) {
+      accepted.add(coding);
+    }
+  }
+  return accepted;
+}
 
-## Example 4: Automation Script
-\`\`\`python
-async def automation_example():
-    agent_env = LocalEnv("./automation_workspace")
-    agent = Agent(environment=agent_env)
-    
-    task = """
-    Create an automation script for daily reports:
-    1. Connect to database
-    2. Extract yesterday's data
-    3. Generate summary statistics
-    4. Create charts and visualizations
-    5. Send email with report attachment
-    """
-    
-    response = agent.run(task)
-    await agent.disconnect()
-\`\`\`
+function compressResponse(response, headers) {
+  const { staticPrefix, ...result } = response;
+  const contentType = (result.headers || {})['Content-Type'];
+  if (result.statusCode !== 200 || contentType !== 'application/json' ||
+      Buffer.byteLength(result.body) < COMPRESSION_MIN_BYTES) {
+    return result;
+  }
 
-## Example 5: Content Generation
-\`\`\`python
-async def content_generation_example():
-    agent_env = LocalEnv("./content_workspace")
-    agent = Agent(environment=agent_env)
-    
-    task = """
-    Generate content for our tech blog:
-    1. Research latest AI trends
-    2. Write engaging blog post (1500 words)
-    3. Create supporting graphics
-    4. Format for web publishing
-    5. Generate social media posts
-    """
-    
-    response = agent.run(task)
-    await agent.disconnect()
-\`\`\`
-
-## Running the Examples
-1. Install PandaAGI: \`pip install panda-agi\`
-2. Set your API key: \`export PANDA_AGI_KEY=your_key\`
-3. Copy any example code
-4. Run: \`python your_example.py\`
-
-## Tips for Success
-- Start with simple tasks and gradually increase complexity
-- Monitor the workspace directory for generated files
-- Check logs for detailed execution information
-- Experiment with different task descriptions
-- Use the UI for interactive development`;
-      break;
-      
-    default:
-      return {
-        statusCode: 404,
-        headers: {
-          'Content-Type': 'application/json',
-          'Access-Control-Allow-Origin': '*'
-        },
-        body: JSON.stringify({
-          jsonrpc: "2.0",
-          error: { code: -32602, message: "Resource not found" },
-          id
-        })
-      };
+  const accepted = acceptedEncodings(headers);
+  let encoding;
+  let data;
+  const spliced = staticPrefix && result.body.startsWith(staticPrefix);
+  if (spliced && (accepted.has('br') || accepted.has('gzip'))) {
+    // Precompressed static part plus the id appended to it: no per-request
+    // compression of the document itself
+    encoding = accepted.has('br') ? 'br' : 'gzip';
+    const suffix = result.body.slice(staticPrefix.length);
+    data = encoding === 'br' ? splicedBrotli(staticPrefix, suffix) : splicedGzip(staticPrefix, suffix);
+  } else if (accepted.has('br')) {
+    encoding = 'br';
+    data = zlib.brotliCompressSync(result.body, {
+      params: { [zlib.constants.BROTLI_PARAM_QUALITY]: BROTLI_QUALITY }
+    });
+  } else if (accepted.has('gzip')) {
+    encoding = 'gzip';
+    data = zlib.gzipSync(result.body);
+  } else {
+    return result;
   }
-  
+
   return {
-    statusCode: 200,
-    headers: {
-      'Content-Type': 'application/json',
-      'Access-Control-Allow-Origin': '*'
-    },
-    body: JSON.stringify({
-      jsonrpc: "2.0",
-      result: {
-        contents: [
-          {
-            uri: uri,
-            text: content
-          }
-        ]
-      },
-      id
-    })
+    ...result,
+    headers: { ...result.headers, 'Content-Encoding': encoding, 'Vary': 'Accept-Encoding' },
+    body: data.toString('base64'),
+    isBase64Encoded: true
   };
 }
 
+// Raw deflate of each static prefix, ending on a sync flush so more deflate
+// data can follow it, together with its CRC-32 and length
+const staticDeflates = new Map();
+
+const GZIP_HEADER = Buffer.from([0x1f, 0x8b, 8, 0, 0, 0, 0, 0, 0, 0xff]);
+
+const crc32 = zlib.crc32 || (() => {
+  // zlib.crc32 arrived in Node 20.15; fall back to a table-driven version
+  const table = new Int32Array(256).map((_, n) => {
+    let c = n;
+    for (let k = 0; k < 8; k++) {
+      c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+    }
+    return c;
+  });
+  return (data, value = 0) => {
+    let crc = ~value;
+    for (const byte of data) {
+      crc = table[(crc ^ byte) & 0xff] ^ (crc >>> 8);
+    }
+    return ~crc >>> 0;
+  };
+})();
+
+// A gzip member from a cached deflate of the prefix and a fresh one of the
+// suffix; concatenated deflate blocks are one valid stream
+function splicedGzip(prefix, suffix) {
+  let cached = staticDeflates.get(prefix);
+  if (cached === undefined) {
+    const data = Buffer.from(prefix, 'utf8');
+    cached = {
+      deflated: zlib.deflateRawSync(data, { level: 9, finishFlush: zlib.constants.Z_SYNC_FLUSH }),
+      crc: crc32(data),
+      length: data.length
+    };
+    staticDeflates.set(prefix, cached);
+  }
+
+  const tail = Buffer.from(suffix, 'utf8');
+  const trailer = Buffer.alloc(8);
+  trailer.writeUInt32LE(crc32(tail, cached.crc) >>> 0, 0);
+  trailer.writeUInt32LE((cached.length + tail.length) >>> 0, 4);
+  return Buffer.concat([GZIP_HEADER, cached.deflated, zlib.deflateRawSync(tail), trailer]);
+}
+
+// Brotli of each static prefix, flushed so the stream ends on a byte boundary
+// without being closed
+const staticBrotli = new Map();
+
+// Uncompressed meta-blocks carry at most 2^16 bytes with a 4-nibble length
+const BROTLI_RAW_BLOCK = 65536;
+const BROTLI_LAST_EMPTY = Buffer.from([0x03]);
+
+// A brotli stream from a cached compression of the prefix, the suffix stored
+// as uncompressed meta-blocks, and an empty last meta-block. The suffix is
+// only the request id and closing braces, so storing it costs a few bytes.
+function splicedBrotli(prefix, suffix) {
+  let cached = staticBrotli.get(prefix);
+  if (cached === undefined) {
+    cached = zlib.brotliCompressSync(prefix, {
+      finishFlush: zlib.constants.BROTLI_OPERATION_FLUSH,
+      params: { [zlib.constants.BROTLI_PARAM_QUALITY]: zlib.constants.BROTLI_MAX_QUALITY }
+    });
+    staticBrotli.set(prefix, cached);
+  }
+
+  const tail = Buffer.from(suffix, 'utf8');
+  const parts = [cached];
+  for (let start = 0; start < tail.length; start += BROTLI_RAW_BLOCK) {
+    const block = tail.subarray(start, start + BROTLI_RAW_BLOCK);
+    // ISLAST=0, MNIBBLES=4, MLEN-1, ISUNCOMPRESSED=1, then zero padding
+    const header = Buffer.alloc(3);
+    header.writeUIntLE(((block.length - 1) << 3) | (1 << 19), 0, 3);
+    parts.push(header, block);
+  }
+  parts.push(BROTLI_LAST_EMPTY);
+  return Buffer.concat(parts);
+}
+
+function getResourceContent(uri) {
+  const file = resourceFiles.get(uri);
+  if (file === undefined) {
+    return null;
+  }
+  if (!resourceContents.has(uri)) {
+    resourceContents.set(uri, fs.readFileSync(path.join(RESOURCES_DIR, file), 'utf8'));
+  }
+  return resourceContents.get(uri);
+}
+
 function generateMockTaskResponse(task) {
   const responses = {
     "joke": "🐼 Why don't pandas ever get tired? Because they always have their bear-y own energy! Plus, they're always bamboo-zled by how much they can accomplish!",